@@ -444,6 +444,24 @@ export function createTtsController(options = {}) {
     };
   }
 
+  function prefetchPending(entry) {
+    // Lets the worker render the queued utterance while the active one plays; the later speak reuses it.
+    if (!workerReady || isEntryExpired(entry)) {
+      return;
+    }
+    sendWorker({
+      id: `prefetch-${entry.generation}-${now()}`,
+      op: 'prefetch',
+      session_id: entry.sessionId,
+      utterance_id: entry.utteranceId,
+      text: entry.text,
+      speaker: entry.speaker,
+      ts: entry.createdAt,
+      ttl_ms: entry.ttlMs,
+      expires_at: entry.createdAt + entry.ttlMs
+    });
+  }
+
   function maybeStartPending() {
     if (active || !pending) {
       return;
@@ -726,6 +744,7 @@ export function createTtsController(options = {}) {
 
     if (active) {
       pending = entry;
+      prefetchPending(entry);
       emitState(entry.sessionId, entry.utteranceId, 'queued', {
         ...(entry.agentId ? { agent_id: entry.agentId } : {}),
         ...(entry.agentLabel ? { agent_label: entry.agentLabel } : {}),
@@ -10,14 +10,24 @@ QWEN3_VENV="${QWEN3_TTS_VENV:-$ROOT_DIR/.venv-qwen-tts}"
 usage() {
   cat <<'EOF'
 Usage: ./scripts/run-tts-worker.sh [--smoke]
+       ./scripts/run-tts-worker.sh --forkserver
+       ./scripts/run-tts-worker.sh --service
 
 Behavior:
   TTS_ENGINE=kokoro  Run the existing tts-worker via uv and the tts-worker project.
   TTS_ENGINE=qwen3   Run the worker with the optional dedicated Qwen3 virtualenv.
+  TTS_ENGINE=route   Keep Qwen3 and Kokoro loaded and route each utterance by deadline
+                     (uses the Qwen3 virtualenv, which then also needs kokoro-onnx and misaki).
+  --forkserver       Preload the engine once and fork a worker for each MH_TTS_FORKSERVER=1 launch.
+  --service          Load the engine once and serve every MH_TTS_SERVICE=1 launch over one socket.
 
 Environment:
   TTS_ENGINE: defaults to kokoro
   QWEN3_TTS_VENV: path to the optional Qwen3 virtualenv (default: ./.venv-qwen-tts)
+  MH_TTS_FORKSERVER: set to 1 to launch through a running fork server (falls back to a normal worker)
+  MH_TTS_FORKSERVER_SOCKET: fork-server socket (default: $XDG_RUNTIME_DIR/mh-tts-worker.sock)
+  MH_TTS_SERVICE: set to 1 to launch as a client of a running service (falls back to a normal worker)
+  MH_TTS_SERVICE_SOCKET: service socket (default: $XDG_RUNTIME_DIR/mh-tts-service.sock)
 EOF
 }
 
@@ -30,11 +40,24 @@ if (($# > 0)); then
   esac
 fi
 
+WORKER_MODULE=(-m tts_worker)
+if (($# > 0)) && [[ "$1" == "--forkserver" ]]; then
+  shift
+  WORKER_MODULE=(-m tts_worker.forkserver serve)
+elif (($# > 0)) && [[ "$1" == "--service" ]]; then
+  shift
+  WORKER_MODULE=(-m tts_worker.service serve)
+elif [[ "${MH_TTS_SERVICE:-0}" == "1" ]]; then
+  WORKER_MODULE=(-m tts_worker.service connect)
+elif [[ "${MH_TTS_FORKSERVER:-0}" == "1" ]]; then
+  WORKER_MODULE=(-m tts_worker.forkserver connect)
+fi
+
 case "${ENGINE,,}" in
   kokoro)
-    exec uv run --project tts-worker python -m tts_worker "$@"
+    exec uv run --project tts-worker python "${WORKER_MODULE[@]}" "$@"
     ;;
-  qwen3)
+  qwen3|route)
     PYTHON_BIN="$QWEN3_VENV/bin/python"
     if [[ ! -x "$PYTHON_BIN" ]]; then
       echo "[run-tts-worker] missing Qwen3 virtualenv: $QWEN3_VENV" >&2
@@ -48,10 +71,10 @@ case "${ENGINE,,}" in
       export PYTHONPATH="$ROOT_DIR/tts-worker/src"
     fi
 
-    exec "$PYTHON_BIN" -m tts_worker "$@"
+    exec "$PYTHON_BIN" "${WORKER_MODULE[@]}" "$@"
     ;;
   *)
-    echo "[run-tts-worker] unsupported TTS_ENGINE: $ENGINE (expected kokoro|qwen3)" >&2
+    echo "[run-tts-worker] unsupported TTS_ENGINE: $ENGINE (expected kokoro|qwen3|route)" >&2
     exit 2
     ;;
 esac
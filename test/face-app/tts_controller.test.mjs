@@ -276,6 +276,34 @@ test('tts controller keeps only latest pending replace and starts it after stop'
   assert.equal(controller.snapshot().pendingGeneration, null);
 });
 
+test('tts controller asks the worker to prefetch the pending utterance', async () => {
+  const nowMs = 10_000;
+  const worker = new FakeWorker();
+  const controller = createTtsController({
+    worker,
+    now: () => nowMs,
+    gate: { check: () => ({ allow: true }) },
+    broadcast: () => true,
+    log: { info: () => {}, warn: () => {}, error: () => {} }
+  });
+
+  worker.emit('message', { type: 'ready', voice: 'af_heart', engine: 'kokoro' });
+
+  await controller.handleSayPayload({ type: 'say', session_id: 's1', utterance_id: 'u1', text: 'first', priority: 2, policy: 'replace', ttl_ms: 5_000, ts: nowMs });
+  await controller.handleSayPayload({ type: 'say', session_id: 's1', utterance_id: 'u2', text: 'second', priority: 2, policy: 'replace', ttl_ms: 5_000, ts: nowMs });
+
+  const prefetches = worker.sent.filter((payload) => payload.op === 'prefetch');
+  assert.equal(prefetches.length, 1);
+  assert.equal(prefetches[0].utterance_id, 'u2');
+  assert.equal(prefetches[0].text, 'second');
+  assert.equal(prefetches[0].expires_at, 15_000);
+
+  worker.emit('message', { type: 'event', phase: 'play_stop', generation: 1, utterance_id: 'u1', session_id: 's1' });
+
+  assert.equal(speaks(worker)[1].utterance_id, 'u2');
+  assert.equal(speaks(worker)[1].text, prefetches[0].text);
+});
+
 test('tts controller drops ttl-expired utterance before dispatch', async () => {
   let nowMs = 8_000;
   const worker = new FakeWorker();
@@ -0,0 +1,98 @@
+"""Compare the previous copy-heavy WAV/browser encoding with the single-buffer PCM path.
+
+Run from the repository root:
+
+    python tts-worker/benchmarks/pcm_encode_bench.py [--seconds 60] [--repeat 5]
+
+Both paths start from the same float32 utterance and end with the JSON line written for the browser; peak
+memory is measured with tracemalloc, which numpy reports its buffers to.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import io
+import json
+import sys
+import time
+import tracemalloc
+import wave
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+from tts_worker.playback import FADE_IN_MS, FADE_OUT_MS, encode_pcm
+
+SAMPLE_RATE = 24_000
+
+
+def legacy_encode(audio: np.ndarray) -> int:
+  # The path before the shared buffer: fade copy, clip, scale, cast, tobytes, wave into BytesIO, getvalue,
+  # base64, decode, json.dumps, and a second clip conversion for aplay.
+  shaped = np.array(audio, dtype=np.float32, copy=True)
+  fade_in = int(SAMPLE_RATE * FADE_IN_MS / 1000)
+  fade_out = int(SAMPLE_RATE * FADE_OUT_MS / 1000)
+  shaped[:fade_in] *= np.linspace(0.0, 1.0, fade_in, dtype=np.float32)
+  shaped[-fade_out:] *= np.linspace(1.0, 0.0, fade_out, dtype=np.float32)
+  device_pcm = (np.clip(shaped, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
+
+  pcm_bytes = (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
+  with io.BytesIO() as output:
+    with wave.open(output, 'wb') as wav_file:
+      wav_file.setnchannels(1)
+      wav_file.setsampwidth(2)
+      wav_file.setframerate(SAMPLE_RATE)
+      wav_file.writeframes(pcm_bytes)
+    wav_bytes = output.getvalue()
+  encoded = base64.b64encode(wav_bytes).decode('ascii')
+  line = json.dumps({'type': 'audio', 'audio_base64': encoded}, ensure_ascii=False)
+  return len(line) + len(device_pcm)
+
+
+def shared_encode(audio: np.ndarray) -> int:
+  buffer = encode_pcm(audio, SAMPLE_RATE)
+  encoded = buffer.wav_base64()
+  head = json.dumps({'type': 'audio'}, ensure_ascii=False)
+  # ProtocolWriter writes the head and the base64 bytes separately, so no joined line is ever built.
+  return len(head) + len(encoded) + len(buffer.pcm)
+
+
+def measure(encode: Callable[[np.ndarray], int], audio: np.ndarray, repeat: int) -> tuple[float, float]:
+  encode(audio)
+  started = time.perf_counter()
+  for _ in range(repeat):
+    encode(audio)
+  seconds = (time.perf_counter() - started) / repeat
+
+  tracemalloc.start()
+  encode(audio)
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return seconds, peak / (1024 * 1024)
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--seconds', type=float, default=60.0)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  rng = np.random.default_rng(3)
+  audio = (0.3 * rng.standard_normal(int(args.seconds * SAMPLE_RATE))).astype(np.float32)
+  print(f'{args.seconds:g}s utterance at {SAMPLE_RATE} Hz ({audio.nbytes / (1024 * 1024):.1f} MiB float32)')
+  print(f'{"path":<8} {"encode ms":>10} {"peak MiB":>10}')
+  for name, encode in (('legacy', legacy_encode), ('shared', shared_encode)):
+    seconds, peak = measure(encode, audio, args.repeat)
+    print(f'{name:<8} {seconds * 1000:>10.1f} {peak:>10.1f}')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,131 @@
+"""Compare the built-in WSOLA time-stretcher with librosa's phase vocoder.
+
+Run from the repository root:
+
+    python tts-worker/benchmarks/time_stretch_bench.py [--seconds 8] [--rates 0.8,1.1,1.25,1.5]
+
+librosa is optional; without it only the built-in stretcher is measured.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+from tts_worker.time_stretch import StreamingTimeStretcher, time_stretch
+
+SAMPLE_RATE = 24_000
+BLOCK_SAMPLES = 2_000
+
+
+def synth_voice_like(seconds: float, sample_rate: int) -> np.ndarray:
+  # Harmonic source with slow pitch glide and syllable-rate amplitude bursts, roughly speech shaped.
+  t = np.arange(int(seconds * sample_rate)) / sample_rate
+  f0 = 180.0 + 30.0 * np.sin(2.0 * np.pi * 0.7 * t)
+  phase = 2.0 * np.pi * np.cumsum(f0) / sample_rate
+  voiced = sum((0.6 / k) * np.sin(k * phase) for k in range(1, 9))
+  envelope = 0.5 + 0.5 * np.sin(2.0 * np.pi * 4.0 * t) ** 2
+  noise = np.random.default_rng(7).normal(0.0, 0.01, t.shape[0])
+  return (0.3 * voiced * envelope + noise).astype(np.float32)
+
+
+def pure_tone(seconds: float, sample_rate: int, hz: float = 220.0) -> np.ndarray:
+  t = np.arange(int(seconds * sample_rate)) / sample_rate
+  return (0.5 * np.sin(2.0 * np.pi * hz * t)).astype(np.float32)
+
+
+def dominant_hz(audio: np.ndarray, sample_rate: int) -> float:
+  trimmed = audio[sample_rate // 10:-sample_rate // 10]
+  spectrum = np.abs(np.fft.rfft(trimmed * np.hanning(trimmed.shape[0])))
+  return float(np.argmax(spectrum)) * sample_rate / trimmed.shape[0]
+
+
+def average_log_spectrum(audio: np.ndarray, frame: int = 1024) -> np.ndarray:
+  frames = np.lib.stride_tricks.sliding_window_view(audio, frame)[::frame // 2]
+  spectra = np.abs(np.fft.rfft(frames * np.hanning(frame), axis=1))
+  return 20.0 * np.log10(np.mean(spectra, axis=0) + 1e-9)
+
+
+def spectral_distance_db(reference: np.ndarray, candidate: np.ndarray) -> float:
+  # A time-stretch should keep the long-term spectrum of the source; report the RMS dB deviation from it.
+  return float(np.sqrt(np.mean(np.square(average_log_spectrum(reference) - average_log_spectrum(candidate)))))
+
+
+def best_of(runs: int, fn: Callable[[], np.ndarray]) -> tuple[float, np.ndarray]:
+  best = float('inf')
+  result = np.zeros(0, dtype=np.float32)
+  for _ in range(runs):
+    started = time.perf_counter()
+    result = fn()
+    best = min(best, time.perf_counter() - started)
+  return best, result
+
+
+def stretch_in_blocks(audio: np.ndarray, rate: float) -> np.ndarray:
+  stretcher = StreamingTimeStretcher(rate, SAMPLE_RATE)
+  parts = [stretcher.process(audio[start:start + BLOCK_SAMPLES]) for start in range(0, audio.shape[0], BLOCK_SAMPLES)]
+  parts.append(stretcher.flush())
+  return np.concatenate(parts)
+
+
+def main(argv: list[str]) -> int:
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--seconds', type=float, default=8.0)
+  parser.add_argument('--rates', default='0.8,1.1,1.25,1.5')
+  parser.add_argument('--runs', type=int, default=3)
+  args = parser.parse_args(argv)
+
+  try:
+    import_started = time.perf_counter()
+    import librosa  # type: ignore
+
+    # librosa loads its submodules lazily, so time the first call too; that is what the first utterance paid.
+    librosa.effects.time_stretch(np.zeros(SAMPLE_RATE, dtype=np.float32), rate=1.1)
+    librosa_import_s = time.perf_counter() - import_started
+  except Exception:
+    librosa = None
+    librosa_import_s = None
+
+  voice = synth_voice_like(args.seconds, SAMPLE_RATE)
+  tone = pure_tone(args.seconds, SAMPLE_RATE)
+  print(f'input: {args.seconds:g}s @ {SAMPLE_RATE} Hz, best of {args.runs} runs')
+  if librosa_import_s is not None:
+    print(f'librosa import + first call: {librosa_import_s * 1000:.0f} ms')
+
+  header = f'{"rate":>5} {"impl":<12} {"ms":>8} {"ms/s":>7} {"len err":>8} {"tone Hz":>8} {"spec dB":>8}'
+  print(header)
+  print('-' * len(header))
+
+  for rate in [float(item) for item in args.rates.split(',') if item.strip()]:
+    implementations: list[tuple[str, Callable[[np.ndarray], np.ndarray]]] = [
+      ('wsola', lambda audio, rate=rate: time_stretch(audio, rate, SAMPLE_RATE)),
+      ('wsola-block', lambda audio, rate=rate: stretch_in_blocks(audio, rate)),
+    ]
+    if librosa is not None:
+      implementations.append(('librosa', lambda audio, rate=rate: librosa.effects.time_stretch(audio, rate=rate)))
+
+    expected = voice.shape[0] / rate
+    for name, stretch in implementations:
+      elapsed, rendered = best_of(args.runs, lambda: stretch(voice))
+      tone_hz = dominant_hz(stretch(tone), SAMPLE_RATE)
+      print(
+        f'{rate:>5.2f} {name:<12} {elapsed * 1000:>8.1f} {elapsed * 1000 / args.seconds:>7.1f} '
+        f'{(rendered.shape[0] - expected) / expected:>8.2%} {tone_hz:>8.1f} {spectral_distance_db(voice, rendered):>8.2f}'
+      )
+
+  return 0
+
+
+if __name__ == '__main__':
+  raise SystemExit(main(sys.argv[1:]))
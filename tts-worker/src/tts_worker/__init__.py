@@ -1,11 +1,28 @@
 """Minimum Headroom TTS worker package."""
 
 __all__ = [
+  'audio_stream',
   'engine',
+  'engine_host',
+  'engine_router',
+  'forkserver',
   'chunking',
   'kokoro_engine',
+  'leadin',
+  'memory',
   'playback',
+  'prefetch',
   'protocol',
+  'qwen3_batching',
   'qwen3_engine',
   'qwen3_text',
+  'realtime',
+  'resample',
+  'revision_cache',
+  'service',
+  'silence',
+  'sinks',
+  'speech_lanes',
+  'startup',
+  'time_stretch',
 ]
@@ -2,23 +2,49 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import functools
 import json
 import os
 import sys
 import time
 import traceback
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Any, Callable, Iterator, Optional
 
+import numpy as np
+
+from .audio_stream import AudioBlock, ThreadedBlockStream
 from .engine import EngineMetadata, TtsEngine
-from .kokoro_engine import KokoroEngine, resolve_model_paths
-from .playback import PlaybackEngine, encode_wav_base64
-from .protocol import ParsedCommand, ProtocolWriter, parse_command
-from .qwen3_engine import Qwen3TtsEngine
+from .engine_host import FOREGROUND_RENDER, HostedTtsEngine, resolve_engine_host_mode, resolve_host_kill_after
+from .engine_router import RouteDecision, RoutingTtsEngine, load_route_config
+from .leadin import LEADIN_TEXT, LeadinClip, LeadinClipCache, resolve_leadin_mode, split_leadin
+from .playback import (
+  BrowserAudioStats,
+  BrowserClip,
+  BrowserClipEncoder,
+  PcmBuffer,
+  PlaybackEngine,
+  encode_browser_clip,
+  encode_pcm,
+  resolve_browser_audio_codec,
+)
+from .memory import RENDER_BYTES_PER_SAMPLE, MemoryAccounting, UtteranceMemory, resolve_memory_budget, resolve_memory_profile
+from .prefetch import PREFETCH_DEFAULT_TTL_MS, PrefetchCache, PrefetchEntry, resolve_prefetch_budget
+from .protocol import SPEAK_SCHEMA, IngestLatency, ParsedCommand, ProtocolWriter, parse_command
+from .realtime import RealtimeController, resolve_playback_priority, resolve_realtime_mode
+from .resample import iter_resampled, resample, resolve_output_sample_rate
+from .revision_cache import RevisionKey
 from .shared_text import normalize_shared_tts_text
+from .sinks import ArchiveSink, ArchiveStream, SinkDelivery, SinkFanout, resolve_archive_dir
+from .speech_lanes import LaneEntry, SpeechLanes, clamp_priority, normalize_policy, resolve_scheduler_mode
+from .startup import DeferredTtsEngine, StartupProfile, resolve_fast_start
 
 
 AUDIO_TARGETS = {'local', 'browser', 'both'}
+LOADING_POLICIES = {'wait', 'drop'}
+ENGINE_WAIT_POLL_S = 0.05
+# Speak text arrives on one line, so allow far more than StreamReader's 64 KiB default.
+STDIN_LINE_LIMIT = 4 * 1024 * 1024
 
 
 def resolve_audio_target(raw: Optional[str]) -> str:
@@ -30,6 +56,15 @@ def resolve_audio_target(raw: Optional[str]) -> str:
   raise ValueError(f'unsupported MH_AUDIO_TARGET: {raw} (expected local|browser|both)')
 
 
+def resolve_loading_policy(raw: Optional[str]) -> str:
+  if raw is None or raw.strip() == '':
+    return 'wait'
+  normalized = raw.strip().lower()
+  if normalized in LOADING_POLICIES:
+    return normalized
+  raise ValueError(f'unsupported MH_TTS_LOADING_POLICY: {raw} (expected wait|drop)')
+
+
 @dataclass
 class SpeakRequest:
   request_id: Optional[str]
@@ -41,15 +76,104 @@ class SpeakRequest:
   expires_at: int
   message_id: Optional[str]
   revision: Optional[int]
+  priority: int = 0
+  policy: str = 'replace'
+
+
+@dataclass
+class PrerenderedSpeech:
+  engine: TtsEngine
+  prepared_text: str
+  audio: np.ndarray
+  sample_rate: int
+
+
+def _iter_leadin_blocks(clip: LeadinClip, remainder: Callable[[], Iterator[AudioBlock]]) -> Iterator[AudioBlock]:
+  yield clip
+  yield from remainder()
+
+
+def _iter_chunked_blocks(engine: TtsEngine, chunks: list[str], kwargs: dict[str, Any]) -> Iterator[AudioBlock]:
+  for chunk in chunks:
+    yield engine.synthesize_text(chunk, **kwargs)
+
+
+class _ThreadedLineReader:
+  """Fallback for stdin the event loop cannot watch: one executor readline per line."""
+
+  def __init__(self, stream: Any) -> None:
+    self._stream = stream
+
+  async def readline(self) -> bytes:
+    return await asyncio.get_running_loop().run_in_executor(None, self._stream.readline)
 
 
 class WorkerRuntime:
-  def __init__(self) -> None:
-    self.writer = ProtocolWriter()
-    self.engine = create_tts_engine()
+  def __init__(
+    self,
+    engine: Optional[TtsEngine] = None,
+    *,
+    profile: Optional[StartupProfile] = None,
+    writer: Optional[ProtocolWriter] = None,
+  ) -> None:
+    self.writer = writer if writer is not None else ProtocolWriter()
+    self.startup = profile if profile is not None else StartupProfile()
+    self.realtime: Optional[RealtimeController] = None
+    if resolve_realtime_mode(os.environ.get('MH_TTS_REALTIME')) == 'on':
+      self.realtime = RealtimeController(
+        playback_cpus=os.environ.get('MH_TTS_PLAYBACK_CPUS'),
+        priority=resolve_playback_priority(os.environ.get('MH_TTS_PLAYBACK_PRIORITY')),
+      )
+      # Engine thread pools inherit the affinity of the thread that starts them.
+      self.realtime.pin_synthesis()
+    self.deferred: Optional[DeferredTtsEngine] = None
+    if engine is not None:
+      # The fork server hands in the engine it loaded before forking this worker.
+      self.engine = engine
+    elif resolve_fast_start(os.environ.get('MH_TTS_FAST_START')):
+      # Engine imports and the model load move to a thread; ready goes out with a loading engine_state.
+      self.deferred = DeferredTtsEngine(create_tts_engine, _placeholder_metadata(), profile=self.startup)
+      self.engine = self.deferred
+    else:
+      with self.startup.stage('engine_build'):
+        self.engine = create_tts_engine()
     self.audio_target = resolve_audio_target(os.environ.get('MH_AUDIO_TARGET'))
     self.browser_audio_enabled = self.audio_target in ('browser', 'both')
-    self.playback = PlaybackEngine(allow_local_output=self.audio_target in ('local', 'both'))
+    self.browser_codec = resolve_browser_audio_codec(os.environ.get('MH_BROWSER_AUDIO_CODEC'))
+    self.browser_audio_stats = BrowserAudioStats(self.browser_codec)
+    archive_dir = resolve_archive_dir(os.environ.get('MH_TTS_ARCHIVE_DIR'))
+    self.archive: Optional[ArchiveSink] = ArchiveSink(archive_dir) if archive_dir is not None else None
+    self.sinks = SinkFanout()
+    self.loading_policy = resolve_loading_policy(os.environ.get('MH_TTS_LOADING_POLICY'))
+    self.output_sample_rate = resolve_output_sample_rate(os.environ.get('MH_TTS_OUTPUT_RATE'))
+    # A resampled copy is float32 too; the browser and archive sinks add an int16 one.
+    self.memory = MemoryAccounting(
+      resolve_memory_profile(os.environ.get('MH_TTS_MEMORY_PROFILE')),
+      resolve_memory_budget(os.environ.get('MH_TTS_UTTERANCE_BUDGET_MB')),
+      bytes_per_sample=(
+        RENDER_BYTES_PER_SAMPLE
+        + (4 if self.output_sample_rate is not None else 0)
+        + (2 if self.browser_audio_enabled or self.archive is not None else 0)
+      ),
+    )
+    self.playback = PlaybackEngine(
+      allow_local_output=self.audio_target in ('local', 'both'),
+      feeder=self.realtime.playback_executor() if self.realtime is not None else None,
+    )
+    self.scheduler_mode = resolve_scheduler_mode(os.environ.get('MH_TTS_SCHEDULER'))
+    self.lanes: Optional[SpeechLanes] = SpeechLanes() if self.scheduler_mode == 'lanes' else None
+    self._lane_generations: dict[str, int] = {}
+    self._lookahead_task: Optional[asyncio.Task[Optional[PrerenderedSpeech]]] = None
+    self._lane_counters = {'superseded': 0, 'prerendered_played': 0, 'prerender_discarded': 0}
+    self.prefetch = PrefetchCache(resolve_prefetch_budget(os.environ.get('MH_TTS_PREFETCH_BUDGET_MB')))
+    self._prefetch_worker: Optional[asyncio.Task[None]] = None
+    self._foreground_synth = 0
+    self._coalesced_speaks = 0
+    self.ingest = IngestLatency('thread')
+    self.leadin: Optional[LeadinClipCache] = None
+    if resolve_leadin_mode(os.environ.get('MH_TTS_LEADIN')) == 'cached':
+      self.leadin = LeadinClipCache()
+    self._leadin_tasks: set[asyncio.Task[None]] = set()
 
     self.latest_generation = -1
     self.current_task: Optional[asyncio.Task[None]] = None
@@ -58,18 +182,57 @@ class WorkerRuntime:
     self.current_utterance_id: Optional[str] = None
     self.shutdown_requested = False
 
-  async def run(self) -> None:
-    self._emit_ready()
+  async def run(self, reader: Optional[asyncio.StreamReader] = None) -> None:
+    if self.realtime is not None:
+      asyncio.get_running_loop().set_default_executor(self.realtime.synthesis_executor())
+    if self.deferred is not None:
+      # Start the load first so the immediate ready already reports the engine as loading.
+      self._start_engine_preload()
+      self._emit_ready()
+    else:
+      self._emit_ready()
+      self._start_engine_preload()
+    if self.realtime is not None:
+      # Loader threads are running on the synthesis CPUs; the event loop drives the mouth clock from here on.
+      self.realtime.pin_playback()
+    self._warm_leadin()
 
     queue: asyncio.Queue[ParsedCommand] = asyncio.Queue()
-    reader_task = asyncio.create_task(self._stdin_reader(queue))
+    if reader is not None:
+      # Service mode: commands come from this client's socket instead of stdin.
+      self.ingest.reader = 'socket'
+      reader_task = asyncio.create_task(self._read_commands(reader, queue))
+    else:
+      reader_task = asyncio.create_task(self._stdin_reader(queue))
 
     try:
       while not self.shutdown_requested:
-        command = await queue.get()
-        await self._handle_command(command)
+        commands = [await queue.get()]
+        # Drain whatever else arrived meanwhile so a burst of speaks starts only its newest one.
+        while not queue.empty():
+          commands.append(queue.get_nowait())
+        superseded = self._coalesce_speaks(commands)
+        for index, command in enumerate(commands):
+          if self.shutdown_requested:
+            break
+          if command.received_at > 0:
+            self.ingest.observe(time.monotonic() - command.received_at)
+          if index in superseded:
+            self._drop_coalesced(superseded[index])
+          else:
+            await self._handle_command(command)
     finally:
       reader_task.cancel()
+      self.shutdown_requested = True
+      if self.realtime is not None:
+        self.realtime.close()
+      self.memory.close()
+      if self._prefetch_worker is not None:
+        self._prefetch_worker.cancel()
+      self.prefetch.clear()
+      if self.lanes is not None:
+        for entry in self.lanes.clear():
+          self._release_prerender(entry)
       if self.current_task and not self.current_task.done():
         self.current_task.cancel()
         self.playback.stop()
@@ -81,6 +244,7 @@ class WorkerRuntime:
           pass
 
   def _emit_ready(self) -> None:
+    self.startup.mark('ready')
     metadata = self._metadata
     self.writer.ready(
       voice=metadata.voice,
@@ -89,8 +253,150 @@ class WorkerRuntime:
       voices_path=metadata.voices_path,
       playback_backend=self.playback.backend,
       audio_target=self.audio_target,
+      engine_state=self._engine_status(),
     )
 
+  def _start_engine_preload(self) -> None:
+    start_preload = getattr(self.engine, 'start_preload', None)
+    if not callable(start_preload):
+      self._engine_settled()
+      return
+    loop = asyncio.get_running_loop()
+
+    def on_preloaded() -> None:
+      # Announce ready again once warm so clients see the measured load time and real-time factor.
+      try:
+        loop.call_soon_threadsafe(self._emit_ready)
+        loop.call_soon_threadsafe(self._warm_leadin)
+        loop.call_soon_threadsafe(self._engine_settled)
+      except RuntimeError:
+        pass
+
+    if not start_preload(on_done=on_preloaded):
+      self._engine_settled()
+
+  def _engine_settled(self) -> None:
+    self.startup.finish()
+    if self.realtime is not None:
+      self.realtime.freeze_heap()
+
+  def _engine_status(self) -> Optional[dict[str, Any]]:
+    engine_status = getattr(self.engine, 'engine_status', None)
+    if not callable(engine_status):
+      return None
+    return engine_status()
+
+  def _collect_stats(self) -> dict[str, Any]:
+    stats: dict[str, Any] = {
+      'engine': self._metadata.engine,
+      'latest_generation': self.latest_generation,
+      'speaking': self.current_task is not None and not self.current_task.done(),
+    }
+    engine_status = self._engine_status()
+    if engine_status is not None:
+      stats['engine_state'] = engine_status
+    stats['scheduler'] = self.scheduler_mode
+    stats['startup'] = {'fast_start': self.deferred is not None, **self.startup.stats()}
+    stats['coalesced_speaks'] = self._coalesced_speaks
+    stats['ingest'] = self.ingest.stats()
+    stats['prefetch'] = self.prefetch.stats()
+    revision_cache = self._revision_cache_stats()
+    if revision_cache:
+      stats['revision_cache'] = revision_cache
+    if self.leadin is not None:
+      stats['leadin'] = self.leadin.stats()
+    if self.output_sample_rate is not None:
+      stats['output_sample_rate'] = self.output_sample_rate
+    stats['playback_timing'] = self.playback.timing.stats()
+    stats['memory'] = self.memory.stats()
+    if self.realtime is not None:
+      stats['realtime'] = self.realtime.stats()
+    if self.browser_audio_enabled:
+      stats['browser_audio'] = self.browser_audio_stats.stats()
+    sinks = self.sinks.stats()
+    if sinks:
+      stats['sinks'] = sinks
+    service_stats = getattr(self.engine, 'service_stats', None)
+    if callable(service_stats):
+      stats['service'] = service_stats()
+    if self.lanes is not None:
+      stats['lanes'] = {
+        'queued': len(self.lanes),
+        'depth': self.lanes.depths(),
+        **self._lane_counters,
+      }
+    return stats
+
+  def _synthesis_kwargs(self, engine: TtsEngine, request: SpeakRequest) -> dict[str, Any]:
+    kwargs: dict[str, Any] = {'voice_override': request.speaker}
+    # Revisions of one agent message share chunk audio on engines that keep a revision cache.
+    if request.message_id is not None and request.revision is not None and getattr(engine, 'revision_cache', None) is not None:
+      kwargs['revision'] = RevisionKey(request.message_id, request.revision)
+    return kwargs
+
+  def _named_engines(self) -> list[tuple[str, TtsEngine]]:
+    engines = getattr(self.engine, 'engines', None)
+    return list(engines) if isinstance(engines, list) else [(self._metadata.engine, self.engine)]
+
+  def _engine_name(self, engine: TtsEngine) -> str:
+    for name, candidate in self._named_engines():
+      if candidate is engine:
+        return name
+    return self._metadata.engine
+
+  def _warm_leadin(self, engine: Optional[TtsEngine] = None, speaker: Optional[str] = None) -> None:
+    # Browser clients play one clip per utterance, so a lead-in could not start ahead of the rest.
+    if self.leadin is None or self.audio_target == 'browser':
+      return
+    candidates = [(self._engine_name(engine), engine)] if engine is not None else self._named_engines()
+    for name, candidate in candidates:
+      is_busy_loading = getattr(candidate, 'is_busy_loading', None)
+      if callable(is_busy_loading) and is_busy_loading():
+        continue
+      if not self.leadin.claim(name, speaker):
+        continue
+      task = asyncio.create_task(self._render_leadin(candidate, name, speaker))
+      self._leadin_tasks.add(task)
+      task.add_done_callback(self._leadin_tasks.discard)
+
+  async def _render_leadin(self, engine: TtsEngine, name: str, speaker: Optional[str]) -> None:
+    assert self.leadin is not None
+    # Started from inside a speak when a new speaker shows up, but not part of that speak's render.
+    FOREGROUND_RENDER.set(False)
+    clip: Optional[LeadinClip] = None
+    try:
+      prepared = engine.prepare_text(LEADIN_TEXT)
+      clip = await asyncio.to_thread(engine.synthesize_text, prepared, voice_override=speaker)
+    except Exception:
+      clip = None
+    finally:
+      self.leadin.store(name, speaker, clip)
+
+  def _take_leadin(self, engine: TtsEngine, request: SpeakRequest, prepared_text: str) -> Optional[tuple[LeadinClip, str]]:
+    if self.leadin is None or self.audio_target == 'browser':
+      return None
+    remainder = split_leadin(prepared_text)
+    if remainder is None:
+      return None
+    clip = self.leadin.get(self._engine_name(engine), request.speaker)
+    if clip is None:
+      # This utterance synthesizes the filler itself; the clip is rendered for the next one.
+      self._warm_leadin(engine, request.speaker)
+      return None
+    return clip, remainder
+
+  def _revision_cache_stats(self) -> dict[str, Any]:
+    stats: dict[str, Any] = {}
+    for name, engine in self._named_engines():
+      cache = getattr(engine, 'revision_cache', None)
+      if cache is not None:
+        stats[name] = cache.stats()
+    return stats
+
+  def _engine_busy_loading(self) -> bool:
+    is_busy_loading = getattr(self.engine, 'is_busy_loading', None)
+    return bool(callable(is_busy_loading) and is_busy_loading())
+
   @property
   def _metadata(self) -> EngineMetadata:
     metadata = getattr(self.engine, 'metadata', None)
@@ -99,12 +405,34 @@ class WorkerRuntime:
     raise RuntimeError('tts engine did not expose EngineMetadata')
 
   async def _stdin_reader(self, queue: asyncio.Queue[ParsedCommand]) -> None:
+    reader = await self._open_stdin_stream()
+    if reader is None:
+      await self._read_commands(_ThreadedLineReader(sys.stdin.buffer), queue)
+      return
+    self.ingest.reader = 'stream'
+    await self._read_commands(reader, queue)
+
+  async def _open_stdin_stream(self) -> Optional[asyncio.StreamReader]:
     loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STDIN_LINE_LIMIT)
+    try:
+      await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except (ValueError, OSError, NotImplementedError):
+      # Regular files and consoles cannot be watched by the event loop; read them on a thread instead.
+      return None
+    return reader
 
+  async def _read_commands(self, reader: Any, queue: asyncio.Queue[ParsedCommand]) -> None:
     while True:
-      line = await loop.run_in_executor(None, sys.stdin.readline)
-      if line == '':
-        await queue.put(ParsedCommand(raw={'op': 'shutdown'}, op='shutdown', request_id=None))
+      try:
+        line = await reader.readline()
+      except ValueError as error:
+        # StreamReader discards an over-long line and raises; report it and keep reading.
+        self.writer.error(message=f'command line too long: {error}')
+        continue
+      received_at = time.monotonic()
+      if line == b'':
+        await queue.put(ParsedCommand(raw={'op': 'shutdown'}, op='shutdown', request_id=None, received_at=received_at))
         return
 
       stripped = line.strip()
@@ -112,7 +440,7 @@ class WorkerRuntime:
         continue
 
       try:
-        command = parse_command(stripped)
+        command = parse_command(stripped, received_at=received_at)
       except json.JSONDecodeError as error:
         self.writer.error(message=f'invalid json command: {error.msg}')
         continue
@@ -126,14 +454,18 @@ class WorkerRuntime:
     op = command.op
 
     if op == 'ping':
-      self.writer.response(
-        request_id=command.request_id,
-        ok=True,
-        result={
-          'ready': True,
-          'latest_generation': self.latest_generation,
-        },
-      )
+      result: dict[str, Any] = {
+        'ready': True,
+        'latest_generation': self.latest_generation,
+      }
+      engine_status = self._engine_status()
+      if engine_status is not None:
+        result['engine_state'] = engine_status
+      self.writer.response(request_id=command.request_id, ok=True, result=result)
+      return
+
+    if op == 'stats':
+      self.writer.response(request_id=command.request_id, ok=True, result=self._collect_stats())
       return
 
     if op == 'shutdown':
@@ -143,10 +475,31 @@ class WorkerRuntime:
 
     if op == 'interrupt':
       reason = str(command.raw.get('reason') or 'interrupt_requested')
+      if self.lanes is not None:
+        session_raw = command.raw.get('session_id')
+        session_id = session_raw.strip() if isinstance(session_raw, str) and session_raw.strip() != '' else None
+        self._clear_lanes(session_id, reason='interrupted')
+        if session_id is not None and self.current_session_id != session_id:
+          self.writer.response(request_id=command.request_id, ok=True, result={'interrupted': True})
+          return
       await self._interrupt(reason=reason)
       self.writer.response(request_id=command.request_id, ok=True, result={'interrupted': True})
       return
 
+    if op == 'prefetch':
+      try:
+        request = self._parse_speak_request(command, default_ttl_ms=PREFETCH_DEFAULT_TTL_MS)
+      except Exception as error:
+        self.writer.response(request_id=command.request_id, ok=False, error=str(error))
+        return
+      self._queue_prefetch(request)
+      self.writer.response(
+        request_id=command.request_id,
+        ok=True,
+        result={'accepted': True, 'queued': len(self.prefetch)},
+      )
+      return
+
     if op == 'speak':
       try:
         request = self._parse_speak_request(command)
@@ -171,62 +524,77 @@ class WorkerRuntime:
 
     self.writer.response(request_id=command.request_id, ok=False, error=f'unknown op: {op}')
 
-  def _parse_speak_request(self, command: ParsedCommand) -> SpeakRequest:
-    raw = command.raw
-
-    generation = raw.get('generation')
-    if not isinstance(generation, int):
-      raise ValueError('speak.generation must be integer')
-
-    session_id = raw.get('session_id')
-    if not isinstance(session_id, str) or session_id.strip() == '':
-      raise ValueError('speak.session_id must be non-empty string')
-
-    utterance_id = raw.get('utterance_id')
-    if not isinstance(utterance_id, str) or utterance_id.strip() == '':
-      raise ValueError('speak.utterance_id must be non-empty string')
-
-    text = raw.get('text')
-    if not isinstance(text, str) or text.strip() == '':
-      raise ValueError('speak.text must be non-empty string')
-
-    speaker_raw = raw.get('speaker')
-    speaker = speaker_raw.strip() if isinstance(speaker_raw, str) and speaker_raw.strip() != '' else None
+  def _coalesce_speaks(self, commands: list[ParsedCommand]) -> dict[int, SpeakRequest]:
+    if self.lanes is not None:
+      # Lanes queue speech per session instead of replacing it, so every speak is kept.
+      return {}
+    superseded: dict[int, SpeakRequest] = {}
+    run: list[tuple[int, SpeakRequest]] = []
+    for index, command in enumerate(commands + [ParsedCommand(raw={}, op='', request_id=None)]):
+      if command.op == 'speak':
+        try:
+          run.append((index, self._parse_speak_request(command)))
+        except Exception:
+          # Invalid speaks change nothing; they are left in place to report their error.
+          pass
+        continue
+      if len(run) > 1:
+        # Ties go to the later speak, as they would if each replaced the previous one.
+        newest = max(run, key=lambda item: (item[1].generation, item[0]))
+        superseded.update(item for item in run if item is not newest)
+      run = []
+    return superseded
+
+  def _drop_coalesced(self, request: SpeakRequest) -> None:
+    self._coalesced_speaks += 1
+    self.writer.response(
+      request_id=request.request_id,
+      ok=True,
+      result={'accepted': True, 'generation': request.generation, 'coalesced': True},
+    )
+    self.writer.event(
+      phase='dropped',
+      generation=request.generation,
+      session_id=request.session_id,
+      utterance_id=request.utterance_id,
+      reason='stale_generation',
+    )
 
-    expires_at = raw.get('expires_at')
-    if not isinstance(expires_at, int):
-      ttl_ms = raw.get('ttl_ms')
-      ts = raw.get('ts')
-      if isinstance(ttl_ms, int) and isinstance(ts, int):
+  def _parse_speak_request(self, command: ParsedCommand, *, default_ttl_ms: int = 4_000) -> SpeakRequest:
+    raw = command.raw
+    if command.op == 'prefetch' and raw.get('generation') is None:
+      # A prefetch has no place in the generation order until its speak arrives.
+      raw = {**raw, 'generation': -1}
+    fields = SPEAK_SCHEMA(raw)
+
+    expires_at = fields['expires_at']
+    if expires_at is None:
+      ttl_ms = fields['ttl_ms']
+      ts = fields['ts']
+      if ttl_ms is not None and ts is not None:
         expires_at = ts + ttl_ms
       else:
-        expires_at = int(time.time() * 1000) + 4_000
-
-    message_id_raw = raw.get('message_id')
-    message_id = message_id_raw.strip() if isinstance(message_id_raw, str) and message_id_raw.strip() != '' else None
-
-    revision_raw = raw.get('revision')
-    revision: Optional[int]
-    if isinstance(revision_raw, int):
-      revision = revision_raw
-    elif isinstance(revision_raw, float):
-      revision = int(revision_raw)
-    else:
-      revision = None
+        expires_at = int(time.time() * 1000) + default_ttl_ms
 
     return SpeakRequest(
       request_id=command.request_id,
-      generation=generation,
-      session_id=session_id,
-      utterance_id=utterance_id,
-      text=text.strip(),
-      speaker=speaker,
+      generation=fields['generation'],
+      session_id=fields['session_id'],
+      utterance_id=fields['utterance_id'],
+      text=fields['text'].strip(),
+      speaker=fields['speaker'],
       expires_at=expires_at,
-      message_id=message_id,
-      revision=revision,
+      message_id=fields['message_id'],
+      revision=fields['revision'],
+      priority=clamp_priority(fields['priority']),
+      policy=normalize_policy(fields['policy']),
     )
 
   async def _start_speak(self, request: SpeakRequest) -> None:
+    if self.lanes is not None:
+      await self._enqueue_speak(request)
+      return
+
     if request.generation < self.latest_generation:
       self.writer.event(
         phase='dropped',
@@ -248,12 +616,178 @@ class WorkerRuntime:
         pass
       except Exception:
         pass
+      self._reap_stale_synthesis()
 
     self.current_generation = request.generation
     self.current_session_id = request.session_id
     self.current_utterance_id = request.utterance_id
     self.current_task = asyncio.create_task(self._run_speak(request))
 
+  async def _enqueue_speak(self, request: SpeakRequest) -> None:
+    assert self.lanes is not None
+    lane_generation = self._lane_generations.get(request.session_id)
+    if lane_generation is not None and request.generation < lane_generation:
+      self.writer.event(
+        phase='dropped',
+        generation=request.generation,
+        session_id=request.session_id,
+        utterance_id=request.utterance_id,
+        reason='stale_generation',
+      )
+      return
+    self._lane_generations[request.session_id] = request.generation
+    self.latest_generation = max(self.latest_generation, request.generation)
+
+    urgent = request.policy == 'interrupt' or request.priority >= 3
+    _, superseded = self.lanes.push(
+      request.session_id,
+      request,
+      # An interrupting speak must also win the pick that follows the interruption.
+      priority=3 if urgent else request.priority,
+      replace=request.policy != 'queue',
+    )
+    for entry in superseded:
+      self._lane_counters['superseded'] += 1
+      self._drop_entry(entry, reason='superseded')
+
+    if urgent and self.current_task and not self.current_task.done():
+      await self._interrupt(reason='superseded')
+    self._pump_lanes()
+
+  def _pump_lanes(self) -> None:
+    if self.lanes is None or self.shutdown_requested:
+      return
+    if self.current_task is not None and not self.current_task.done():
+      self._start_lookahead()
+      return
+
+    now_ms = int(time.time() * 1000)
+    while True:
+      entry = self.lanes.pop()
+      if entry is None:
+        return
+      if now_ms > entry.request.expires_at:
+        self._drop_entry(entry, reason='ttl_expired')
+        continue
+      break
+
+    request: SpeakRequest = entry.request
+    if entry.prerender is not None:
+      self._lane_counters['prerendered_played'] += 1
+    self.current_generation = request.generation
+    self.current_session_id = request.session_id
+    self.current_utterance_id = request.utterance_id
+    self.current_task = asyncio.create_task(self._run_speak(request, prerendered=entry.prerender))
+    self.current_task.add_done_callback(lambda _task: self._pump_lanes())
+    self._start_lookahead()
+
+  def _start_lookahead(self) -> None:
+    # Render only the next pick ahead of time; deeper lookahead would pin audio for items that may be superseded.
+    if self.lanes is None or self.shutdown_requested:
+      return
+    if self._lookahead_task is not None and not self._lookahead_task.done():
+      return
+    entry = self.lanes.peek()
+    if entry is None or entry.prerender is not None:
+      return
+    entry.prerender = self._take_prefetched(entry.request) or asyncio.create_task(self._prerender(entry.request))
+    entry.prerender.add_done_callback(lambda _task: self._start_lookahead())
+    self._lookahead_task = entry.prerender
+
+  async def _prerender(self, request: SpeakRequest) -> Optional[PrerenderedSpeech]:
+    # Lookahead and prefetch renders outlive an interrupt of the speak that scheduled them.
+    FOREGROUND_RENDER.set(False)
+    # Like prefetch, a lookahead render waits for the live speak's synthesis instead of competing with it.
+    while self._foreground_synth > 0 and not self.shutdown_requested:
+      await asyncio.sleep(ENGINE_WAIT_POLL_S)
+    if self._engine_busy_loading():
+      return None
+    engine, decision = self._route(request)
+    if engine is None:
+      return None
+    started = time.monotonic()
+    # A hosted engine prepares text over its pipe, so this stays off the event loop too.
+    prepared_text = await asyncio.to_thread(engine.prepare_text, normalize_shared_tts_text(request.text))
+    if prepared_text.strip() == '':
+      return PrerenderedSpeech(engine=engine, prepared_text=prepared_text, audio=np.zeros(0, dtype=np.float32), sample_rate=24_000)
+    if self.memory.over_budget(prepared_text):
+      # Holding a whole over-budget clip ahead of time is what the budget rules out; the live path chunks it.
+      self.memory.prerender_skipped += 1
+      return None
+    audio, sample_rate = await asyncio.to_thread(lambda: engine.synthesize_text(prepared_text, **self._synthesis_kwargs(engine, request)))
+    self._observe_route(decision, started)
+    return PrerenderedSpeech(engine=engine, prepared_text=prepared_text, audio=audio, sample_rate=int(sample_rate))
+
+  def _clear_lanes(self, session_id: Optional[str], *, reason: str) -> None:
+    if self.lanes is None:
+      return
+    for entry in self.lanes.clear(session_id):
+      self._drop_entry(entry, reason=reason)
+
+  def _drop_entry(self, entry: LaneEntry, *, reason: str) -> None:
+    self._release_prerender(entry)
+    self.writer.event(
+      phase='dropped',
+      generation=entry.request.generation,
+      session_id=entry.request.session_id,
+      utterance_id=entry.request.utterance_id,
+      reason=reason,
+    )
+
+  def _release_prerender(self, entry: LaneEntry) -> None:
+    task = entry.prerender
+    if task is None:
+      return
+    self._lane_counters['prerender_discarded'] += 1
+    if not task.done():
+      task.cancel()
+    elif not task.cancelled():
+      # Mark a failed render as observed; the utterance it belonged to is gone.
+      task.exception()
+
+  def _queue_prefetch(self, request: SpeakRequest) -> None:
+    replaced = self.prefetch.add(PrefetchEntry(
+      session_id=request.session_id,
+      utterance_id=request.utterance_id,
+      text=request.text,
+      speaker=request.speaker,
+      expires_at=request.expires_at,
+      request=request,
+    ))
+    if replaced is not None:
+      self.prefetch.discard(replaced)
+    if self._prefetch_worker is None or self._prefetch_worker.done():
+      self._prefetch_worker = asyncio.create_task(self._run_prefetch())
+
+  async def _run_prefetch(self) -> None:
+    while not self.shutdown_requested:
+      self.prefetch.purge_expired(int(time.time() * 1000))
+      entry = self.prefetch.next_pending()
+      if entry is None:
+        return
+      # Prefetch is background work: it never starts while a speak is being synthesized.
+      if self._foreground_synth > 0 or self._engine_busy_loading():
+        await asyncio.sleep(ENGINE_WAIT_POLL_S)
+        continue
+
+      entry.task = asyncio.create_task(self._prerender(entry.request))
+      try:
+        rendered = await asyncio.shield(entry.task)
+      except asyncio.CancelledError:
+        if not entry.task.cancelled():
+          raise
+        continue
+      except Exception:
+        self.prefetch.discard(entry)
+        continue
+      self.prefetch.settle(entry, rendered.audio.nbytes if rendered is not None else 0)
+
+  def _take_prefetched(self, request: SpeakRequest) -> Optional[asyncio.Task[Optional[PrerenderedSpeech]]]:
+    entry = self.prefetch.take(request.session_id, request.utterance_id, text=request.text, speaker=request.speaker)
+    if entry is None:
+      return None
+    return entry.task
+
   async def _interrupt(self, reason: str) -> None:
     if self.current_task and not self.current_task.done():
       self.current_task.cancel()
@@ -264,14 +798,55 @@ class WorkerRuntime:
         pass
       except Exception:
         pass
+      self._reap_stale_synthesis()
+
+  def _reap_stale_synthesis(self) -> None:
+    # A cancelled task leaves its render running; only an out-of-process engine host can end it early.
+    for _, engine in self._named_engines():
+      cancel_stale = getattr(engine, 'cancel_stale', None)
+      if callable(cancel_stale):
+        cancel_stale()
+
+  async def _wait_for_engine(
+    self,
+    request: SpeakRequest,
+    *,
+    is_stale: Callable[[], bool],
+    is_expired: Callable[[], bool],
+  ) -> Optional[str]:
+    # A speak that lands while the model is still loading must not park a pool thread on the model lock.
+    if not self._engine_busy_loading():
+      return None
+    if self.loading_policy == 'drop':
+      return 'engine_loading'
 
-  async def _run_speak(self, request: SpeakRequest) -> None:
+    self.writer.event(
+      phase='synth_wait',
+      generation=request.generation,
+      session_id=request.session_id,
+      utterance_id=request.utterance_id,
+      reason='engine_loading',
+    )
+    while self._engine_busy_loading():
+      await asyncio.sleep(ENGINE_WAIT_POLL_S)
+      if is_stale():
+        return 'stale_generation'
+      if is_expired():
+        return 'ttl_expired'
+    return None
+
+  async def _run_speak(
+    self,
+    request: SpeakRequest,
+    prerendered: Optional[asyncio.Task[Optional[PrerenderedSpeech]]] = None,
+  ) -> None:
     generation = request.generation
     session_id = request.session_id
     utterance_id = request.utterance_id
 
     def is_stale() -> bool:
-      return generation != self.latest_generation
+      # Lanes cancel superseded work explicitly; a newer generation from another session is not a reason to stop.
+      return self.lanes is None and generation != self.latest_generation
 
     def is_expired() -> bool:
       return int(time.time() * 1000) > request.expires_at
@@ -287,16 +862,72 @@ class WorkerRuntime:
       self._clear_current(generation)
       return
 
+    # Renders started from this task belong to this speak; an engine host may kill them once it is abandoned.
+    FOREGROUND_RENDER.set(True)
+    rendered: Optional[PrerenderedSpeech] = None
+    if prerendered is None:
+      prerendered = self._take_prefetched(request)
+    if prerendered is not None:
+      try:
+        rendered = await prerendered
+      except asyncio.CancelledError:
+        self.writer.event(
+          phase='dropped',
+          generation=generation,
+          session_id=session_id,
+          utterance_id=utterance_id,
+          reason='interrupted',
+        )
+        raise
+      except Exception:
+        # A failed lookahead render falls back to live synthesis.
+        rendered = None
+
+    if rendered is None:
+      wait_reason = await self._wait_for_engine(request, is_stale=is_stale, is_expired=is_expired)
+      if wait_reason is not None:
+        self.writer.event(
+          phase='dropped',
+          generation=generation,
+          session_id=session_id,
+          utterance_id=utterance_id,
+          reason=wait_reason,
+        )
+        self._clear_current(generation)
+        return
+      engine, decision = self._route(request)
+    else:
+      engine, decision = rendered.engine, None
+
+    if engine is None:
+      self.writer.event(
+        phase='dropped',
+        generation=generation,
+        session_id=session_id,
+        utterance_id=utterance_id,
+        reason='deadline_unreachable',
+      )
+      self._clear_current(generation)
+      return
+
     self.writer.event(
       phase='synth_start',
       generation=generation,
       session_id=session_id,
       utterance_id=utterance_id,
+      extra={'prerendered': True} if rendered is not None else _route_extra(decision),
     )
 
+    memory = self.memory.begin()
+    streaming = rendered is None and self._use_streaming(engine)
+    chunked = False
+    synth_started = time.monotonic()
     try:
-      shared_text = normalize_shared_tts_text(request.text)
-      prepared_text = self.engine.prepare_text(shared_text)
+      if rendered is not None:
+        prepared_text, audio, sample_rate = rendered.prepared_text, rendered.audio, rendered.sample_rate
+      else:
+        shared_text = normalize_shared_tts_text(request.text)
+        prepared_text = engine.prepare_text(shared_text)
       if prepared_text.strip() == '':
         self.writer.event(
           phase='dropped',
@@ -313,7 +944,22 @@ class WorkerRuntime:
         )
         self._clear_current(generation)
         return
-      audio, sample_rate = await asyncio.to_thread(self.engine.synthesize_text, prepared_text, voice_override=request.speaker)
+      leadin = self._take_leadin(engine, request, prepared_text) if rendered is None else None
+      if leadin is not None:
+        # The cached clip plays at once while the remainder renders behind it on the stream thread.
+        streaming = True
+      if rendered is None and not self._use_streaming(engine) and self.audio_target != 'browser' and self.memory.over_budget(prepared_text):
+        # Too long to hold as one clip: sentence groups render and play one after another on the stream thread.
+        chunked = streaming = True
+        self.memory.chunked += 1
+      if rendered is None and not streaming:
+        self._foreground_synth += 1
+        try:
+          audio, sample_rate = await asyncio.to_thread(lambda: engine.synthesize_text(prepared_text, **self._synthesis_kwargs(engine, request)))
+        finally:
+          self._foreground_synth -= 1
+        self._observe_route(decision, synth_started)
+        memory.sample('synth')
     except asyncio.CancelledError:
       self.playback.stop()
       self.writer.event(
@@ -347,6 +993,35 @@ class WorkerRuntime:
       self._clear_current(generation)
       return
 
+    if streaming:
+      # Streaming engines keep rendering while they play, so the stream counts as foreground synthesis until
+      # its producer thread is done.
+      self._foreground_synth += 1
+      released = False
+
+      def release_foreground() -> None:
+        nonlocal released
+        if not released:
+          released = True
+          self._foreground_synth -= 1
+
+      try:
+        await self._run_stream_speak(
+          request,
+          prepared_text,
+          engine=engine,
+          on_rendered=lambda rendered_at: self._observe_route(decision, synth_started, rendered_at),
+          on_producer_done=release_foreground,
+          is_stale=is_stale,
+          is_expired=is_expired,
+          memory=memory,
+          leadin=leadin,
+          chunked=chunked,
+        )
+      finally:
+        release_foreground()
+      return
+
     if is_stale():
       self.writer.event(
         phase='dropped',
@@ -381,6 +1056,14 @@ class WorkerRuntime:
       self._clear_current(generation)
       return
 
+    synth_extra: dict[str, Any] = {}
+    if self.output_sample_rate is not None and sample_rate != self.output_sample_rate:
+      # Every sink below sees the output rate; the engine rate is reported alongside it.
+      synth_extra['engine_sample_rate'] = sample_rate
+      audio = await asyncio.to_thread(resample, audio, sample_rate, self.output_sample_rate)
+      sample_rate = self.output_sample_rate
+      memory.sample('resample')
+
     self.writer.event(
       phase='synth_done',
       generation=generation,
@@ -389,12 +1072,16 @@ class WorkerRuntime:
       extra={
         'sample_rate': sample_rate,
         'sample_count': int(audio.shape[0]),
+        **synth_extra,
       },
     )
 
-    if self.browser_audio_enabled:
+    pcm: Optional[PcmBuffer] = None
+    if self.browser_audio_enabled or self.archive is not None:
       try:
-        audio_base64 = await asyncio.to_thread(encode_wav_base64, audio, sample_rate)
+        # Encoded once; every sink below reuses the same buffer.
+        pcm = await asyncio.to_thread(encode_pcm, audio, sample_rate)
+        memory.sample('encode')
       except Exception as error:
         self.writer.event(
           phase='error',
@@ -412,56 +1099,313 @@ class WorkerRuntime:
         self._clear_current(generation)
         return
 
-      if is_stale():
-        self.writer.event(
-          phase='dropped',
-          generation=generation,
-          session_id=session_id,
-          utterance_id=utterance_id,
-          reason='stale_generation',
-        )
-        self.writer.mouth(
-          generation=generation,
-          session_id=session_id,
-          utterance_id=utterance_id,
-          open_value=0.0,
-        )
-        self._clear_current(generation)
-        return
+    sinks: dict[str, SinkDelivery] = {}
+    if self.browser_audio_enabled and pcm is not None:
+      browser_pcm = pcm
+
+      async def browser_sink(delivered: Callable[[], None]) -> bool:
+        clip = await asyncio.to_thread(encode_browser_clip, browser_pcm, self.browser_codec)
+        if is_stale() or is_expired():
+          return False
+        self._write_browser_clip(request, clip, sample_rate)
+        delivered()
+        return True
+
+      if self.audio_target == 'browser':
+        # The browser is the only audible sink, so its clip goes out before the mouth clock starts.
+        sent = (await self.sinks.run({'browser': browser_sink}))['browser']
+        if isinstance(sent, Exception):
+          self.writer.event(
+            phase='error',
+            generation=generation,
+            session_id=session_id,
+            utterance_id=utterance_id,
+            reason=f'browser_audio_encode_failed:{sent}',
+          )
+          self.writer.mouth(
+            generation=generation,
+            session_id=session_id,
+            utterance_id=utterance_id,
+            open_value=0.0,
+          )
+          self._clear_current(generation)
+          return
+
+        if not sent:
+          self.writer.event(
+            phase='dropped',
+            generation=generation,
+            session_id=session_id,
+            utterance_id=utterance_id,
+            reason='stale_generation' if is_stale() else 'ttl_expired',
+          )
+          self.writer.mouth(
+            generation=generation,
+            session_id=session_id,
+            utterance_id=utterance_id,
+            open_value=0.0,
+          )
+          self._clear_current(generation)
+          return
+        memory.sample('browser')
+      else:
+        sinks['browser'] = browser_sink
 
-      if is_expired():
-        self.writer.event(
-          phase='dropped',
-          generation=generation,
-          session_id=session_id,
-          utterance_id=utterance_id,
-          reason='ttl_expired',
-        )
-        self.writer.mouth(
-          generation=generation,
-          session_id=session_id,
-          utterance_id=utterance_id,
-          open_value=0.0,
-        )
-        self._clear_current(generation)
-        return
+    if self.archive is not None and pcm is not None:
+      archive, archive_pcm = self.archive, pcm
+      archive_path = archive.path_for(session_id, utterance_id, generation)
+      sinks['archive'] = lambda delivered: asyncio.to_thread(archive.write, archive_path, archive_pcm)
+
+    self.writer.event(
+      phase='play_start',
+      generation=generation,
+      session_id=session_id,
+      utterance_id=utterance_id,
+    )
+
+    async def on_mouth(value: float) -> None:
+      self.writer.mouth(
+        generation=generation,
+        session_id=session_id,
+        utterance_id=utterance_id,
+        open_value=value,
+      )
+
+    # The other sinks run alongside local playback, so the slowest one never holds back the speaker.
+    fanout_started = time.monotonic()
+    fanout = asyncio.create_task(self.sinks.run(sinks, started=fanout_started)) if sinks else None
+    try:
+      reason = await self.playback.play(
+        audio,
+        sample_rate,
+        on_mouth=on_mouth,
+        should_stop=lambda: is_stale() or is_expired(),
+        pcm=pcm,
+        on_start=self._local_sink_started(fanout_started),
+      )
+    except asyncio.CancelledError:
+      self.playback.stop()
+      reason = 'interrupted'
+    except Exception as error:
+      self.playback.stop()
+      await _cancel_fanout(fanout)
+      self.writer.event(
+        phase='error',
+        generation=generation,
+        session_id=session_id,
+        utterance_id=utterance_id,
+        reason=str(error),
+      )
+      self.writer.mouth(
+        generation=generation,
+        session_id=session_id,
+        utterance_id=utterance_id,
+        open_value=0.0,
+      )
+      self._clear_current(generation)
+      return
+
+    if fanout is not None:
+      if reason == 'interrupted':
+        await _cancel_fanout(fanout)
+      else:
+        # Browser audio must reach the controller before play_stop retires the utterance.
+        self._report_sink_failures(request, await fanout)
+
+    memory.sample('play')
+    self.writer.event(
+      phase='play_stop',
+      generation=generation,
+      session_id=session_id,
+      utterance_id=utterance_id,
+      reason=reason,
+      extra=self._memory_extra(memory),
+    )
+    self.writer.mouth(
+      generation=generation,
+      session_id=session_id,
+      utterance_id=utterance_id,
+      open_value=0.0,
+    )
+    self._clear_current(generation)
+
+  def _use_streaming(self, engine: Optional[TtsEngine] = None) -> bool:
+    # Browser clients play one complete clip per utterance, so a browser-only target gains nothing from streaming.
+    return callable(getattr(engine or self.engine, 'stream_text', None)) and self.audio_target != 'browser'
+
+  def _router(self) -> Optional[Any]:
+    # Under fast start the router sits behind the deferred loader; speaks only get here once it is built.
+    # Service clients see the router through a per-client proxy, so look for the capability, not the class.
+    engine = self.deferred.load() if self.deferred is not None else self.engine
+    return engine if callable(getattr(engine, 'route', None)) else None
+
+  def _route(self, request: SpeakRequest) -> tuple[Optional[TtsEngine], Optional[RouteDecision]]:
+    router = self._router()
+    if router is None:
+      return self.engine, None
+    seconds_left = (request.expires_at - int(time.time() * 1000)) / 1000.0
+    decision = router.route(request.text, seconds_left=seconds_left, streams=self._use_streaming)
+    if decision is None:
+      return None, None
+    return decision.engine, decision
+
+  def _observe_route(self, decision: Optional[RouteDecision], started: float, finished: Optional[float] = None) -> None:
+    if decision is None:
+      return
+    router = self._router()
+    if router is not None:
+      router.observe(decision, (finished if finished is not None else time.monotonic()) - started)
+
+  async def _run_stream_speak(
+    self,
+    request: SpeakRequest,
+    prepared_text: str,
+    *,
+    engine: TtsEngine,
+    on_rendered: Callable[[float], None],
+    is_stale: Callable[[], bool],
+    is_expired: Callable[[], bool],
+    memory: UtteranceMemory,
+    leadin: Optional[tuple[LeadinClip, str]] = None,
+    chunked: bool = False,
+    on_producer_done: Optional[Callable[[], None]] = None,
+  ) -> None:
+    generation = request.generation
+    session_id = request.session_id
+    utterance_id = request.utterance_id
+    kwargs = self._synthesis_kwargs(engine, request)
+
+    render: Callable[[str], Iterator[AudioBlock]]
+    if chunked:
+      # The revision cache keeps a message's chunks as one list, so separately rendered pieces bypass it.
+      kwargs.pop('revision', None)
+      render = lambda text: _iter_chunked_blocks(engine, self.memory.chunk_text(text), kwargs)
+    elif self._use_streaming(engine):
+      render = lambda text: engine.stream_text(text, **kwargs)
+    else:
+      render = lambda text: iter([engine.synthesize_text(text, **kwargs)])
+    if leadin is None:
+      produce: Callable[[], Iterator[AudioBlock]] = lambda: render(prepared_text)
+    else:
+      clip, remainder = leadin
+      produce = lambda: _iter_leadin_blocks(clip, lambda: render(remainder))
+    if self.output_sample_rate is not None:
+      # Resampled on the stream thread, with filter state carried across block boundaries.
+      engine_blocks = produce
+      produce = lambda: iter_resampled(engine_blocks(), self.output_sample_rate)
+    if self.realtime is not None:
+      produce = self.realtime.on_synthesis_thread(produce)
+    stream = ThreadedBlockStream(produce, name=f'tts-stream-{generation}', on_finish=on_producer_done)
+    stream.start()
+
+    try:
+      first_block, sample_rate = await anext(stream)
+    except StopAsyncIteration:
+      first_block, sample_rate = np.zeros(1, dtype=np.float32), 24_000
+    except asyncio.CancelledError:
+      stream.close()
+      self.playback.stop()
+      self.writer.event(
+        phase='play_stop',
+        generation=generation,
+        session_id=session_id,
+        utterance_id=utterance_id,
+        reason='interrupted',
+      )
+      self.writer.mouth(
+        generation=generation,
+        session_id=session_id,
+        utterance_id=utterance_id,
+        open_value=0.0,
+      )
+      raise
+    except Exception as error:
+      stream.close()
+      self.writer.event(
+        phase='error',
+        generation=generation,
+        session_id=session_id,
+        utterance_id=utterance_id,
+        reason=str(error),
+      )
+      self.writer.mouth(
+        generation=generation,
+        session_id=session_id,
+        utterance_id=utterance_id,
+        open_value=0.0,
+      )
+      self._clear_current(generation)
+      return
+
+    drop_reason = 'stale_generation' if is_stale() else 'ttl_expired' if is_expired() else None
+    if drop_reason is not None:
+      stream.close()
+      self.writer.event(
+        phase='dropped',
+        generation=generation,
+        session_id=session_id,
+        utterance_id=utterance_id,
+        reason=drop_reason,
+      )
+      self.writer.mouth(
+        generation=generation,
+        session_id=session_id,
+        utterance_id=utterance_id,
+        open_value=0.0,
+      )
+      self._clear_current(generation)
+      return
 
-      self.writer.audio(
+    archive: Optional[ArchiveStream] = None
+    if self.archive is not None:
+      try:
+        archive = self.archive.open_stream(self.archive.path_for(session_id, utterance_id, generation), sample_rate)
+      except Exception as error:
+        self.sinks.fail('archive')
+        self._report_sink_failures(request, {'archive': error})
+    fanout_started = time.monotonic()
+
+    async def blocks():
+      encoder = BrowserClipEncoder(self.browser_codec, sample_rate) if self.browser_audio_enabled else None
+      taps = [tap for tap in (encoder, archive) if tap is not None]
+      yield first_block
+      # Taps are fed after the block is handed to playback, so the speaker never waits on the other sinks.
+      await _feed_taps(taps, first_block)
+      async for block, block_rate in stream:
+        if block_rate != sample_rate:
+          raise RuntimeError(f'sample rate mismatch: {sample_rate} vs {block_rate}')
+        yield block
+        await _feed_taps(taps, block)
+
+      # Blocks reach this loop only as playback takes them, so the render time comes from the producer side.
+      on_rendered(stream.rendered_at if stream.rendered_at is not None else time.monotonic())
+      memory.sample('synth')
+      synth_extra: dict[str, Any] = {'memory_guard': 'chunked'} if chunked else {}
+      self.writer.event(
+        phase='synth_done',
         generation=generation,
         session_id=session_id,
         utterance_id=utterance_id,
-        mime_type='audio/wav',
-        audio_base64=audio_base64,
-        sample_rate=sample_rate,
-        message_id=request.message_id,
-        revision=request.revision,
+        extra={
+          'sample_rate': sample_rate,
+          'sample_count': stream.sample_count,
+          'streaming': True,
+          **synth_extra,
+        },
       )
+      finishing = []
+      if encoder is not None and not is_stale():
+        finishing.append(self._send_browser_audio(request, encoder, fanout_started))
+      if archive is not None:
+        finishing.append(self._close_archive(request, archive, fanout_started))
+      await asyncio.gather(*finishing)
 
     self.writer.event(
       phase='play_start',
       generation=generation,
       session_id=session_id,
       utterance_id=utterance_id,
+      extra={'streaming': True, 'leadin': True} if leadin is not None else {'streaming': True},
     )
 
     async def on_mouth(value: float) -> None:
@@ -473,11 +1417,12 @@ class WorkerRuntime:
       )
 
     try:
-      reason = await self.playback.play(
-        audio,
+      reason = await self.playback.play_stream(
+        blocks(),
         sample_rate,
         on_mouth=on_mouth,
         should_stop=lambda: is_stale() or is_expired(),
+        on_start=self._local_sink_started(fanout_started),
       )
     except asyncio.CancelledError:
       self.playback.stop()
@@ -499,13 +1444,20 @@ class WorkerRuntime:
       )
       self._clear_current(generation)
       return
+    finally:
+      stream.close()
+      if archive is not None:
+        # A no-op once the archive closed normally; an interrupted stream leaves no partial file.
+        archive.abort()
 
+    memory.sample('play')
     self.writer.event(
       phase='play_stop',
       generation=generation,
       session_id=session_id,
       utterance_id=utterance_id,
       reason=reason,
+      extra=self._memory_extra(memory),
     )
     self.writer.mouth(
       generation=generation,
@@ -515,6 +1467,69 @@ class WorkerRuntime:
     )
     self._clear_current(generation)
 
+  async def _send_browser_audio(self, request: SpeakRequest, encoder: BrowserClipEncoder, started: float) -> None:
+    try:
+      clip = await asyncio.to_thread(encoder.finish)
+    except Exception as error:
+      self.sinks.fail('browser')
+      # Local playback is already under way, so report the browser failure without ending the utterance.
+      self.writer.event(
+        phase='browser_audio_failed',
+        generation=request.generation,
+        session_id=request.session_id,
+        utterance_id=request.utterance_id,
+        reason=f'browser_audio_encode_failed:{error}',
+      )
+      return
+
+    self._write_browser_clip(request, clip, encoder.sample_rate)
+    self.sinks.observe('browser', time.monotonic() - started)
+
+  async def _close_archive(self, request: SpeakRequest, archive: ArchiveStream, started: float) -> None:
+    try:
+      await asyncio.to_thread(archive.close)
+    except Exception as error:
+      self.sinks.fail('archive')
+      self._report_sink_failures(request, {'archive': error})
+      return
+    self.sinks.observe('archive', time.monotonic() - started)
+
+  def _local_sink_started(self, started: float) -> Optional[Callable[[], None]]:
+    if self.audio_target == 'browser':
+      # Browser-only playback runs a silent mouth clock, which is not a sink.
+      return None
+    return lambda: self.sinks.observe('local', time.monotonic() - started)
+
+  def _report_sink_failures(self, request: SpeakRequest, results: dict[str, Any]) -> None:
+    for name, result in results.items():
+      if not isinstance(result, Exception):
+        continue
+      # Local playback carries on, so a failed side sink is reported without ending the utterance.
+      self.writer.event(
+        phase='browser_audio_failed' if name == 'browser' else f'{name}_sink_failed',
+        generation=request.generation,
+        session_id=request.session_id,
+        utterance_id=request.utterance_id,
+        reason=f'browser_audio_encode_failed:{result}' if name == 'browser' else str(result),
+      )
+
+  def _write_browser_clip(self, request: SpeakRequest, clip: BrowserClip, sample_rate: int) -> None:
+    self.browser_audio_stats.observe(clip)
+    self.writer.audio(
+      generation=request.generation,
+      session_id=request.session_id,
+      utterance_id=request.utterance_id,
+      mime_type=clip.mime_type,
+      audio_base64=clip.audio_base64,
+      sample_rate=sample_rate,
+      message_id=request.message_id,
+      revision=request.revision,
+    )
+
+  def _memory_extra(self, memory: UtteranceMemory) -> Optional[dict[str, Any]]:
+    report = self.memory.finish(memory)
+    return {'memory': report} if report is not None else None
+
   def _clear_current(self, generation: int) -> None:
     if self.current_generation != generation:
       return
@@ -524,34 +1539,98 @@ class WorkerRuntime:
     self.current_task = None
 
 
+async def _feed_taps(taps: list[Any], block: np.ndarray) -> None:
+  if taps:
+    await asyncio.gather(*(asyncio.to_thread(tap.write, block) for tap in taps))
+
+
+async def _cancel_fanout(fanout: Optional[asyncio.Task[dict[str, Any]]]) -> None:
+  if fanout is None or fanout.done():
+    return
+  fanout.cancel()
+  try:
+    await fanout
+  except BaseException:
+    pass
+
+
+def _route_extra(decision: Optional[RouteDecision]) -> Optional[dict[str, Any]]:
+  if decision is None:
+    return None
+  return {
+    'engine': decision.engine_name,
+    'predicted_ms': int(round(decision.predicted_seconds * 1000.0)),
+  }
+
+
 def create_tts_engine() -> TtsEngine:
   engine_name = (os.environ.get('TTS_ENGINE') or 'kokoro').strip().lower()
+  if engine_name == 'route':
+    route_config = load_route_config()
+    return RoutingTtsEngine(
+      [(name, _create_named_engine(name)) for name in route_config.engines],
+      margin_ms=route_config.margin_ms,
+    )
+  return _create_named_engine(engine_name)
+
+
+def _placeholder_metadata() -> EngineMetadata:
+  engine_name = (os.environ.get('TTS_ENGINE') or 'kokoro').strip().lower()
+  return EngineMetadata(voice='', engine=engine_name, model_path='', voices_path='')
+
+
+def _create_named_engine(engine_name: str) -> TtsEngine:
+  host_mode = resolve_engine_host_mode(os.environ.get('MH_TTS_ENGINE_HOST'))
+  if host_mode != 'off':
+    if engine_name not in ('kokoro', 'qwen3'):
+      raise RuntimeError(f'unsupported TTS_ENGINE: {engine_name} (expected kokoro|qwen3|route)')
+    return HostedTtsEngine(
+      functools.partial(_build_named_engine, engine_name),
+      standby=host_mode == 'standby',
+      kill_after_s=resolve_host_kill_after(os.environ.get('MH_TTS_HOST_KILL_AFTER_MS')),
+    )
+  return _build_named_engine(engine_name)
+
+
+def _build_named_engine(engine_name: str) -> TtsEngine:
+  # Engine modules are imported here, not at the top, so fast start can emit ready before loading them.
   if engine_name == 'kokoro':
+    from .kokoro_engine import KokoroEngine, resolve_model_paths
+
     model_paths = resolve_model_paths()
     return KokoroEngine(model_paths=model_paths, voice='af_heart')
   if engine_name == 'qwen3':
+    from .qwen3_engine import Qwen3TtsEngine
+
     return Qwen3TtsEngine()
-  raise RuntimeError(f'unsupported TTS_ENGINE: {engine_name} (expected kokoro|qwen3)')
+  raise RuntimeError(f'unsupported TTS_ENGINE: {engine_name} (expected kokoro|qwen3|route)')
 
 
 def parse_args(argv: list[str]) -> argparse.Namespace:
   parser = argparse.ArgumentParser(description='Minimum Headroom TTS worker')
   parser.add_argument('--smoke', action='store_true', help='Initialize engine and exit')
+  parser.add_argument('--profile-startup', action='store_true', help='Print per-stage and per-import startup times to stderr')
   return parser.parse_args(argv)
 
 
-async def run_async(argv: list[str]) -> int:
+async def run_async(argv: list[str], *, engine: Optional[TtsEngine] = None) -> int:
   args = parse_args(argv)
+  profile = StartupProfile(report=args.profile_startup)
 
   try:
-    runtime = WorkerRuntime()
+    with profile.stage('runtime_init'):
+      runtime = WorkerRuntime(engine, profile=profile)
+    if args.smoke and runtime.deferred is not None:
+      runtime.deferred.load()
   except Exception as error:
+    profile.finish()
     writer = ProtocolWriter()
     writer.error(message=f'startup failed: {error}')
     return 2
 
   if args.smoke:
     runtime._emit_ready()
+    profile.finish()
     return 0
 
   try:
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+AudioBlock = Tuple[np.ndarray, int]
+BlockProducer = Callable[[], Iterable[AudioBlock]]
+
+
+class ThreadedBlockStream:
+  """Run a blocking audio block generator on its own thread and expose it as an async iterator.
+
+  The producer gets a dedicated daemon thread instead of the default executor so a long synthesis never
+  competes with encoding or stdin work for pool slots.
+  """
+
+  def __init__(self, produce: BlockProducer, *, name: str = 'tts-stream', on_finish: Optional[Callable[[], None]] = None) -> None:
+    self._produce = produce
+    self._name = name
+    # Called on the event loop once the producer thread is done, however it ended.
+    self._on_finish = on_finish
+    self._queue: asyncio.Queue[tuple[str, Any]] = asyncio.Queue()
+    self._loop: Optional[asyncio.AbstractEventLoop] = None
+    self._thread: Optional[threading.Thread] = None
+    self._closed = threading.Event()
+    self._finished = False
+    # When the producer ran out, on its own thread; the consumer may drain the queue much later.
+    self.rendered_at: Optional[float] = None
+    self.block_count = 0
+    self.sample_count = 0
+    self.sample_rate: Optional[int] = None
+
+  @property
+  def finished(self) -> bool:
+    return self._finished
+
+  def start(self) -> None:
+    if self._thread is not None:
+      return
+    self._loop = asyncio.get_running_loop()
+    # Context variables carry over to the producer thread, as they do for asyncio.to_thread.
+    context = contextvars.copy_context()
+    self._thread = threading.Thread(target=context.run, args=(self._run,), name=self._name, daemon=True)
+    self._thread.start()
+
+  def close(self) -> None:
+    # The producer stops after the block it is currently rendering; threads cannot be interrupted mid-call.
+    self._closed.set()
+
+  def __aiter__(self) -> 'ThreadedBlockStream':
+    return self
+
+  async def __anext__(self) -> AudioBlock:
+    if self._finished:
+      raise StopAsyncIteration
+    kind, value = await self._queue.get()
+    if kind == 'block':
+      block, sample_rate = value
+      self.block_count += 1
+      self.sample_count += int(block.shape[0])
+      self.sample_rate = sample_rate
+      return value
+    self._finished = True
+    if kind == 'error':
+      raise value
+    raise StopAsyncIteration
+
+  def _run(self) -> None:
+    iterator = None
+    try:
+      iterator = iter(self._produce())
+      for block, sample_rate in iterator:
+        if self._closed.is_set():
+          break
+        self._post('block', (np.asarray(block, dtype=np.float32), int(sample_rate)))
+      self.rendered_at = time.monotonic()
+      self._post('done', None)
+    except Exception as error:
+      self._post('error', error)
+    finally:
+      close = getattr(iterator, 'close', None)
+      if callable(close):
+        try:
+          close()
+        except Exception:
+          pass
+      if self._on_finish is not None:
+        self._call_soon(self._on_finish)
+
+  def _post(self, kind: str, value: Any) -> None:
+    self._call_soon(self._queue.put_nowait, (kind, value))
+
+  def _call_soon(self, callback: Callable[..., Any], *args: Any) -> None:
+    loop = self._loop
+    if loop is None or loop.is_closed():
+      return
+    try:
+      loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+      # The loop shut down while the producer was still rendering.
+      pass
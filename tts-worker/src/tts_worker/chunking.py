@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import Callable, List
 
 ASCII_MAX_CHARS = 220
 NON_ASCII_MAX_CHARS = 120
 BOUNDARY_CHARS = set('。！？!?.,、;；:\n')
 ASCII_SOFT_BREAK_CHARS = set(' \t,.;:!?)]}')
+SENTENCE_END_CHARS = set('。！？!?\n')
+SENTENCE_CLOSING_CHARS = set('」』）)]"\'”’')
+SENTENCE_MIN_CHARS = 8
 
 
 @dataclass(frozen=True)
@@ -41,6 +44,72 @@ def split_text_chunks(text: str) -> List[TextChunk]:
   return chunks
 
 
+def split_sentences(text: str, *, min_chars: int = SENTENCE_MIN_CHARS) -> List[str]:
+  normalized = text.strip()
+  if not normalized:
+    return []
+
+  raw_sentences: List[str] = []
+  buffer: List[str] = []
+  index = 0
+  while index < len(normalized):
+    char = normalized[index]
+    buffer.append(char)
+    index += 1
+
+    if char in SENTENCE_END_CHARS or (char == '.' and (index == len(normalized) or normalized[index].isspace())):
+      while index < len(normalized) and normalized[index] in SENTENCE_CLOSING_CHARS:
+        buffer.append(normalized[index])
+        index += 1
+      raw_sentences.append(''.join(buffer))
+      buffer = []
+
+  if buffer:
+    raw_sentences.append(''.join(buffer))
+
+  sentences: List[str] = []
+  pending = ''
+  for sentence in raw_sentences:
+    pending = _join_sentence(pending, sentence.strip())
+    # Very short fragments such as a lone "はい。" sound clipped on their own, so they ride with the next sentence.
+    if len(pending) >= min_chars:
+      _append_with_limit(sentences, pending, _sentence_limit(pending), _all_ascii(pending))
+      pending = ''
+
+  if pending:
+    if sentences and len(pending) < min_chars:
+      sentences[-1] = _join_sentence(sentences[-1], pending)
+    else:
+      _append_with_limit(sentences, pending, _sentence_limit(pending), _all_ascii(pending))
+
+  return sentences
+
+
+def group_sentences(sentences: List[str], fits: Callable[[str], bool]) -> List[str]:
+  """Join neighbouring sentences while `fits` accepts the result; a sentence that does not fit alone stays whole."""
+  groups: List[str] = []
+  for sentence in sentences:
+    joined = _join_sentence(groups[-1], sentence) if groups else sentence
+    if groups and fits(joined):
+      groups[-1] = joined
+    else:
+      groups.append(sentence)
+  return groups
+
+
+def _join_sentence(head: str, tail: str) -> str:
+  if not head:
+    return tail
+  if not tail:
+    return head
+  separator = ' ' if _all_ascii(head[-1]) and _all_ascii(tail[0]) else ''
+  return f'{head}{separator}{tail}'
+
+
+def _sentence_limit(text: str) -> int:
+  return ASCII_MAX_CHARS if _all_ascii(text) else NON_ASCII_MAX_CHARS
+
+
 def _all_ascii(text: str) -> bool:
   return all(is_ascii_printable(char) for char in text)
 
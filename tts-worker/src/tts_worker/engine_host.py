@@ -0,0 +1,474 @@
+from __future__ import annotations
+
+import contextvars
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .engine import EngineMetadata, TtsEngine
+
+
+ENGINE_HOST_MODES = {'off', 'process', 'standby'}
+HOST_KILL_AFTER_MS_DEFAULT = 300
+HOST_START_TIMEOUT_S = 120.0
+HOST_STOP_TIMEOUT_S = 2.0
+# Optional engine methods the host forwards when the hosted engine has them.
+HOSTED_CAPABILITIES = ('stream_text', 'split_segments', 'start_preload', 'engine_status', 'is_busy_loading', 'revision_cache')
+# Cheap calls answered on the host's command thread; everything else renders on its own thread.
+INLINE_METHODS = {'prepare_text', 'split_segments', 'engine_status', 'is_busy_loading', 'revision_cache_stats'}
+
+EngineFactory = Callable[[], TtsEngine]
+SharedAudio = Tuple[str, int]
+
+# Set by the runtime while a speak renders its own audio. Only those renders are abandoned when the speak is
+# cancelled; preload, prefetch and lookahead calls keep running and never count towards a kill.
+FOREGROUND_RENDER: contextvars.ContextVar[bool] = contextvars.ContextVar('tts_foreground_render', default=False)
+
+
+class EngineHostError(RuntimeError):
+  pass
+
+
+def resolve_engine_host_mode(raw: Optional[str]) -> str:
+  if raw is None or raw.strip() == '':
+    return 'off'
+  normalized = raw.strip().lower()
+  if normalized in ENGINE_HOST_MODES:
+    return normalized
+  raise ValueError(f'unsupported MH_TTS_ENGINE_HOST: {raw} (expected off|process|standby)')
+
+
+def resolve_host_kill_after(raw: Optional[str]) -> float:
+  if raw is None or raw.strip() == '':
+    return HOST_KILL_AFTER_MS_DEFAULT / 1000.0
+  try:
+    value = int(raw.strip())
+  except ValueError as error:
+    raise ValueError(f'unsupported MH_TTS_HOST_KILL_AFTER_MS: {raw} (expected an integer number of milliseconds)') from error
+  if value < 0:
+    raise ValueError(f'unsupported MH_TTS_HOST_KILL_AFTER_MS: {raw} (expected a non-negative value)')
+  return value / 1000.0
+
+
+def _to_shared(audio: np.ndarray) -> SharedAudio:
+  samples = np.ascontiguousarray(audio, dtype=np.float32).reshape(-1)
+  if samples.size == 0:
+    return '', 0
+  segment = shared_memory.SharedMemory(create=True, size=samples.nbytes)
+  np.ndarray(samples.shape, dtype=np.float32, buffer=segment.buf)[:] = samples
+  name = segment.name
+  # The receiving process unlinks the segment once it has copied the samples out.
+  segment.close()
+  return name, int(samples.shape[0])
+
+
+def _from_shared(shared: SharedAudio) -> np.ndarray:
+  name, count = shared
+  if count == 0:
+    return np.zeros(0, dtype=np.float32)
+  segment = shared_memory.SharedMemory(name=name)
+  try:
+    return np.ndarray((count,), dtype=np.float32, buffer=segment.buf).copy()
+  finally:
+    segment.close()
+    segment.unlink()
+
+
+def _discard_shared(shared: SharedAudio) -> None:
+  try:
+    _from_shared(shared)
+  except FileNotFoundError:
+    pass
+
+
+def _host_main(conn: Any, factory: EngineFactory) -> None:
+  """Host process entry point: owns one engine and serves calls from the worker over `conn`."""
+  try:
+    engine = factory()
+  except BaseException as error:
+    conn.send(('failed', f'{type(error).__name__}: {error}'))
+    return
+
+  send_lock = threading.Lock()
+  cancelled: set[int] = set()
+
+  def reply(*message: Any) -> None:
+    with send_lock:
+      conn.send(message)
+
+  def serve(call_id: int, method: str, args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+    try:
+      if method == 'synthesize_text':
+        audio, sample_rate = engine.synthesize_text(*args, **kwargs)
+        reply('audio', call_id, _to_shared(audio), int(sample_rate))
+      elif method == 'stream_text':
+        for block, sample_rate in engine.stream_text(*args, **kwargs):
+          if call_id in cancelled:
+            break
+          reply('audio', call_id, _to_shared(block), int(sample_rate))
+        cancelled.discard(call_id)
+        reply('end', call_id)
+      elif method == 'start_preload':
+        done = threading.Event()
+        if engine.start_preload(on_done=done.set):
+          done.wait()
+        reply('result', call_id, True)
+      elif method == 'revision_cache_stats':
+        reply('result', call_id, engine.revision_cache.stats())
+      else:
+        reply('result', call_id, getattr(engine, method)(*args, **kwargs))
+    except Exception as error:
+      reply('error', call_id, f'{type(error).__name__}: {error}')
+
+  capabilities = {name for name in HOSTED_CAPABILITIES if getattr(engine, name, None) is not None}
+  reply('hello', engine.metadata, capabilities)
+  while True:
+    try:
+      message = conn.recv()
+    except (EOFError, OSError):
+      return
+    if message[0] == 'shutdown':
+      return
+    if message[0] == 'cancel':
+      cancelled.add(message[1])
+      continue
+    _, call_id, method, args, kwargs = message
+    if method in INLINE_METHODS:
+      serve(call_id, method, args, kwargs)
+    else:
+      threading.Thread(target=serve, args=(call_id, method, args, kwargs), name=f'tts-host-{method}', daemon=True).start()
+
+
+class _HostCall:
+  def __init__(self, call_id: int, *, foreground: bool = False) -> None:
+    self.call_id = call_id
+    self.foreground = foreground
+    self.started = time.monotonic()
+    self.replies: queue.Queue[tuple[Any, ...]] = queue.Queue()
+
+
+class _HostProcess:
+  """One engine-host subprocess and the worker-side bookkeeping for calls in flight."""
+
+  def __init__(self, context: Any, factory: EngineFactory) -> None:
+    self._conn, child_conn = context.Pipe()
+    self.process = context.Process(target=_host_main, args=(child_conn, factory), name='tts-engine-host', daemon=True)
+    self.process.start()
+    child_conn.close()
+    self.hello = threading.Event()
+    self.metadata: Optional[EngineMetadata] = None
+    self.capabilities: set[str] = set()
+    self.failure: Optional[str] = None
+    self.warm = threading.Event()
+    self._calls: dict[int, _HostCall] = {}
+    self._ids = itertools.count(1)
+    self._lock = threading.Lock()
+    self._reader = threading.Thread(target=self._read_replies, name='tts-host-reader', daemon=True)
+    self._reader.start()
+
+  @property
+  def alive(self) -> bool:
+    return self.failure is None and self.process.is_alive()
+
+  def wait_hello(self, timeout: float = HOST_START_TIMEOUT_S) -> None:
+    if not self.hello.wait(timeout):
+      self.kill('engine host did not start in time')
+    if self.metadata is None:
+      raise EngineHostError(self.failure or 'engine host failed to start')
+
+  def call(
+    self,
+    method: str,
+    args: tuple[Any, ...] = (),
+    kwargs: Optional[dict[str, Any]] = None,
+    *,
+    foreground: bool = False,
+  ) -> _HostCall:
+    with self._lock:
+      if self.failure is not None:
+        raise EngineHostError(self.failure)
+      call = _HostCall(next(self._ids), foreground=foreground)
+      self._calls[call.call_id] = call
+      try:
+        self._conn.send(('call', call.call_id, method, args, kwargs or {}))
+      except (OSError, ValueError) as error:
+        del self._calls[call.call_id]
+        raise EngineHostError(f'engine host unreachable: {error}') from error
+    return call
+
+  def finish(self, call: _HostCall, *, cancel: bool = False) -> None:
+    with self._lock:
+      self._calls.pop(call.call_id, None)
+      if cancel and self.failure is None:
+        try:
+          self._conn.send(('cancel', call.call_id))
+        except (OSError, ValueError):
+          pass
+    # Audio that arrived after the caller stopped listening still owns a shared-memory segment.
+    while True:
+      try:
+        reply = call.replies.get_nowait()
+      except queue.Empty:
+        return
+      if reply[0] == 'audio':
+        _discard_shared(reply[2])
+
+  def oldest_foreground_age(self) -> Optional[float]:
+    with self._lock:
+      started = [call.started for call in self._calls.values() if call.foreground]
+    if not started:
+      return None
+    return time.monotonic() - min(started)
+
+  def kill(self, reason: str) -> None:
+    self._fail(reason)
+    if self.process.is_alive():
+      self.process.kill()
+    self.process.join(HOST_STOP_TIMEOUT_S)
+
+  def shutdown(self) -> None:
+    with self._lock:
+      try:
+        self._conn.send(('shutdown',))
+      except (OSError, ValueError):
+        pass
+    self.process.join(HOST_STOP_TIMEOUT_S)
+    self.kill('engine host stopped')
+
+  def _read_replies(self) -> None:
+    while True:
+      try:
+        reply = self._conn.recv()
+      except (EOFError, OSError):
+        break
+      kind = reply[0]
+      if kind == 'hello':
+        self.metadata, self.capabilities = reply[1], set(reply[2])
+        self.hello.set()
+        continue
+      if kind == 'failed':
+        self._fail(reply[1])
+        break
+      with self._lock:
+        call = self._calls.get(reply[1])
+      if call is not None:
+        call.replies.put(reply)
+      elif kind == 'audio':
+        _discard_shared(reply[2])
+    self._fail(f'engine host exited (code {self.process.exitcode})' if self.process.exitcode else 'engine host exited')
+
+  def _fail(self, reason: str) -> None:
+    with self._lock:
+      if self.failure is None:
+        self.failure = reason
+      calls = list(self._calls.values())
+    for call in calls:
+      call.replies.put(('error', call.call_id, self.failure))
+    self.hello.set()
+
+
+class HostedTtsEngine:
+  """TtsEngine proxy whose engine lives in a subprocess, with audio handed back through shared memory.
+
+  A render still running `kill_after_s` after the runtime gave up on it is ended by killing the host; with
+  `standby`, a second host keeps the model loaded and takes over at once while a new standby warms up.
+  """
+
+  def __init__(self, factory: EngineFactory, *, standby: bool = False, kill_after_s: float = HOST_KILL_AFTER_MS_DEFAULT / 1000.0) -> None:
+    self._factory = factory
+    self._context = multiprocessing.get_context('spawn')
+    self._standby_enabled = standby
+    self.kill_after_s = kill_after_s
+    self._lock = threading.Lock()
+    self.kills = 0
+    self.restarts = 0
+    self._active = _HostProcess(self._context, factory)
+    self._active.wait_hello()
+    # Replacement hosts run the same factory, so the first host's answers hold for every later one.
+    assert self._active.metadata is not None
+    self._metadata: EngineMetadata = self._active.metadata
+    self._capabilities = set(self._active.capabilities)
+    self._standby: Optional[_HostProcess] = None
+    self._preload_requested = False
+    self._preload_done: Optional[Callable[[], None]] = None
+    self._spawn_standby()
+
+    capabilities = self._capabilities
+    if 'stream_text' in capabilities:
+      self.stream_text = self._stream_text
+    if 'split_segments' in capabilities:
+      self.split_segments = self._split_segments
+    self.revision_cache = _RemoteRevisionCache(self) if 'revision_cache' in capabilities else None
+
+  @property
+  def metadata(self) -> EngineMetadata:
+    return self._metadata
+
+  @property
+  def host_pid(self) -> Optional[int]:
+    return self._active.process.pid
+
+  def prepare_text(self, text: str) -> str:
+    return self._call('prepare_text', text)
+
+  def synthesize_text(self, text: str, **kwargs: Any) -> Tuple[np.ndarray, int]:
+    host = self._host()
+    call = host.call('synthesize_text', (text,), kwargs, foreground=FOREGROUND_RENDER.get())
+    try:
+      reply = call.replies.get()
+      if reply[0] == 'error':
+        raise EngineHostError(reply[2])
+      return _from_shared(reply[2]), reply[3]
+    finally:
+      host.finish(call)
+
+  def _stream_text(self, text: str, **kwargs: Any) -> Iterator[Tuple[np.ndarray, int]]:
+    host = self._host()
+    call = host.call('stream_text', (text,), kwargs, foreground=FOREGROUND_RENDER.get())
+    ended = False
+    try:
+      while True:
+        reply = call.replies.get()
+        if reply[0] == 'audio':
+          yield _from_shared(reply[2]), reply[3]
+        elif reply[0] == 'end':
+          ended = True
+          return
+        else:
+          raise EngineHostError(reply[2])
+    finally:
+      host.finish(call, cancel=not ended)
+
+  def _split_segments(self, text: str) -> list[str]:
+    return self._call('split_segments', text)
+
+  def start_preload(self, on_done: Optional[Callable[[], None]] = None) -> bool:
+    if 'start_preload' not in self._capabilities:
+      return False
+    with self._lock:
+      self._preload_requested = True
+      self._preload_done = on_done
+      host = self._active
+    self._warm(host, name='tts-host-preload')
+    return True
+
+  def engine_status(self) -> dict[str, Any]:
+    status: dict[str, Any] = {}
+    if 'engine_status' in self._capabilities:
+      try:
+        status.update(self._call('engine_status'))
+      except EngineHostError:
+        status['state'] = 'restarting'
+    standby = self._standby
+    status['host'] = {
+      'pid': self.host_pid,
+      'standby': None if standby is None else ('warm' if standby.warm.is_set() else 'loading'),
+      'kills': self.kills,
+      'restarts': self.restarts,
+    }
+    return status
+
+  def is_busy_loading(self) -> bool:
+    if 'is_busy_loading' not in self._capabilities:
+      return False
+    try:
+      return bool(self._call('is_busy_loading'))
+    except EngineHostError:
+      return True
+
+  def cancel_stale(self) -> bool:
+    """Kill the host if an abandoned speak's render has run past kill_after_s; the runtime calls this after abandoning one."""
+    with self._lock:
+      age = self._active.oldest_foreground_age()
+      if age is None or age < self.kill_after_s:
+        return False
+      self.kills += 1
+      self._replace_active('stale synthesis killed')
+      return True
+
+  def close(self) -> None:
+    with self._lock:
+      for host in (self._active, self._standby):
+        if host is not None:
+          host.shutdown()
+
+  def _call(self, method: str, *args: Any, host: Optional[_HostProcess] = None) -> Any:
+    host = host or self._host()
+    call = host.call(method, args)
+    try:
+      reply = call.replies.get()
+      if reply[0] == 'error':
+        raise EngineHostError(reply[2])
+      return reply[2]
+    finally:
+      host.finish(call)
+
+  def _host(self) -> _HostProcess:
+    with self._lock:
+      if not self._active.alive:
+        # A crash in the engine (pyopenjtalk, torch) only takes the host down; the next call gets a new one.
+        self.restarts += 1
+        self._replace_active('engine host crashed')
+      return self._active
+
+  def _replace_active(self, reason: str) -> None:
+    previous = self._active
+    standby, self._standby = self._standby, None
+    if standby is not None and standby.alive:
+      self._active = standby
+      if standby.warm.is_set():
+        self._settle_preload()
+    else:
+      if standby is not None:
+        standby.kill(reason)
+      self._active = _HostProcess(self._context, self._factory)
+      if self._preload_requested:
+        # A replacement that skipped the preload would stay cold, and report loading, for good.
+        self._warm(self._active, name='tts-host-preload')
+    # A fresh host is not waited for: calls queue on its pipe until the engine is built.
+    previous.kill(reason)
+    self._spawn_standby()
+
+  def _spawn_standby(self) -> None:
+    if not self._standby_enabled:
+      return
+    standby = _HostProcess(self._context, self._factory)
+    self._standby = standby
+    self._warm(standby, name='tts-host-standby')
+
+  def _warm(self, host: _HostProcess, *, name: str) -> None:
+    def warm() -> None:
+      try:
+        host.wait_hello()
+        if 'start_preload' in self._capabilities:
+          self._call('start_preload', host=host)
+      except EngineHostError:
+        return
+      host.warm.set()
+      with self._lock:
+        if host is self._active:
+          self._settle_preload()
+
+    threading.Thread(target=warm, name=name, daemon=True).start()
+
+  def _settle_preload(self) -> None:
+    # The first warm active host answers the runtime's start_preload, even when it replaced the one asked.
+    on_done, self._preload_done = self._preload_done, None
+    if on_done is not None:
+      on_done()
+
+
+class _RemoteRevisionCache:
+  """Stats view of the hosted engine's revision cache; the cache itself stays in the host."""
+
+  def __init__(self, engine: HostedTtsEngine) -> None:
+    self._engine = engine
+
+  def stats(self) -> dict[str, Any]:
+    return self._engine._call('revision_cache_stats')
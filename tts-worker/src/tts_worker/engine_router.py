@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+
+from .engine import EngineMetadata, TtsEngine
+
+
+ROUTE_DEFAULT_ENGINES = 'qwen3,kokoro'
+ROUTE_DEFAULT_MARGIN_MS = 150
+ROUTE_COST_SMOOTHING = 0.3
+# (fixed overhead seconds, seconds per character) before any measurement; deliberately pessimistic for Qwen3.
+ROUTE_COST_PRIORS: dict[str, Tuple[float, float]] = {
+  'qwen3': (0.35, 0.06),
+  'kokoro': (0.05, 0.004),
+}
+ROUTE_FALLBACK_PRIOR = (0.2, 0.03)
+
+
+@dataclass(frozen=True)
+class RouteConfig:
+  engines: tuple[str, ...]
+  margin_ms: int
+
+
+def load_route_config() -> RouteConfig:
+  raw_engines = os.environ.get('MH_TTS_ROUTE_ENGINES') or ROUTE_DEFAULT_ENGINES
+  engines = tuple(name.strip().lower() for name in raw_engines.split(',') if name.strip() != '')
+  if len(engines) < 2 or len(set(engines)) != len(engines):
+    raise RuntimeError(f'unsupported MH_TTS_ROUTE_ENGINES: {raw_engines} (expected at least two distinct engines, best quality first)')
+
+  raw_margin = os.environ.get('MH_TTS_ROUTE_MARGIN_MS') or str(ROUTE_DEFAULT_MARGIN_MS)
+  try:
+    margin_ms = int(raw_margin)
+  except ValueError as error:
+    raise RuntimeError(f'unsupported MH_TTS_ROUTE_MARGIN_MS: {raw_margin} (expected an integer number of milliseconds)') from error
+  if margin_ms < 0:
+    raise RuntimeError(f'unsupported MH_TTS_ROUTE_MARGIN_MS: {raw_margin} (expected a non-negative value)')
+  return RouteConfig(engines=engines, margin_ms=margin_ms)
+
+
+def route_language(text: str) -> str:
+  # Kokoro and Qwen3 both spend noticeably longer per character on Japanese than on ASCII text.
+  return 'en' if text.isascii() else 'ja'
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+  engine_name: str
+  engine: TtsEngine
+  language: str
+  chars: int
+  predicted_seconds: float
+  predicted_total_seconds: float
+
+
+class EngineCostModel:
+  """Online estimate of synthesis seconds per character, kept per (engine, language)."""
+
+  def __init__(self, priors: Optional[dict[str, Tuple[float, float]]] = None) -> None:
+    self._priors = dict(ROUTE_COST_PRIORS if priors is None else priors)
+    self._per_char: dict[Tuple[str, str], float] = {}
+    self._samples: dict[Tuple[str, str], int] = {}
+    self._lock = threading.Lock()
+
+  def predict(self, engine_name: str, language: str, chars: int) -> float:
+    overhead, prior_per_char = self._priors.get(engine_name, ROUTE_FALLBACK_PRIOR)
+    with self._lock:
+      per_char = self._per_char.get((engine_name, language), prior_per_char)
+    return overhead + per_char * max(0, chars)
+
+  def observe(self, engine_name: str, language: str, chars: int, seconds: float) -> None:
+    if chars <= 0 or seconds < 0.0:
+      return
+    overhead, prior_per_char = self._priors.get(engine_name, ROUTE_FALLBACK_PRIOR)
+    measured = max(0.0, seconds - overhead) / chars
+    key = (engine_name, language)
+    with self._lock:
+      previous = self._per_char.get(key)
+      if previous is None:
+        self._per_char[key] = measured
+      else:
+        self._per_char[key] = previous + ROUTE_COST_SMOOTHING * (measured - previous)
+      self._samples[key] = self._samples.get(key, 0) + 1
+
+  def snapshot(self) -> dict[str, Any]:
+    with self._lock:
+      return {
+        f'{engine_name}:{language}': {
+          'seconds_per_char': round(per_char, 5),
+          'samples': self._samples.get((engine_name, language), 0),
+        }
+        for (engine_name, language), per_char in sorted(self._per_char.items())
+      }
+
+
+class RoutingTtsEngine:
+  """Keep several engines loaded and route each utterance to the best one that can meet its deadline.
+
+  Engines are listed best quality first. A request goes to the first engine whose predicted time to first
+  audio fits before `expires_at`; when none fits the request is dropped up front instead of rendering audio
+  that would expire anyway.
+  """
+
+  def __init__(
+    self,
+    engines: list[Tuple[str, TtsEngine]],
+    *,
+    margin_ms: int = ROUTE_DEFAULT_MARGIN_MS,
+    cost_model: Optional[EngineCostModel] = None,
+  ) -> None:
+    if len(engines) < 2:
+      raise ValueError('routing needs at least two engines')
+    self.engines = list(engines)
+    self.margin_s = max(0, int(margin_ms)) / 1000.0
+    self.cost_model = cost_model or EngineCostModel()
+    self._lock = threading.Lock()
+    self._routed: dict[str, int] = {name: 0 for name, _ in self.engines}
+    self._unreachable = 0
+    self._observations = 0
+    self._abs_error_seconds = 0.0
+    self._signed_error_seconds = 0.0
+
+  @property
+  def metadata(self) -> EngineMetadata:
+    primary = self._engine_metadata(self.engines[0][1])
+    return replace(primary, engine=f'route({">".join(name for name, _ in self.engines)})')
+
+  def prepare_text(self, text: str) -> str:
+    return self.engines[0][1].prepare_text(text)
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None) -> Tuple[np.ndarray, int]:
+    return self.engines[0][1].synthesize_text(text, voice_override=voice_override)
+
+  def route(self, text: str, *, seconds_left: float, streams: Callable[[TtsEngine], bool]) -> Optional[RouteDecision]:
+    language = route_language(text)
+    chars = len(text)
+    budget = seconds_left - self.margin_s
+    candidates = [(name, engine) for name, engine in self.engines if not _is_busy_loading(engine)]
+    for name, engine in candidates or self.engines:
+      first_audio_chars = chars
+      if streams(engine):
+        split_segments = getattr(engine, 'split_segments', None)
+        if callable(split_segments):
+          segments = split_segments(text)
+          first_audio_chars = len(segments[0]) if segments else chars
+      predicted = self.cost_model.predict(name, language, first_audio_chars)
+      if predicted <= budget:
+        with self._lock:
+          self._routed[name] += 1
+        return RouteDecision(
+          engine_name=name,
+          engine=engine,
+          language=language,
+          chars=chars,
+          predicted_seconds=predicted,
+          predicted_total_seconds=self.cost_model.predict(name, language, chars),
+        )
+
+    with self._lock:
+      self._unreachable += 1
+    return None
+
+  def observe(self, decision: RouteDecision, seconds: float) -> None:
+    self.cost_model.observe(decision.engine_name, decision.language, decision.chars, seconds)
+    error = seconds - decision.predicted_total_seconds
+    with self._lock:
+      self._observations += 1
+      self._abs_error_seconds += abs(error)
+      self._signed_error_seconds += error
+
+  def route_stats(self) -> dict[str, Any]:
+    with self._lock:
+      observations = self._observations
+      return {
+        'routed': dict(self._routed),
+        'deadline_unreachable': self._unreachable,
+        'observations': observations,
+        'mean_abs_error_ms': round(self._abs_error_seconds * 1000.0 / observations, 1) if observations else None,
+        'mean_error_ms': round(self._signed_error_seconds * 1000.0 / observations, 1) if observations else None,
+        'cost_model': self.cost_model.snapshot(),
+        'margin_ms': int(round(self.margin_s * 1000.0)),
+      }
+
+  def engine_status(self) -> dict[str, Any]:
+    engines: dict[str, Any] = {}
+    for name, engine in self.engines:
+      engine_status = getattr(engine, 'engine_status', None)
+      engines[name] = engine_status() if callable(engine_status) else {'state': 'ready'}
+    return {'engines': engines, 'routing': self.route_stats()}
+
+  def is_busy_loading(self) -> bool:
+    # Routing only has to wait when no engine at all is ready.
+    return all(_is_busy_loading(engine) for _, engine in self.engines)
+
+  def start_preload(self, on_done: Optional[Callable[[], None]] = None) -> bool:
+    started = False
+    for _, engine in self.engines:
+      start_preload = getattr(engine, 'start_preload', None)
+      if callable(start_preload) and start_preload(on_done=on_done):
+        started = True
+    return started
+
+  def after_fork(self) -> None:
+    for _, engine in self.engines:
+      after_fork = getattr(engine, 'after_fork', None)
+      if callable(after_fork):
+        after_fork()
+
+  @staticmethod
+  def _engine_metadata(engine: TtsEngine) -> EngineMetadata:
+    metadata = getattr(engine, 'metadata', None)
+    if isinstance(metadata, EngineMetadata):
+      return metadata
+    raise RuntimeError('tts engine did not expose EngineMetadata')
+
+
+def _is_busy_loading(engine: Any) -> bool:
+  is_busy_loading = getattr(engine, 'is_busy_loading', None)
+  return bool(callable(is_busy_loading) and is_busy_loading())
@@ -0,0 +1,296 @@
+"""Fork-server mode: one parent keeps the engine loaded and forks a ready worker for each connection.
+
+`serve` imports the engine modules and builds the engine once, then listens on a Unix socket. `connect` is
+what face-app actually launches; it imports only the standard library, hands its stdin, stdout and stderr to
+the server, and exits with the forked worker's status. The forked child shares the parent's pages copy on
+write and runs the normal stdio protocol on the handed-over descriptors. For Qwen3 those pages hold the
+imported modules only; the model is loaded after the fork.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import selectors
+import signal
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+
+FORKSERVER_HEADER_LIMIT = 1024 * 1024
+REAP_INTERVAL_S = 0.2
+# Imported in the parent ahead of the first fork; missing ones are left to the engine to report.
+# Only Kokoro's model is built here. Qwen3TtsEngine loads lazily, and torch thread pools and CUDA state do not
+# survive a fork, so Qwen3 shares the imports alone and each forked worker loads the model itself.
+FORK_PRELOAD_MODULES = {
+  'kokoro': ('numpy', 'onnxruntime', 'kokoro_onnx', 'misaki.ja', 'pyopenjtalk'),
+  'qwen3': ('numpy', 'torch', 'qwen_tts'),
+}
+
+
+def resolve_forkserver_socket(raw: Optional[str]) -> Path:
+  if raw is not None and raw.strip() != '':
+    return Path(raw.strip()).expanduser()
+  runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+  if runtime_dir:
+    return Path(runtime_dir) / 'mh-tts-worker.sock'
+  return Path('/tmp') / f'mh-tts-worker-{os.getuid()}.sock'
+
+
+def _engine_name(env: dict[str, str]) -> str:
+  return (env.get('TTS_ENGINE') or 'kokoro').strip().lower()
+
+
+class ForkServer:
+  def __init__(self, socket_path: Path, *, engine: Any = None) -> None:
+    self.socket_path = socket_path
+    self.engine = engine
+    self.engine_name = _engine_name(dict(os.environ))
+    self._children: dict[int, socket.socket] = {}
+    self._pidfds: dict[int, int] = {}
+    self._selector = selectors.DefaultSelector()
+    self._listener: Optional[socket.socket] = None
+
+  def prepare(self) -> None:
+    """Import engine modules and build the engine; runs once, before any worker is forked."""
+    if self.engine is not None:
+      return
+    if (os.environ.get('MH_TTS_ENGINE_HOST') or 'off').strip().lower() != 'off':
+      # Host subprocesses and their reader threads cannot be shared with forked workers.
+      raise RuntimeError('fork-server mode does not support MH_TTS_ENGINE_HOST')
+    names = ('kokoro', 'qwen3') if self.engine_name == 'route' else (self.engine_name,)
+    for name in names:
+      for module in FORK_PRELOAD_MODULES.get(name, ()):
+        try:
+          importlib.import_module(module)
+        except ImportError:
+          pass
+    from .__main__ import create_tts_engine
+
+    self.engine = create_tts_engine()
+
+  def serve_forever(self) -> None:
+    self.prepare()
+    if self.socket_path.exists():
+      self.socket_path.unlink()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(self.socket_path))
+    os.chmod(self.socket_path, 0o600)
+    listener.listen(16)
+    self._listener = listener
+    self._selector.register(listener, selectors.EVENT_READ)
+    try:
+      while self._listener is not None:
+        for key, _ in self._selector.select(REAP_INTERVAL_S):
+          if key.fileobj is listener:
+            self._accept()
+          elif isinstance(key.data, tuple):
+            self._reap()
+          else:
+            self._client_gone(key.data)
+        self._reap()
+    finally:
+      self.close()
+
+  def close(self) -> None:
+    listener, self._listener = self._listener, None
+    if listener is not None:
+      self._selector.unregister(listener)
+      listener.close()
+      try:
+        self.socket_path.unlink()
+      except FileNotFoundError:
+        pass
+    for pid in list(self._children):
+      try:
+        os.kill(pid, signal.SIGTERM)
+      except ProcessLookupError:
+        pass
+
+  def _accept(self) -> None:
+    assert self._listener is not None
+    conn, _ = self._listener.accept()
+    try:
+      payload, fds, _, _ = socket.recv_fds(conn, FORKSERVER_HEADER_LIMIT, 3)
+      request = json.loads(payload.decode('utf-8'))
+      if len(fds) != 3:
+        raise ValueError(f'expected stdin, stdout and stderr, got {len(fds)} descriptors')
+    except Exception as error:
+      conn.sendall(json.dumps({'error': str(error)}).encode('utf-8') + b'\n')
+      conn.close()
+      return
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+      os._exit(self._run_child(conn, fds, request))
+    for fd in fds:
+      os.close(fd)
+    self._children[pid] = conn
+    self._selector.register(conn, selectors.EVENT_READ, pid)
+    if hasattr(os, 'pidfd_open'):
+      # A pidfd turns readable when the worker exits, so its status goes out without waiting for a poll.
+      try:
+        pidfd = os.pidfd_open(pid)
+      except OSError:
+        pass
+      else:
+        self._pidfds[pid] = pidfd
+        self._selector.register(pidfd, selectors.EVENT_READ, (pid,))
+    conn.sendall(json.dumps({'pid': pid}).encode('utf-8') + b'\n')
+
+  def _run_child(self, conn: socket.socket, fds: list[int], request: dict[str, Any]) -> int:
+    try:
+      self._selector.close()
+      if self._listener is not None:
+        self._listener.close()
+      for other in self._children.values():
+        other.close()
+      for pidfd in self._pidfds.values():
+        os.close(pidfd)
+      conn.close()
+      for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+      # Fresh stdio objects over the launcher's descriptors, as a newly started interpreter would have.
+      sys.stdin = open(0, 'r', encoding='utf-8', closefd=False)
+      sys.stdout = open(1, 'w', encoding='utf-8', buffering=1, closefd=False)
+      sys.stderr = open(2, 'w', encoding='utf-8', buffering=1, closefd=False)
+      signal.signal(signal.SIGTERM, signal.SIG_DFL)
+      signal.signal(signal.SIGINT, signal.SIG_DFL)
+      env = {str(key): str(value) for key, value in dict(request.get('env') or {}).items()}
+      os.environ.clear()
+      os.environ.update(env)
+      if request.get('cwd'):
+        os.chdir(request['cwd'])
+
+      import asyncio
+
+      from .__main__ import run_async
+
+      engine = self.engine
+      if _engine_name(env) != self.engine_name:
+        # The client asked for another engine than the one preloaded here; build it the slow way.
+        engine = None
+      else:
+        after_fork = getattr(engine, 'after_fork', None)
+        if callable(after_fork):
+          after_fork()
+      code = asyncio.run(run_async([str(arg) for arg in request.get('argv') or []], engine=engine))
+    except BaseException as error:
+      try:
+        os.write(2, f'[tts-forkserver] worker failed: {error}\n'.encode('utf-8', 'replace'))
+      except OSError:
+        pass
+      code = 1
+    try:
+      sys.stdout.flush()
+    except Exception:
+      pass
+    return int(code)
+
+  def _client_gone(self, pid: int) -> None:
+    conn = self._children.get(pid)
+    if conn is None:
+      return
+    try:
+      still_open = conn.recv(1) != b''
+    except OSError:
+      still_open = False
+    if still_open:
+      return
+    # The launcher died, so nobody is waiting on this worker any more.
+    self._selector.unregister(conn)
+    try:
+      os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+      pass
+
+  def _reap(self) -> None:
+    # Only this server's workers are waited for, so an embedding process keeps its other children.
+    for pid in list(self._children):
+      try:
+        done, status = os.waitpid(pid, os.WNOHANG)
+      except ChildProcessError:
+        done, status = pid, 0
+      if done == 0:
+        continue
+      conn = self._children.pop(pid)
+      pidfd = self._pidfds.pop(pid, None)
+      if pidfd is not None:
+        self._selector.unregister(pidfd)
+        os.close(pidfd)
+      try:
+        self._selector.unregister(conn)
+      except (KeyError, ValueError):
+        pass
+      try:
+        conn.sendall(json.dumps({'exit': os.waitstatus_to_exitcode(status)}).encode('utf-8') + b'\n')
+      except OSError:
+        pass
+      conn.close()
+
+
+def connect(socket_path: Path, argv: list[str]) -> Optional[int]:
+  """Run one worker through the fork server; None when no server is listening."""
+  client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  try:
+    client.connect(str(socket_path))
+  except OSError:
+    client.close()
+    return None
+
+  request = {'argv': argv, 'env': dict(os.environ), 'cwd': os.getcwd()}
+  socket.send_fds(client, [json.dumps(request).encode('utf-8')], [0, 1, 2])
+  reader = client.makefile('rb')
+  pid: Optional[int] = None
+
+  def forward(signum: int, _frame: Any) -> None:
+    if pid is not None:
+      try:
+        os.kill(pid, signum)
+      except ProcessLookupError:
+        pass
+
+  signal.signal(signal.SIGTERM, forward)
+  signal.signal(signal.SIGINT, forward)
+  for line in reader:
+    reply = json.loads(line)
+    if 'error' in reply:
+      os.write(2, f'[tts-forkserver] {reply["error"]}\n'.encode('utf-8'))
+      return 2
+    if 'pid' in reply:
+      pid = int(reply['pid'])
+    if 'exit' in reply:
+      return int(reply['exit'])
+  return 1
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+  parser = argparse.ArgumentParser(description='Minimum Headroom TTS worker fork server')
+  parser.add_argument('mode', choices=('serve', 'connect'))
+  parser.add_argument('--socket', default=None, help='Unix socket path (default: MH_TTS_FORKSERVER_SOCKET)')
+  args, worker_argv = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+  socket_path = resolve_forkserver_socket(args.socket or os.environ.get('MH_TTS_FORKSERVER_SOCKET'))
+
+  if args.mode == 'serve':
+    server = ForkServer(socket_path)
+    signal.signal(signal.SIGTERM, lambda *_: server.close())
+    server.serve_forever()
+    return 0
+
+  code = connect(socket_path, worker_argv)
+  if code is not None:
+    return code
+  # No server is running: become an ordinary worker so launchers never depend on the fork server.
+  os.execv(sys.executable, [sys.executable, '-m', 'tts_worker', *worker_argv])
+  return 1
+
+
+if __name__ == '__main__':
+  raise SystemExit(main())
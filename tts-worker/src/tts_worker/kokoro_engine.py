@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import contextlib
 import io
+import os
 import sys
 from dataclasses import dataclass
 from pathlib import Path
@@ -11,6 +12,8 @@ import numpy as np
 
 from .chunking import TextChunk, split_text_chunks
 from .engine import EngineMetadata
+from .revision_cache import RevisionChunkCache, RevisionKey
+from .silence import compact_pauses, resolve_max_pause_ms
 
 
 @dataclass(frozen=True)
@@ -73,6 +76,8 @@ class KokoroEngine:
 
     self._kokoro = Kokoro(str(model_paths.model_path), str(model_paths.voices_path))
     self._ja_g2p = misaki_ja.JAG2P(version='pyopenjtalk')
+    self.revision_cache = RevisionChunkCache()
+    self.max_pause_ms = resolve_max_pause_ms(os.environ.get('MH_TTS_MAX_PAUSE_MS'))
 
   @property
   def metadata(self) -> EngineMetadata:
@@ -83,51 +88,63 @@ class KokoroEngine:
       voices_path=str(self.model_paths.voices_path),
     )
 
+  def after_fork(self) -> None:
+    # An onnxruntime session's thread pool does not survive fork, so a forked worker opens its own session;
+    # the voices, G2P dictionaries and imported modules stay shared with the fork server.
+    session = getattr(self._kokoro, 'sess', None)
+    if session is None:
+      return
+    import onnxruntime  # type: ignore
+
+    self._kokoro.sess = onnxruntime.InferenceSession(str(self.model_paths.model_path), providers=session.get_providers())
+
   def prepare_text(self, text: str) -> str:
     return text
 
   def chunk_text(self, text: str) -> list[TextChunk]:
     return split_text_chunks(text)
 
-  def synthesize_text(self, text: str, *, voice_override: str | None = None) -> Tuple[np.ndarray, int]:
+  def synthesize_text(
+    self,
+    text: str,
+    *,
+    voice_override: str | None = None,
+    revision: Optional[RevisionKey] = None,
+  ) -> Tuple[np.ndarray, int]:
     chunks = self.chunk_text(text)
-    return self.synthesize_chunks(chunks, voice_override=voice_override)
+    if revision is None:
+      return self.synthesize_chunks(chunks, voice_override=voice_override)
+
+    active_voice = self._active_voice(voice_override)
+    chunks = [chunk for chunk in chunks if chunk.text]
+    rendered = self.revision_cache.render(
+      revision,
+      active_voice,
+      [(chunk.text, chunk.lang, chunk.speed, chunk.is_phonemes) for chunk in chunks],
+      lambda missing: [self._synthesize_chunk(chunks[index], voice=active_voice) for index in missing],
+    )
+    return _concatenate_chunks(compact_pauses(rendered, max_pause_ms=self.max_pause_ms))
 
   def synthesize_chunks(self, chunks: Iterable[TextChunk], *, voice_override: str | None = None) -> Tuple[np.ndarray, int]:
-    combined: Optional[np.ndarray] = None
-    sample_rate: Optional[int] = None
-    active_voice = voice_override.strip() if isinstance(voice_override, str) and voice_override.strip() != '' else self.voice
-
-    for chunk in chunks:
-      if not chunk.text:
-        continue
-
-      source_text = chunk.text
-      if chunk.is_phonemes:
-        source_text = self._to_ja_phonemes(chunk.text)
-
-      audio, chunk_rate = self._kokoro_create(
-        source_text,
-        voice=active_voice,
-        lang=chunk.lang,
-        speed=chunk.speed,
-        is_phonemes=chunk.is_phonemes,
-      )
-
-      if sample_rate is None:
-        sample_rate = chunk_rate
-      elif sample_rate != chunk_rate:
-        raise RuntimeError(f'sample rate mismatch: {sample_rate} vs {chunk_rate}')
-
-      if combined is None:
-        combined = audio
-      else:
-        combined = np.concatenate([combined, audio])
-
-    if combined is None or sample_rate is None:
-      return np.zeros(1, dtype=np.float32), 24_000
-
-    return combined.astype(np.float32, copy=False), sample_rate
+    active_voice = self._active_voice(voice_override)
+    rendered = [self._synthesize_chunk(chunk, voice=active_voice) for chunk in chunks if chunk.text]
+    return _concatenate_chunks(compact_pauses(rendered, max_pause_ms=self.max_pause_ms))
+
+  def _active_voice(self, voice_override: str | None) -> str:
+    return voice_override.strip() if isinstance(voice_override, str) and voice_override.strip() != '' else self.voice
+
+  def _synthesize_chunk(self, chunk: TextChunk, *, voice: str) -> Tuple[np.ndarray, int]:
+    source_text = chunk.text
+    if chunk.is_phonemes:
+      source_text = self._to_ja_phonemes(chunk.text)
+
+    return self._kokoro_create(
+      source_text,
+      voice=voice,
+      lang=chunk.lang,
+      speed=chunk.speed,
+      is_phonemes=chunk.is_phonemes,
+    )
 
   def _to_ja_phonemes(self, text: str) -> str:
     capture = io.StringIO()
@@ -182,6 +199,21 @@ class KokoroEngine:
     raise RuntimeError('kokoro instance does not expose create/generate methods')
 
 
+def _concatenate_chunks(rendered: list[Tuple[np.ndarray, int]]) -> Tuple[np.ndarray, int]:
+  sample_rate: Optional[int] = None
+  for _, chunk_rate in rendered:
+    if sample_rate is None:
+      sample_rate = chunk_rate
+    elif sample_rate != chunk_rate:
+      raise RuntimeError(f'sample rate mismatch: {sample_rate} vs {chunk_rate}')
+
+  if sample_rate is None:
+    return np.zeros(1, dtype=np.float32), 24_000
+
+  # One concatenate over all pieces; compacted chunks arrive as many short slices.
+  return np.concatenate([audio for audio, _ in rendered]).astype(np.float32, copy=False), sample_rate
+
+
 def _normalize_kokoro_result(result: Any) -> Tuple[np.ndarray, int]:
   if isinstance(result, tuple) and len(result) >= 2:
     audio = result[0]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import re
+import threading
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+
+# The filler that shared_text and qwen3_text prepend to stabilize Japanese openings.
+LEADIN_TEXT = 'はい、'
+LEADIN_MODES = {'off', 'cached'}
+LEADIN_RE = re.compile(r'^(?P<leading>\s*[「『（([{\'"“‘]*)はい、(?P<rest>.*\S.*)$', re.DOTALL)
+
+LeadinClip = Tuple[np.ndarray, int]
+
+
+def resolve_leadin_mode(raw: Optional[str]) -> str:
+  if raw is None or raw.strip() == '':
+    return 'off'
+  normalized = raw.strip().lower()
+  if normalized in LEADIN_MODES:
+    return normalized
+  raise ValueError(f'unsupported MH_TTS_LEADIN: {raw} (expected off|cached)')
+
+
+def split_leadin(prepared_text: str) -> Optional[str]:
+  """Return the text after a leading `はい、`, or None when the utterance does not open with it.
+
+  Opening quotes and brackets are silent, so they move to the remainder.
+  """
+  match = LEADIN_RE.match(prepared_text)
+  if match is None:
+    return None
+  return f'{match.group("leading").strip()}{match.group("rest").lstrip()}'
+
+
+class LeadinClipCache:
+  """Rendered lead-in clips keyed by (engine, voice); a voice of None means the engine default."""
+
+  def __init__(self) -> None:
+    self._clips: dict[tuple[str, Optional[str]], LeadinClip] = {}
+    self._pending: set[tuple[str, Optional[str]]] = set()
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+
+  def get(self, engine_name: str, voice: Optional[str]) -> Optional[LeadinClip]:
+    with self._lock:
+      clip = self._clips.get((engine_name, voice))
+      if clip is None:
+        self.misses += 1
+      else:
+        self.hits += 1
+      return clip
+
+  def claim(self, engine_name: str, voice: Optional[str]) -> bool:
+    # Only one render per key is in flight at a time.
+    key = (engine_name, voice)
+    with self._lock:
+      if key in self._clips or key in self._pending:
+        return False
+      self._pending.add(key)
+      return True
+
+  def store(self, engine_name: str, voice: Optional[str], clip: Optional[LeadinClip]) -> None:
+    key = (engine_name, voice)
+    with self._lock:
+      self._pending.discard(key)
+      if clip is not None and clip[0].size > 0:
+        self._clips[key] = (np.asarray(clip[0], dtype=np.float32), int(clip[1]))
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      return {
+        'clips': len(self._clips),
+        'hits': self.hits,
+        'misses': self.misses,
+      }
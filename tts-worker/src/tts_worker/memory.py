@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import os
+import threading
+import tracemalloc
+from typing import Any, Optional
+
+from .chunking import group_sentences, split_sentences
+
+
+MEMORY_PROFILE_MODES = {'off', 'rss', 'tracemalloc'}
+MEGABYTE = 1024 * 1024
+# Rough speaking rates for the budget estimate: English runs about 14 characters a second, Japanese about 7.
+ASCII_SECONDS_PER_CHAR = 0.07
+OTHER_SECONDS_PER_CHAR = 0.15
+ESTIMATE_SAMPLE_RATE = 24_000
+# Engines hold their per-chunk float32 pieces and the concatenated clip at the same time.
+RENDER_BYTES_PER_SAMPLE = 8
+
+
+def resolve_memory_profile(raw: Optional[str]) -> str:
+  if raw is None or raw.strip() == '':
+    return 'off'
+  normalized = raw.strip().lower()
+  if normalized in MEMORY_PROFILE_MODES:
+    return normalized
+  raise ValueError(f'unsupported MH_TTS_MEMORY_PROFILE: {raw} (expected off|rss|tracemalloc)')
+
+
+def resolve_memory_budget(raw: Optional[str]) -> Optional[int]:
+  """Per-utterance budget in bytes; unset or 0 turns the guard off."""
+  if raw is None or raw.strip() == '':
+    return None
+  try:
+    megabytes = float(raw)
+  except ValueError as error:
+    raise ValueError(f'unsupported MH_TTS_UTTERANCE_BUDGET_MB: {raw} (expected a number of megabytes)') from error
+  if megabytes < 0:
+    raise ValueError(f'unsupported MH_TTS_UTTERANCE_BUDGET_MB: {raw} (expected a non-negative value)')
+  return int(megabytes * MEGABYTE) or None
+
+
+def estimate_audio_seconds(text: str) -> float:
+  ascii_chars = sum(1 for char in text if char.isascii() and not char.isspace())
+  other_chars = sum(1 for char in text if not char.isascii() and not char.isspace())
+  return ascii_chars * ASCII_SECONDS_PER_CHAR + other_chars * OTHER_SECONDS_PER_CHAR
+
+
+def read_rss_bytes() -> Optional[int]:
+  try:
+    with open('/proc/self/statm', 'rb') as handle:
+      resident_pages = int(handle.read().split()[1])
+  except (OSError, IndexError, ValueError):
+    return None
+  return resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+
+class UtteranceMemory:
+  """Memory growth of one utterance, sampled as each stage ends and reported relative to where it started.
+
+  `rss` reads the resident set from /proc, which includes native model buffers. `tracemalloc` reports the
+  traced peak within each stage, which covers numpy arrays but not onnxruntime or torch allocations. Both are
+  process-wide, so a prefetch or lookahead render running alongside is counted too.
+  """
+
+  def __init__(self, mode: str) -> None:
+    self.mode = mode
+    self.stages: dict[str, float] = {}
+    self.peak_bytes = 0
+    self._baseline = 0
+    if mode == 'tracemalloc':
+      self._baseline = tracemalloc.get_traced_memory()[0]
+      tracemalloc.reset_peak()
+    elif mode == 'rss':
+      self._baseline = read_rss_bytes() or 0
+
+  def sample(self, stage: str) -> None:
+    if self.mode == 'tracemalloc':
+      growth = tracemalloc.get_traced_memory()[1] - self._baseline
+      tracemalloc.reset_peak()
+    elif self.mode == 'rss':
+      rss = read_rss_bytes()
+      if rss is None:
+        return
+      growth = rss - self._baseline
+    else:
+      return
+    self.stages[stage] = round(growth / MEGABYTE, 2)
+    self.peak_bytes = max(self.peak_bytes, growth)
+
+  def report(self) -> Optional[dict[str, Any]]:
+    if self.mode == 'off' or not self.stages:
+      return None
+    return {'mode': self.mode, 'peak_mb': round(self.peak_bytes / MEGABYTE, 2), 'stages': dict(self.stages)}
+
+
+class MemoryAccounting:
+  """Per-utterance memory sampling and the budget that sends long texts down the chunked path."""
+
+  def __init__(self, mode: str = 'off', budget_bytes: Optional[int] = None, *, bytes_per_sample: int = RENDER_BYTES_PER_SAMPLE) -> None:
+    self.mode = mode
+    self.budget_bytes = budget_bytes
+    self.bytes_per_sample = bytes_per_sample
+    self._lock = threading.Lock()
+    self._started_tracing = False
+    if mode == 'tracemalloc' and not tracemalloc.is_tracing():
+      tracemalloc.start()
+      self._started_tracing = True
+    self.utterances = 0
+    self.max_peak_bytes = 0
+    self.last: Optional[dict[str, Any]] = None
+    self.chunked = 0
+    self.prerender_skipped = 0
+
+  def close(self) -> None:
+    if self._started_tracing:
+      tracemalloc.stop()
+      self._started_tracing = False
+
+  def begin(self) -> UtteranceMemory:
+    return UtteranceMemory(self.mode)
+
+  def finish(self, memory: UtteranceMemory) -> Optional[dict[str, Any]]:
+    report = memory.report()
+    if report is not None:
+      with self._lock:
+        self.utterances += 1
+        self.max_peak_bytes = max(self.max_peak_bytes, memory.peak_bytes)
+        self.last = report
+    return report
+
+  def estimate_bytes(self, text: str) -> int:
+    return int(estimate_audio_seconds(text) * ESTIMATE_SAMPLE_RATE * self.bytes_per_sample)
+
+  def over_budget(self, text: str) -> bool:
+    return self.budget_bytes is not None and self.estimate_bytes(text) > self.budget_bytes
+
+  def chunk_text(self, text: str) -> list[str]:
+    """Group sentences into pieces whose estimated audio fits the budget; a longer sentence stays whole."""
+    return group_sentences(split_sentences(text) or [text], lambda joined: not self.over_budget(joined))
+
+  def stats(self) -> dict[str, Any]:
+    stats: dict[str, Any] = {
+      'mode': self.mode,
+      'budget_mb': round(self.budget_bytes / MEGABYTE, 2) if self.budget_bytes is not None else None,
+      'chunked': self.chunked,
+      'prerender_skipped': self.prerender_skipped,
+    }
+    if self.mode == 'off':
+      return stats
+    with self._lock:
+      stats['utterances'] = self.utterances
+      stats['max_peak_mb'] = round(self.max_peak_bytes / MEGABYTE, 2)
+      stats['last'] = self.last
+    rss = read_rss_bytes()
+    if rss is not None:
+      stats['rss_mb'] = round(rss / MEGABYTE, 2)
+    if self.mode == 'tracemalloc' and tracemalloc.is_tracing():
+      stats['traced_mb'] = round(tracemalloc.get_traced_memory()[0] / MEGABYTE, 2)
+    return stats
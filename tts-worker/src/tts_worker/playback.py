@@ -5,10 +5,13 @@ import base64
 import io
 import math
 import shutil
+import struct
 import subprocess
+import threading
 import time
-import wave
-from typing import Awaitable, Callable
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 
 import numpy as np
 
@@ -17,10 +20,269 @@ MouthCallback = Callable[[float], Awaitable[None] | None]
 ShouldStop = Callable[[], bool]
 FADE_IN_MS = 3
 FADE_OUT_MS = 18
+WAV_HEADER_BYTES = 44
+# Float scratch used while converting; bounds the conversion's extra memory regardless of utterance length.
+ENCODE_BLOCK_SAMPLES = 16_384
+BROWSER_AUDIO_CODECS = {'wav', 'opus'}
+# libopus only runs at these rates; other rates fall back to WAV for that clip.
+OPUS_SAMPLE_RATES = {8_000, 12_000, 16_000, 24_000, 48_000}
+OPUS_MIME_TYPE = 'audio/ogg; codecs=opus'
+MOUTH_TICK_S = 0.04
+# A mouth tick that wakes this much after its deadline counts as late.
+LATE_TICK_S = 0.01
+
+
+def resolve_browser_audio_codec(raw: Optional[str]) -> str:
+  if raw is None or raw.strip() == '':
+    return 'wav'
+  normalized = raw.strip().lower()
+  if normalized not in BROWSER_AUDIO_CODECS:
+    raise ValueError(f'unsupported MH_BROWSER_AUDIO_CODEC: {raw} (expected wav|opus)')
+  if normalized == 'opus':
+    try:
+      import soundfile as sf  # type: ignore
+    except Exception as error:  # pragma: no cover - runtime dependent
+      raise RuntimeError('MH_BROWSER_AUDIO_CODEC=opus requires soundfile') from error
+    if 'OPUS' not in sf.available_subtypes('OGG'):
+      raise RuntimeError(f'MH_BROWSER_AUDIO_CODEC=opus requires libsndfile with Ogg/Opus support (found {sf.__libsndfile_version__})')
+  return normalized
+
+
+@dataclass(frozen=True)
+class PcmBuffer:
+  """One utterance encoded once: a 44-byte WAV header followed by mono int16 PCM in a single bytearray.
+
+  `wav`, `pcm` and `samples` are views into the same memory, so local playback and the browser encoder
+  share it without copying.
+  """
+
+  data: bytearray
+  sample_rate: int
+
+  @property
+  def sample_count(self) -> int:
+    return (len(self.data) - WAV_HEADER_BYTES) // 2
+
+  @property
+  def wav(self) -> memoryview:
+    return memoryview(self.data)
+
+  @property
+  def pcm(self) -> memoryview:
+    return memoryview(self.data)[WAV_HEADER_BYTES:]
+
+  @property
+  def samples(self) -> np.ndarray:
+    return np.frombuffer(self.data, dtype=np.int16, offset=WAV_HEADER_BYTES)
+
+  def wav_base64(self) -> bytes:
+    return base64.b64encode(self.wav)
+
+
+@dataclass(frozen=True)
+class BrowserClip:
+  mime_type: str
+  audio_base64: bytes
+  encoded_bytes: int
+  wav_bytes: int
+  encode_seconds: float
+
+
+class BrowserClipEncoder:
+  """Encode one utterance for the browser, whole or block by block while it streams.
+
+  Opus blocks go into an Ogg stream as they arrive, so most of the encoding is done by the time playback
+  ends. WAV blocks are only collected and encoded in `finish`.
+  """
+
+  def __init__(self, codec: str, sample_rate: int) -> None:
+    self.sample_rate = int(sample_rate)
+    self.codec = codec if codec != 'opus' or self.sample_rate in OPUS_SAMPLE_RATES else 'wav'
+    self._blocks: list[np.ndarray] = []
+    self._sample_count = 0
+    self._encode_seconds = 0.0
+    self._output: Optional[io.BytesIO] = None
+    self._file: Any = None
+    if self.codec == 'opus':
+      import soundfile as sf  # type: ignore
+
+      self._output = io.BytesIO()
+      self._file = sf.SoundFile(self._output, 'w', samplerate=self.sample_rate, channels=1, format='OGG', subtype='OPUS')
+
+  def write(self, block: np.ndarray) -> None:
+    block = np.asarray(block).reshape(-1)
+    self._sample_count += int(block.shape[0])
+    if self._file is None:
+      self._blocks.append(np.asarray(block, dtype=np.float32))
+      return
+    started = time.perf_counter()
+    self._file.write(block)
+    self._encode_seconds += time.perf_counter() - started
+
+  def finish(self, *, pcm: Optional['PcmBuffer'] = None) -> BrowserClip:
+    started = time.perf_counter()
+    if self._file is not None:
+      self._file.close()
+      assert self._output is not None
+      encoded = self._output.getvalue()
+      mime_type = OPUS_MIME_TYPE
+    else:
+      if pcm is None:
+        joined = np.concatenate(self._blocks) if self._blocks else np.zeros(0, dtype=np.float32)
+        pcm = encode_pcm(joined, self.sample_rate)
+      self._sample_count = pcm.sample_count
+      encoded = pcm.wav
+      mime_type = 'audio/wav'
+    audio_base64 = base64.b64encode(encoded)
+    return BrowserClip(
+      mime_type=mime_type,
+      audio_base64=audio_base64,
+      encoded_bytes=len(encoded),
+      wav_bytes=WAV_HEADER_BYTES + 2 * self._sample_count,
+      encode_seconds=self._encode_seconds + time.perf_counter() - started,
+    )
+
+
+def encode_browser_clip(pcm: 'PcmBuffer', codec: str) -> BrowserClip:
+  encoder = BrowserClipEncoder(codec, pcm.sample_rate)
+  if encoder.codec == 'wav':
+    return encoder.finish(pcm=pcm)
+  encoder.write(pcm.samples)
+  return encoder.finish()
+
+
+class BrowserAudioStats:
+  """Running totals of browser clip sizes against plain WAV, and of encode time."""
+
+  def __init__(self, codec: str) -> None:
+    self.codec = codec
+    self._lock = threading.Lock()
+    self.clips = 0
+    self.encoded_bytes = 0
+    self.wav_bytes = 0
+    self.encode_seconds = 0.0
+    self.last: Optional[dict[str, Any]] = None
+
+  def observe(self, clip: BrowserClip) -> None:
+    with self._lock:
+      self.clips += 1
+      self.encoded_bytes += clip.encoded_bytes
+      self.wav_bytes += clip.wav_bytes
+      self.encode_seconds += clip.encode_seconds
+      self.last = {
+        'mime_type': clip.mime_type,
+        'bytes': clip.encoded_bytes,
+        'bytes_saved': clip.wav_bytes - clip.encoded_bytes,
+        'encode_ms': round(clip.encode_seconds * 1000, 3),
+      }
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      return {
+        'codec': self.codec,
+        'clips': self.clips,
+        'bytes': self.encoded_bytes,
+        'bytes_saved': self.wav_bytes - self.encoded_bytes,
+        'avg_encode_ms': round(self.encode_seconds * 1000 / self.clips, 3) if self.clips else None,
+        'last': self.last,
+      }
+
+
+class PlaybackTiming:
+  """Mouth-tick lateness, drift from the audio device clock, and device-reported underruns, across utterances."""
+
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    self.ticks = 0
+    self.late_ticks = 0
+    self.lateness_seconds = 0.0
+    self.max_lateness_seconds = 0.0
+    self.max_drift_seconds: Optional[float] = None
+    self.underruns = 0
+
+  def observe_tick(self, lateness_seconds: float, drift_seconds: Optional[float] = None) -> None:
+    lateness_seconds = max(0.0, lateness_seconds)
+    with self._lock:
+      self.ticks += 1
+      self.lateness_seconds += lateness_seconds
+      self.max_lateness_seconds = max(self.max_lateness_seconds, lateness_seconds)
+      if lateness_seconds >= LATE_TICK_S:
+        self.late_ticks += 1
+      if drift_seconds is not None:
+        self.max_drift_seconds = max(self.max_drift_seconds or 0.0, abs(drift_seconds))
+
+  def observe_underrun(self) -> None:
+    with self._lock:
+      self.underruns += 1
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      return {
+        'ticks': self.ticks,
+        'late_ticks': self.late_ticks,
+        'avg_lateness_ms': round(self.lateness_seconds * 1000 / self.ticks, 3) if self.ticks else None,
+        'max_lateness_ms': round(self.max_lateness_seconds * 1000, 3),
+        'max_clock_drift_ms': round(self.max_drift_seconds * 1000, 3) if self.max_drift_seconds is not None else None,
+        'underruns': self.underruns,
+      }
+
+
+class _MouthTicker:
+  """Paces mouth updates on absolute deadlines, so one late wake-up does not push every later tick back."""
+
+  def __init__(self, timing: PlaybackTiming, device_clock: Optional[Callable[[], float]] = None) -> None:
+    self._timing = timing
+    self._clock = device_clock
+    self._deadline = time.monotonic()
+    self._origin: Optional[tuple[float, float]] = None
+    if device_clock is not None:
+      device_now = self._read_clock()
+      if device_now is not None:
+        self._origin = (self._deadline, device_now)
+
+  async def wait(self) -> None:
+    self._deadline += MOUTH_TICK_S
+    await asyncio.sleep(max(0.0, self._deadline - time.monotonic()))
+    woke = time.monotonic()
+    lateness = woke - self._deadline
+    if lateness > MOUTH_TICK_S:
+      # More than a tick behind: skip the missed ticks instead of sending them in a burst.
+      self._deadline = woke
+    drift = None
+    if self._origin is not None:
+      device_now = self._read_clock()
+      if device_now is not None:
+        drift = (woke - self._origin[0]) - (device_now - self._origin[1])
+    self._timing.observe_tick(lateness, drift)
+
+  def _read_clock(self) -> Optional[float]:
+    clock = self._clock
+    if clock is None:
+      return None
+    try:
+      return float(clock())
+    except Exception:
+      self._clock = None
+      self._origin = None
+      return None
+
+
+def encode_pcm(samples: np.ndarray, sample_rate: int, *, fade: bool = True) -> PcmBuffer:
+  """Fade, clip and convert float audio to int16 straight into a preallocated WAV buffer."""
+  audio = np.asarray(samples, dtype=np.float32).reshape(-1)
+  count = int(audio.shape[0])
+  data = bytearray(WAV_HEADER_BYTES + 2 * count)
+  _write_wav_header(data, count, int(sample_rate))
+  if count:
+    out = np.frombuffer(data, dtype=np.int16, offset=WAV_HEADER_BYTES)
+    fade_in = _fade_length(sample_rate, FADE_IN_MS, count) if fade else 0
+    fade_out = _fade_length(sample_rate, FADE_OUT_MS, count) if fade else 0
+    _convert_int16_into(audio, out, fade_in=fade_in, fade_out=fade_out)
+  return PcmBuffer(data=data, sample_rate=int(sample_rate))
 
 
 class PlaybackEngine:
-  def __init__(self, allow_local_output: bool = True) -> None:
+  def __init__(self, allow_local_output: bool = True, *, feeder: Optional[Executor] = None) -> None:
     try:
       import sounddevice as sd  # type: ignore
     except Exception:  # pragma: no cover - runtime dependent
@@ -30,6 +292,7 @@ class PlaybackEngine:
     self._sd = sd
     self._aplay_path = shutil.which('aplay')
     self._aplay_proc: subprocess.Popen | None = None
+    self._sd_stream = None
 
     if not self._allow_local_output:
       self.backend = 'silent'
@@ -41,6 +304,9 @@ class PlaybackEngine:
       self.backend = 'silent'
 
     self.has_audio_output = self.backend in ('sounddevice', 'aplay')
+    # Real-time mode hands in an executor pinned to the playback CPUs; otherwise feeding uses the default pool.
+    self._feeder = feeder
+    self.timing = PlaybackTiming()
 
   def stop(self) -> None:
     if self._sd is not None:
@@ -50,6 +316,15 @@ class PlaybackEngine:
         # Ignore stop failures to keep future utterances possible.
         pass
 
+    sd_stream = self._sd_stream
+    if sd_stream is not None:
+      try:
+        sd_stream.abort()
+        sd_stream.close()
+      except Exception:
+        pass
+    self._sd_stream = None
+
     proc = self._aplay_proc
     if proc and proc.poll() is None:
       try:
@@ -73,19 +348,24 @@ class PlaybackEngine:
     sample_rate: int,
     on_mouth: MouthCallback,
     should_stop: ShouldStop,
+    *,
+    pcm: Optional[PcmBuffer] = None,
+    on_start: Optional[Callable[[], None]] = None,
   ) -> str:
     if samples.size == 0:
       await _emit_mouth(on_mouth, 0.0)
       return 'completed'
 
-    audio = _apply_fade(np.asarray(samples, dtype=np.float32), sample_rate)
+    # The mouth follows the float samples; only the device gets the encoded buffer.
+    audio = np.asarray(samples, dtype=np.float32)
     duration = max(0.0, float(audio.shape[0]) / float(sample_rate))
-    aplay_feed_task: asyncio.Task[None] | None = None
+    aplay_feed_task: asyncio.Future[None] | None = None
+    if pcm is None and self.has_audio_output:
+      pcm = await asyncio.to_thread(encode_pcm, audio, sample_rate)
 
-    if self.backend == 'sounddevice' and self._sd is not None:
-      self._sd.play(audio, sample_rate, blocking=False)
-    elif self.backend == 'aplay' and self._aplay_path:
-      pcm = _to_int16_pcm_bytes(audio)
+    if self.backend == 'sounddevice' and self._sd is not None and pcm is not None:
+      self._sd.play(pcm.samples, sample_rate, blocking=False)
+    elif self.backend == 'aplay' and self._aplay_path and pcm is not None:
       proc = subprocess.Popen(
         [self._aplay_path, '-f', 'S16_LE', '-r', str(sample_rate), '-c', '1', '-q'],
         stdin=subprocess.PIPE,
@@ -93,9 +373,12 @@ class PlaybackEngine:
         stderr=subprocess.DEVNULL
       )
       self._aplay_proc = proc
-      aplay_feed_task = asyncio.create_task(asyncio.to_thread(_feed_aplay_pcm, proc, pcm))
+      aplay_feed_task = asyncio.ensure_future(self._feed(_feed_aplay_pcm, proc, pcm.pcm))
 
+    if on_start is not None:
+      on_start()
     started = time.monotonic()
+    ticker = _MouthTicker(self.timing, self._device_clock())
 
     while True:
       if should_stop():
@@ -109,11 +392,13 @@ class PlaybackEngine:
 
       mouth_open = _estimate_mouth_open(audio, sample_rate, elapsed)
       await _emit_mouth(on_mouth, mouth_open)
-      await asyncio.sleep(0.04)
+      await ticker.wait()
 
     if self.backend == 'sounddevice' and self._sd is not None:
       try:
         await asyncio.to_thread(self._sd.wait)
+        if self._sd.get_status().output_underflow:
+          self.timing.observe_underrun()
       except Exception:
         pass
     elif self.backend == 'aplay':
@@ -133,6 +418,194 @@ class PlaybackEngine:
     await _emit_mouth(on_mouth, 0.0)
     return 'completed'
 
+  async def play_stream(
+    self,
+    blocks: AsyncIterator[np.ndarray],
+    sample_rate: int,
+    on_mouth: MouthCallback,
+    should_stop: ShouldStop,
+    *,
+    on_start: Optional[Callable[[], None]] = None,
+  ) -> str:
+    timeline = _StreamTimeline(sample_rate)
+    write_block, finish_output = self._open_stream_output(sample_rate)
+    if on_start is not None:
+      on_start()
+    feed_block = (lambda chunk: self._feed(write_block, chunk)) if write_block is not None else None
+    feeder = asyncio.create_task(_feed_stream(blocks, timeline, sample_rate, feed_block))
+    ticker = _MouthTicker(self.timing, self._device_clock())
+
+    # The mouth clock only advances over audio that has actually been queued, so a slow producer pauses the
+    # animation instead of running it ahead of the speaker.
+    position = 0.0
+    last_tick = time.monotonic()
+    try:
+      while True:
+        if should_stop():
+          self.stop()
+          await _emit_mouth(on_mouth, 0.0)
+          return 'interrupted'
+
+        if feeder.done() and feeder.exception() is not None:
+          self.stop()
+          raise feeder.exception()
+
+        now = time.monotonic()
+        position = min(position + (now - last_tick), timeline.duration)
+        last_tick = now
+        if timeline.closed and position >= timeline.duration:
+          break
+
+        mouth_open = _estimate_mouth_open(timeline.samples, sample_rate, position) if position < timeline.duration else 0.0
+        await _emit_mouth(on_mouth, mouth_open)
+        await ticker.wait()
+    finally:
+      if not feeder.done():
+        feeder.cancel()
+        try:
+          await feeder
+        except BaseException:
+          pass
+
+    try:
+      await asyncio.to_thread(finish_output)
+    except Exception:
+      pass
+
+    await _emit_mouth(on_mouth, 0.0)
+    return 'completed'
+
+  def _feed(self, function: Callable[..., Any], *args: Any) -> Awaitable[Any]:
+    if self._feeder is None:
+      return asyncio.to_thread(function, *args)
+    return asyncio.get_running_loop().run_in_executor(self._feeder, function, *args)
+
+  def _device_clock(self) -> Optional[Callable[[], float]]:
+    if self.backend != 'sounddevice' or self._sd is None:
+      return None
+    stream = self._sd_stream
+    if stream is None:
+      try:
+        stream = self._sd.get_stream()
+      except Exception:
+        return None
+    return lambda: stream.time
+
+  def _open_stream_output(self, sample_rate: int) -> tuple[Optional[Callable[[np.ndarray], None]], Callable[[], None]]:
+    if self.backend == 'sounddevice' and self._sd is not None:
+      stream = self._sd.OutputStream(samplerate=sample_rate, channels=1, dtype='float32')
+      stream.start()
+      self._sd_stream = stream
+
+      def write_sd(block: np.ndarray) -> None:
+        if stream.write(block.reshape(-1, 1)):
+          self.timing.observe_underrun()
+
+      def finish_sd() -> None:
+        if self._sd_stream is not stream:
+          return
+        # stop() lets the queued buffers drain before closing the device.
+        stream.stop()
+        stream.close()
+        self._sd_stream = None
+
+      return write_sd, finish_sd
+
+    if self.backend == 'aplay' and self._aplay_path:
+      proc = subprocess.Popen(
+        [self._aplay_path, '-f', 'S16_LE', '-r', str(sample_rate), '-c', '1', '-q'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+      )
+      self._aplay_proc = proc
+
+      def write_aplay(block: np.ndarray) -> None:
+        if proc.stdin is not None:
+          proc.stdin.write(encode_pcm(block, sample_rate, fade=False).pcm)
+
+      def finish_aplay() -> None:
+        try:
+          if proc.stdin is not None:
+            proc.stdin.close()
+        except Exception:
+          pass
+        proc.wait()
+        if self._aplay_proc is proc:
+          self._aplay_proc = None
+
+      return write_aplay, finish_aplay
+
+    return None, lambda: None
+
+
+class _StreamTimeline:
+  """Growable float32 buffer holding the audio queued so far for a streamed utterance."""
+
+  def __init__(self, sample_rate: int) -> None:
+    self._sample_rate = int(sample_rate)
+    self._buffer = np.zeros(max(1, self._sample_rate), dtype=np.float32)
+    self._length = 0
+    self.closed = False
+
+  @property
+  def samples(self) -> np.ndarray:
+    return self._buffer[:self._length]
+
+  @property
+  def duration(self) -> float:
+    return float(self._length) / float(self._sample_rate)
+
+  def append(self, block: np.ndarray) -> None:
+    needed = self._length + block.shape[0]
+    if needed > self._buffer.shape[0]:
+      grown = np.zeros(max(needed, self._buffer.shape[0] * 2), dtype=np.float32)
+      grown[:self._length] = self._buffer[:self._length]
+      self._buffer = grown
+    self._buffer[self._length:needed] = block
+    self._length = needed
+
+
+async def _feed_stream(
+  blocks: AsyncIterator[np.ndarray],
+  timeline: _StreamTimeline,
+  sample_rate: int,
+  write_block: Optional[Callable[[np.ndarray], Awaitable[Any]]],
+) -> None:
+  fade_in_samples = max(0, int((sample_rate * FADE_IN_MS) / 1000))
+  fade_out_samples = max(0, int((sample_rate * FADE_OUT_MS) / 1000))
+  # Hold back just enough audio to fade out the final block once the stream ends.
+  tail = np.zeros(0, dtype=np.float32)
+  faded_in = 0
+
+  async def emit(chunk: np.ndarray) -> None:
+    if chunk.size == 0:
+      return
+    timeline.append(chunk)
+    if write_block is not None:
+      await write_block(chunk)
+
+  async for block in blocks:
+    shaped = np.array(block, dtype=np.float32, copy=True)
+    if faded_in < fade_in_samples and fade_in_samples > 1:
+      count = min(fade_in_samples - faded_in, shaped.shape[0])
+      envelope = np.linspace(0.0, 1.0, fade_in_samples, dtype=np.float32)[faded_in:faded_in + count]
+      shaped[:count] *= envelope
+      faded_in += count
+
+    pending = np.concatenate([tail, shaped]) if tail.size else shaped
+    if pending.shape[0] > fade_out_samples:
+      cut = pending.shape[0] - fade_out_samples
+      await emit(pending[:cut])
+      tail = pending[cut:]
+    else:
+      tail = pending
+
+  if tail.size > 1 and fade_out_samples > 1:
+    tail = tail * np.linspace(1.0, 0.0, tail.shape[0], dtype=np.float32)
+  await emit(tail)
+  timeline.closed = True
+
 
 def _estimate_mouth_open(samples: np.ndarray, sample_rate: int, elapsed_s: float) -> float:
   center = int(max(0.0, elapsed_s) * sample_rate)
@@ -154,35 +627,55 @@ async def _emit_mouth(callback: MouthCallback, value: float) -> None:
     await result
 
 
-def _to_int16_pcm_bytes(audio: np.ndarray) -> bytes:
-  clipped = np.clip(audio, -1.0, 1.0)
-  int16_audio = (clipped * 32767.0).astype(np.int16)
-  return int16_audio.tobytes()
-
-
-def _apply_fade(audio: np.ndarray, sample_rate: int) -> np.ndarray:
-  if audio.size == 0:
-    return audio
-
-  shaped = np.array(audio, dtype=np.float32, copy=True)
-
-  fade_in_samples = max(0, int((sample_rate * FADE_IN_MS) / 1000))
-  fade_out_samples = max(0, int((sample_rate * FADE_OUT_MS) / 1000))
-
-  if fade_in_samples > 1:
-    fade_in_samples = min(fade_in_samples, shaped.shape[0])
-    envelope = np.linspace(0.0, 1.0, fade_in_samples, dtype=np.float32)
-    shaped[:fade_in_samples] *= envelope
-
-  if fade_out_samples > 1:
-    fade_out_samples = min(fade_out_samples, shaped.shape[0])
-    envelope = np.linspace(1.0, 0.0, fade_out_samples, dtype=np.float32)
-    shaped[-fade_out_samples:] *= envelope
-
-  return shaped
-
-
-def _feed_aplay_pcm(proc: subprocess.Popen, pcm_bytes: bytes) -> None:
+def _fade_length(sample_rate: int, fade_ms: int, count: int) -> int:
+  samples = max(0, int((sample_rate * fade_ms) / 1000))
+  return min(samples, count) if samples > 1 else 0
+
+
+def _convert_int16_into(audio: np.ndarray, out: np.ndarray, *, fade_in: int, fade_out: int) -> None:
+  count = audio.shape[0]
+  ramp_in = np.linspace(0.0, 1.0, fade_in, dtype=np.float32) if fade_in else None
+  ramp_out = np.linspace(1.0, 0.0, fade_out, dtype=np.float32) if fade_out else None
+  fade_out_start = count - fade_out
+  scratch = np.empty(min(ENCODE_BLOCK_SAMPLES, count), dtype=np.float32)
+  for start in range(0, count, ENCODE_BLOCK_SAMPLES):
+    end = min(count, start + ENCODE_BLOCK_SAMPLES)
+    block = scratch[:end - start]
+    np.multiply(audio[start:end], 32767.0, out=block)
+    if ramp_in is not None and start < fade_in:
+      stop = min(fade_in, end)
+      block[:stop - start] *= ramp_in[start:stop]
+    if ramp_out is not None and end > fade_out_start:
+      begin = max(start, fade_out_start)
+      block[begin - start:] *= ramp_out[begin - fade_out_start:end - fade_out_start]
+    np.clip(block, -32767.0, 32767.0, out=block)
+    # Truncating cast, matching astype(np.int16) on the clipped values.
+    np.copyto(out[start:end], block, casting='unsafe')
+
+
+def _write_wav_header(data: bytearray, sample_count: int, sample_rate: int) -> None:
+  data_bytes = 2 * sample_count
+  struct.pack_into(
+    '<4sI4s4sIHHIIHH4sI',
+    data,
+    0,
+    b'RIFF',
+    36 + data_bytes,
+    b'WAVE',
+    b'fmt ',
+    16,
+    1,
+    1,
+    sample_rate,
+    sample_rate * 2,
+    2,
+    16,
+    b'data',
+    data_bytes,
+  )
+
+
+def _feed_aplay_pcm(proc: subprocess.Popen, pcm_bytes: bytes | memoryview) -> None:
   if proc.stdin is None:
     return
 
@@ -198,16 +691,4 @@ def _feed_aplay_pcm(proc: subprocess.Popen, pcm_bytes: bytes) -> None:
 
 
 def encode_wav_base64(samples: np.ndarray, sample_rate: int) -> str:
-  audio = np.asarray(samples, dtype=np.float32)
-  pcm_bytes = _to_int16_pcm_bytes(audio)
-
-  with io.BytesIO() as output:
-    with wave.open(output, 'wb') as wav_file:
-      wav_file.setnchannels(1)
-      wav_file.setsampwidth(2)
-      wav_file.setframerate(int(sample_rate))
-      wav_file.writeframes(pcm_bytes)
-
-    wav_bytes = output.getvalue()
-
-  return base64.b64encode(wav_bytes).decode('ascii')
+  return encode_pcm(samples, sample_rate, fade=False).wav_base64().decode('ascii')
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+PREFETCH_DEFAULT_BUDGET_MB = 32
+PREFETCH_DEFAULT_TTL_MS = 30_000
+
+
+def resolve_prefetch_budget(raw: Optional[str]) -> int:
+  if raw is None or raw.strip() == '':
+    return PREFETCH_DEFAULT_BUDGET_MB * 1024 * 1024
+  try:
+    megabytes = float(raw)
+  except ValueError as error:
+    raise ValueError(f'unsupported MH_TTS_PREFETCH_BUDGET_MB: {raw} (expected a number of megabytes)') from error
+  if megabytes < 0:
+    raise ValueError(f'unsupported MH_TTS_PREFETCH_BUDGET_MB: {raw} (expected a non-negative value)')
+  return int(megabytes * 1024 * 1024)
+
+
+@dataclass
+class PrefetchEntry:
+  session_id: str
+  utterance_id: str
+  text: str
+  speaker: Optional[str]
+  expires_at: int
+  request: Any
+  task: Optional[asyncio.Task[Any]] = None
+  nbytes: int = 0
+
+  @property
+  def key(self) -> tuple[str, str]:
+    return (self.session_id, self.utterance_id)
+
+
+class PrefetchCache:
+  """Pre-synthesized audio waiting for its `speak`, keyed by (session_id, utterance_id).
+
+  Entries are rendered oldest first. Finished audio counts against a byte budget and the oldest finished
+  entries are evicted past it; every entry is also dropped once its TTL passes.
+  """
+
+  def __init__(self, budget_bytes: int) -> None:
+    self.budget_bytes = max(0, int(budget_bytes))
+    self._entries: OrderedDict[tuple[str, str], PrefetchEntry] = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+    self.mismatched = 0
+    self.evicted = 0
+    self.expired = 0
+    self.rendered = 0
+
+  def add(self, entry: PrefetchEntry) -> Optional[PrefetchEntry]:
+    previous = self._entries.pop(entry.key, None)
+    self._entries[entry.key] = entry
+    return previous
+
+  def take(self, session_id: str, utterance_id: str, *, text: str, speaker: Optional[str]) -> Optional[PrefetchEntry]:
+    entry = self._entries.pop((session_id, utterance_id), None)
+    if entry is None:
+      return None
+    if entry.text != text or entry.speaker != speaker:
+      self.mismatched += 1
+      _cancel(entry)
+      return None
+    if entry.task is None:
+      # Not started yet: the speak renders live, and dropping the entry keeps the prefetch loop off it.
+      self.misses += 1
+      return None
+    self.hits += 1
+    return entry
+
+  def next_pending(self) -> Optional[PrefetchEntry]:
+    for entry in self._entries.values():
+      if entry.task is None:
+        return entry
+    return None
+
+  def settle(self, entry: PrefetchEntry, nbytes: int) -> list[PrefetchEntry]:
+    if self._entries.get(entry.key) is not entry:
+      return []
+    entry.nbytes = max(0, int(nbytes))
+    self.rendered += 1
+    evicted: list[PrefetchEntry] = []
+    while self.total_bytes > self.budget_bytes:
+      oldest = next((candidate for candidate in self._entries.values() if candidate.nbytes > 0), None)
+      if oldest is None:
+        break
+      del self._entries[oldest.key]
+      _cancel(oldest)
+      evicted.append(oldest)
+    self.evicted += len(evicted)
+    return evicted
+
+  def purge_expired(self, now_ms: int) -> list[PrefetchEntry]:
+    stale = [entry for entry in self._entries.values() if now_ms > entry.expires_at]
+    for entry in stale:
+      del self._entries[entry.key]
+      _cancel(entry)
+    self.expired += len(stale)
+    return stale
+
+  def discard(self, entry: PrefetchEntry) -> None:
+    if self._entries.get(entry.key) is entry:
+      del self._entries[entry.key]
+    _cancel(entry)
+
+  def clear(self) -> None:
+    for entry in self._entries.values():
+      _cancel(entry)
+    self._entries.clear()
+
+  @property
+  def total_bytes(self) -> int:
+    return sum(entry.nbytes for entry in self._entries.values())
+
+  def stats(self) -> dict[str, int]:
+    return {
+      'entries': len(self._entries),
+      'pending': sum(1 for entry in self._entries.values() if entry.task is None),
+      'bytes': self.total_bytes,
+      'budget_bytes': self.budget_bytes,
+      'hits': self.hits,
+      'misses': self.misses,
+      'mismatched': self.mismatched,
+      'evicted': self.evicted,
+      'expired': self.expired,
+      'rendered': self.rendered,
+    }
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+
+def _cancel(entry: PrefetchEntry) -> None:
+  task = entry.task
+  if task is None:
+    return
+  if not task.done():
+    task.cancel()
+  elif not task.cancelled():
+    task.exception()
@@ -4,7 +4,7 @@ import json
 import sys
 import threading
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Mapping, Optional
 
 
 @dataclass(frozen=True)
@@ -12,19 +12,52 @@ class ParsedCommand:
   raw: Dict[str, Any]
   op: str
   request_id: Optional[str]
+  # time.monotonic() when the line was read; 0.0 for commands the worker made up itself.
+  received_at: float = 0.0
 
 
 class ProtocolWriter:
-  def __init__(self) -> None:
+  def __init__(self, output: Optional[Callable[[bytes], None]] = None) -> None:
     self._lock = threading.Lock()
+    # Lines go to stdout unless an output is handed in; service mode writes each client's lines to its socket.
+    self._output = output
 
   def send(self, payload: Dict[str, Any]) -> None:
+    encoded = payload.get('audio_base64')
+    if isinstance(encoded, (bytes, bytearray, memoryview)):
+      self._send_with_base64(payload, encoded)
+      return
     line = json.dumps(payload, ensure_ascii=False)
     with self._lock:
+      if self._output is not None:
+        self._output(line.encode('utf-8') + b'\n')
+        return
       sys.stdout.write(line)
       sys.stdout.write('\n')
       sys.stdout.flush()
 
+  def _send_with_base64(self, payload: Dict[str, Any], encoded: bytes | bytearray | memoryview) -> None:
+    # Base64 needs no JSON escaping, so the clip is written as-is after the other fields instead of being
+    # decoded to str and copied again by json.dumps.
+    head = json.dumps({key: value for key, value in payload.items() if key != 'audio_base64'}, ensure_ascii=False)
+    binary = getattr(sys.stdout, 'buffer', None)
+    with self._lock:
+      if self._output is not None:
+        # The output may queue the bytes past this call, so it gets a copy rather than a view of a reused buffer.
+        self._output(f'{head[:-1]}, "audio_base64": "'.encode('utf-8'))
+        self._output(bytes(encoded))
+        self._output(b'"}\n')
+        return
+      if binary is None:
+        sys.stdout.write(f'{head[:-1]}, "audio_base64": "{bytes(encoded).decode("ascii")}"}}\n')
+        sys.stdout.flush()
+        return
+      sys.stdout.write(f'{head[:-1]}, "audio_base64": "')
+      sys.stdout.flush()
+      binary.write(encoded)
+      binary.write(b'"}\n')
+      binary.flush()
+
   def ready(
     self,
     *,
@@ -34,8 +67,9 @@ class ProtocolWriter:
     voices_path: str,
     playback_backend: Optional[str] = None,
     audio_target: Optional[str] = None,
+    engine_state: Optional[Dict[str, Any]] = None,
   ) -> None:
-    payload = {
+    payload: Dict[str, Any] = {
       'type': 'ready',
       'voice': voice,
       'engine': engine,
@@ -46,6 +80,8 @@ class ProtocolWriter:
       payload['playback_backend'] = playback_backend
     if audio_target is not None:
       payload['audio_target'] = audio_target
+    if engine_state is not None:
+      payload['engine_state'] = engine_state
     self.send(payload)
 
   def response(self, *, request_id: Optional[str], ok: bool, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
@@ -101,7 +137,7 @@ class ProtocolWriter:
     session_id: Optional[str],
     utterance_id: Optional[str],
     mime_type: str,
-    audio_base64: str,
+    audio_base64: str | bytes,
     sample_rate: int,
     message_id: Optional[str] = None,
     revision: Optional[int] = None,
@@ -131,7 +167,124 @@ class ProtocolWriter:
     self.send(payload)
 
 
-def parse_command(line: str) -> ParsedCommand:
+FieldCheck = Callable[[Any], Any]
+
+
+def _required_int(label: str) -> FieldCheck:
+  message = f'{label} must be integer'
+
+  def check(value: Any) -> Any:
+    if not isinstance(value, int):
+      raise ValueError(message)
+    return value
+
+  return check
+
+
+def _required_text(label: str) -> FieldCheck:
+  message = f'{label} must be non-empty string'
+
+  def check(value: Any) -> Any:
+    if not isinstance(value, str) or value.strip() == '':
+      raise ValueError(message)
+    return value
+
+  return check
+
+
+def _optional_text(_label: str) -> FieldCheck:
+  return lambda value: value.strip() if isinstance(value, str) and value.strip() != '' else None
+
+
+def _optional_int(_label: str) -> FieldCheck:
+  return lambda value: value if isinstance(value, int) else None
+
+
+def _optional_number(_label: str) -> FieldCheck:
+  return lambda value: value if isinstance(value, int) else int(value) if isinstance(value, float) else None
+
+
+def _passthrough(_label: str) -> FieldCheck:
+  return lambda value: value
+
+
+FIELD_KINDS: dict[str, Callable[[str], FieldCheck]] = {
+  'int': _required_int,
+  'text': _required_text,
+  'text?': _optional_text,
+  'int?': _optional_int,
+  'number?': _optional_number,
+  'any': _passthrough,
+}
+
+
+def compile_schema(name: str, fields: Mapping[str, str]) -> Callable[[Mapping[str, Any]], Dict[str, Any]]:
+  """Build a validator for one command shape.
+
+  Each field maps to a kind from FIELD_KINDS. Checks are bound once here, so validating a command is a
+  single pass over prebuilt closures. Fields are checked in declaration order and the first failure raises
+  ValueError naming `<name>.<field>`.
+  """
+  checks = tuple((field, FIELD_KINDS[kind](f'{name}.{field}')) for field, kind in fields.items())
+
+  def validate(raw: Mapping[str, Any]) -> Dict[str, Any]:
+    get = raw.get
+    return {field: check(get(field)) for field, check in checks}
+
+  return validate
+
+
+SPEAK_SCHEMA = compile_schema(
+  'speak',
+  {
+    'generation': 'int',
+    'session_id': 'text',
+    'utterance_id': 'text',
+    'text': 'text',
+    'speaker': 'text?',
+    'expires_at': 'int?',
+    'ttl_ms': 'int?',
+    'ts': 'int?',
+    'message_id': 'text?',
+    'revision': 'number?',
+    'priority': 'any',
+    'policy': 'any',
+  },
+)
+
+
+class IngestLatency:
+  """Time from reading a command line to dispatching it, for `stats`."""
+
+  def __init__(self, reader: str) -> None:
+    self.reader = reader
+    self._lock = threading.Lock()
+    self.commands = 0
+    self.total_s = 0.0
+    self.max_s = 0.0
+    self.last_s = 0.0
+
+  def observe(self, seconds: float) -> None:
+    seconds = max(0.0, seconds)
+    with self._lock:
+      self.commands += 1
+      self.total_s += seconds
+      self.last_s = seconds
+      self.max_s = max(self.max_s, seconds)
+
+  def stats(self) -> Dict[str, Any]:
+    with self._lock:
+      return {
+        'reader': self.reader,
+        'commands': self.commands,
+        'avg_ms': round(self.total_s * 1000 / self.commands, 3) if self.commands else None,
+        'max_ms': round(self.max_s * 1000, 3),
+        'last_ms': round(self.last_s * 1000, 3),
+      }
+
+
+def parse_command(line: str | bytes, *, received_at: float = 0.0) -> ParsedCommand:
+  # json.loads takes the raw bytes from the stream directly, so lines are never decoded twice.
   raw = json.loads(line)
   if not isinstance(raw, dict):
     raise ValueError('command must be a JSON object')
@@ -144,4 +297,4 @@ def parse_command(line: str) -> ParsedCommand:
   if request_id is not None and not isinstance(request_id, str):
     raise ValueError('command id must be a string when provided')
 
-  return ParsedCommand(raw=raw, op=op.strip(), request_id=request_id)
+  return ParsedCommand(raw=raw, op=op.strip(), request_id=request_id, received_at=received_at)
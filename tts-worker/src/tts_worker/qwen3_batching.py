@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+
+
+BatchGenerate = Callable[[list[str], list[str], list[str]], Tuple[list[np.ndarray], int]]
+RenderedSegment = Tuple[np.ndarray, int]
+
+
+@dataclass
+class _BatchItem:
+  text: str
+  speaker: str
+  instruct: str
+  enqueued_at: float
+  future: Future = field(default_factory=Future)
+
+
+class Qwen3BatchScheduler:
+  """Merge synthesis requests from concurrent callers into shared `generate_custom_voice` batches.
+
+  A lone request is dispatched as soon as the model is idle; requests that arrive while a batch is rendering
+  queue up and ride together in the next one, so batching adds no latency when traffic is light. Items may
+  carry different speakers and instructions because the Qwen3 batch API takes one of each per text.
+  """
+
+  def __init__(self, generate_batch: BatchGenerate, *, max_batch: int, window_s: float = 0.0) -> None:
+    if max_batch < 1:
+      raise ValueError(f'max_batch must be at least 1: {max_batch}')
+    self._generate_batch = generate_batch
+    self.max_batch = int(max_batch)
+    self.window_s = max(0.0, float(window_s))
+    self._pending: deque[_BatchItem] = deque()
+    self._cond = threading.Condition()
+    self._thread: Optional[threading.Thread] = None
+    self._closed = False
+
+    self._batches = 0
+    self._items = 0
+    self._failed_batches = 0
+    self._busy_seconds = 0.0
+    self._audio_seconds = 0.0
+    self._queue_wait_seconds = 0.0
+    self._largest_batch = 0
+
+  def submit(self, texts: list[str], *, speaker: str, instruct: str) -> list[Future]:
+    # One caller's texts are queued together so its own sentences are never split by the dispatcher waking early.
+    now = time.monotonic()
+    items = [_BatchItem(text=text, speaker=speaker, instruct=instruct, enqueued_at=now) for text in texts]
+    with self._cond:
+      if self._closed:
+        raise RuntimeError('qwen3 batch scheduler is closed')
+      self._pending.extend(items)
+      self._ensure_thread()
+      self._cond.notify()
+    return [item.future for item in items]
+
+  def synthesize(self, texts: list[str], *, speaker: str, instruct: str) -> list[RenderedSegment]:
+    return [future.result() for future in self.submit(texts, speaker=speaker, instruct=instruct)]
+
+  def close(self) -> None:
+    with self._cond:
+      self._closed = True
+      pending = list(self._pending)
+      self._pending.clear()
+      self._cond.notify_all()
+    for item in pending:
+      item.future.set_exception(RuntimeError('qwen3 batch scheduler is closed'))
+
+  def stats(self) -> dict[str, Any]:
+    with self._cond:
+      mean_batch = self._items / self._batches if self._batches else 0.0
+      return {
+        'max_batch': self.max_batch,
+        'batches': self._batches,
+        'requests': self._items,
+        'failed_batches': self._failed_batches,
+        'queued': len(self._pending),
+        'largest_batch': self._largest_batch,
+        'mean_batch_size': round(mean_batch, 3),
+        'occupancy': round(mean_batch / self.max_batch, 3) if self._batches else 0.0,
+        'audio_seconds_per_second': round(self._audio_seconds / self._busy_seconds, 3) if self._busy_seconds else 0.0,
+        'mean_queue_wait_ms': round(self._queue_wait_seconds * 1000.0 / self._items, 1) if self._items else 0.0,
+      }
+
+  def _ensure_thread(self) -> None:
+    if self._thread is not None and self._thread.is_alive():
+      return
+    self._thread = threading.Thread(target=self._run, name='qwen3-batcher', daemon=True)
+    self._thread.start()
+
+  def _run(self) -> None:
+    while True:
+      batch = self._take_batch()
+      if batch is None:
+        return
+      self._dispatch(batch)
+
+  def _take_batch(self) -> Optional[list[_BatchItem]]:
+    with self._cond:
+      while not self._pending and not self._closed:
+        self._cond.wait()
+      if self._closed:
+        return None
+
+      if self.window_s > 0.0:
+        deadline = self._pending[0].enqueued_at + self.window_s
+        while len(self._pending) < self.max_batch and not self._closed:
+          remaining = deadline - time.monotonic()
+          if remaining <= 0.0:
+            break
+          self._cond.wait(remaining)
+
+      batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+      return batch or None
+
+  def _dispatch(self, batch: list[_BatchItem]) -> None:
+    started = time.monotonic()
+    try:
+      wavs, sample_rate = self._generate_batch(
+        [item.text for item in batch],
+        [item.speaker for item in batch],
+        [item.instruct for item in batch],
+      )
+      if len(wavs) != len(batch):
+        raise RuntimeError(f'qwen3 batch returned {len(wavs)} outputs for {len(batch)} texts')
+    except BaseException as error:
+      with self._cond:
+        self._failed_batches += 1
+      for item in batch:
+        item.future.set_exception(error)
+      return
+
+    finished = time.monotonic()
+    audio_seconds = sum(wav.shape[0] for wav in wavs) / float(sample_rate) if sample_rate else 0.0
+    with self._cond:
+      self._batches += 1
+      self._items += len(batch)
+      self._largest_batch = max(self._largest_batch, len(batch))
+      self._busy_seconds += finished - started
+      self._audio_seconds += audio_seconds
+      self._queue_wait_seconds += sum(started - item.enqueued_at for item in batch)
+    for item, wav in zip(batch, wavs):
+      item.future.set_result((wav, int(sample_rate)))
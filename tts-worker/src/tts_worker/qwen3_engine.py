@@ -4,13 +4,32 @@ import contextlib
 import io
 import os
 import sys
-from dataclasses import dataclass
-from typing import Any, Optional, Tuple
+import threading
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Tuple
 
 import numpy as np
 
+from .chunking import split_sentences
 from .engine import EngineMetadata
+from .qwen3_batching import Qwen3BatchScheduler
 from .qwen3_text import build_qwen3_instruction, normalize_ascii_mode, normalize_language, normalize_style, prepare_qwen3_text
+from .revision_cache import RevisionChunkCache, RevisionKey
+from .time_stretch import StreamingTimeStretcher, time_stretch
+
+
+QWEN3_WARMUP_TEXT = {
+  'Japanese': 'はい、準備ができました。',
+  'English': 'Ready.',
+}
+QWEN3_BUSY_STATES = {'loading', 'warming'}
+QWEN3_PEAK_CEILING = 0.98
+QWEN3_PROFILES = {'auto', 'gpu', 'cpu'}
+QWEN3_HALF_DTYPES = {'bfloat16', 'float16'}
+QWEN3_RTF_SMOOTHING = 0.3
+QWEN3_SENTENCE_MODES = {'pipeline', 'batch', 'off'}
 
 
 @dataclass(frozen=True)
@@ -24,6 +43,16 @@ class Qwen3Config:
   dtype_name: str
   gain: float
   speed: float
+  preload: bool = True
+  stream: bool = True
+  profile: str = 'gpu'
+  cpu_threads: int = 0
+  quantize: bool = True
+  compile: bool = False
+  compile_cache_dir: str = ''
+  sentence_mode: str = 'pipeline'
+  batch_max: int = 1
+  batch_window_ms: int = 0
 
 
 def load_qwen3_config() -> Qwen3Config:
@@ -32,10 +61,24 @@ def load_qwen3_config() -> Qwen3Config:
   language = normalize_language(_env_or_default('MH_QWEN_TTS_LANGUAGE', 'English'))
   ascii_mode = normalize_ascii_mode(os.getenv('MH_QWEN_JA_ASCII_MODE'))
   style = normalize_style(os.getenv('MH_QWEN_TTS_STYLE'))
-  device_map = _env_or_default('MH_QWEN_TTS_DEVICE_MAP', 'auto')
-  dtype_name = _env_or_default('MH_QWEN_TTS_DTYPE', 'bfloat16')
+  profile = _parse_profile(_env_or_default('MH_QWEN_TTS_PROFILE', 'auto'))
+  cpu_defaults = profile == 'cpu'
+  device_map = _env_or_default('MH_QWEN_TTS_DEVICE_MAP', 'cpu' if cpu_defaults else 'auto')
+  dtype_name = _env_or_default('MH_QWEN_TTS_DTYPE', 'float32' if cpu_defaults else 'bfloat16')
   gain = _parse_gain(_env_or_default('MH_QWEN_TTS_GAIN', '1.50'))
   speed = _parse_speed(_env_or_default('MH_QWEN_TTS_SPEED', '1.0'))
+  preload = _parse_flag('MH_QWEN_TTS_PRELOAD', _env_or_default('MH_QWEN_TTS_PRELOAD', '1'))
+  stream = _parse_flag('MH_QWEN_TTS_STREAM', _env_or_default('MH_QWEN_TTS_STREAM', '1'))
+  cpu_threads = _parse_cpu_threads(_env_or_default('MH_QWEN_TTS_CPU_THREADS', '0'))
+  quantize = _parse_flag('MH_QWEN_TTS_QUANTIZE', _env_or_default('MH_QWEN_TTS_QUANTIZE', '1'))
+  sentence_mode = _parse_sentence_mode(_env_or_default('MH_QWEN_TTS_SENTENCE_MODE', 'pipeline'))
+  batch_max = _parse_batch_max(_env_or_default('MH_QWEN_TTS_BATCH_MAX', '4'))
+  batch_window_ms = _parse_batch_window(_env_or_default('MH_QWEN_TTS_BATCH_WINDOW_MS', '0'))
+  compile_model = _parse_flag('MH_QWEN_TTS_COMPILE', _env_or_default('MH_QWEN_TTS_COMPILE', '0'))
+  compile_cache_dir = _env_or_default(
+    'MH_QWEN_TTS_COMPILE_CACHE',
+    str(Path.home() / '.cache' / 'minimum-headroom' / 'qwen3-inductor'),
+  )
   return Qwen3Config(
     model_id=model_id,
     speaker=speaker,
@@ -46,6 +89,30 @@ def load_qwen3_config() -> Qwen3Config:
     dtype_name=dtype_name,
     gain=gain,
     speed=speed,
+    preload=preload,
+    stream=stream,
+    profile=profile,
+    cpu_threads=cpu_threads,
+    quantize=quantize,
+    compile=compile_model,
+    compile_cache_dir=compile_cache_dir,
+    sentence_mode=sentence_mode,
+    batch_max=batch_max,
+    batch_window_ms=batch_window_ms,
+  )
+
+
+def resolve_qwen3_profile(config: Qwen3Config, *, cuda_available: bool) -> Qwen3Config:
+  if config.profile != 'auto':
+    return config
+  if cuda_available:
+    return replace(config, profile='gpu')
+  # Half precision and device_map=auto assume an accelerator; fall back to the CPU defaults on GPU-less hosts.
+  return replace(
+    config,
+    profile='cpu',
+    device_map='cpu' if config.device_map == 'auto' else config.device_map,
+    dtype_name='float32' if config.dtype_name in QWEN3_HALF_DTYPES else config.dtype_name,
   )
 
 
@@ -55,8 +122,27 @@ class Qwen3TtsEngine:
     self._model = None
     self._model_cls = None
     self._torch = None
-    self._librosa = None
+    self._model_lock = threading.Lock()
+    self._generate_lock = threading.Lock()
+    self._state_lock = threading.Lock()
+    self._preload_thread: Optional[threading.Thread] = None
+    self._state = 'cold'
+    self._load_seconds: Optional[float] = None
+    self._warmup_seconds: Optional[float] = None
+    self._state_error: Optional[str] = None
+    self._rtf: Optional[float] = None
+    self._warmup_rtf: Optional[float] = None
+    self._optimizations: list[str] = []
+    self.revision_cache = RevisionChunkCache()
+    self._batcher: Optional[Qwen3BatchScheduler] = None
+    if self.config.batch_max > 1:
+      self._batcher = Qwen3BatchScheduler(
+        self._generate_items,
+        max_batch=self.config.batch_max,
+        window_s=self.config.batch_window_ms / 1000.0,
+      )
     self._verify_runtime_imports()
+    self.config = resolve_qwen3_profile(self.config, cuda_available=self._cuda_available())
 
   @property
   def metadata(self) -> EngineMetadata:
@@ -67,32 +153,239 @@ class Qwen3TtsEngine:
       voices_path=(
         f'speaker:{self.config.speaker};language:{self.config.language};'
         f'style:{self.config.style};ascii:{self.config.ascii_mode};'
-        f'gain:{self.config.gain:g};speed:{self.config.speed:g}'
+        f'gain:{self.config.gain:g};speed:{self.config.speed:g};profile:{self.config.profile}'
       ),
     )
 
   def prepare_text(self, text: str) -> str:
     return prepare_qwen3_text(text, ascii_mode=self.config.ascii_mode, language=self.config.language)
 
-  def synthesize_text(self, text: str, *, voice_override: str | None = None) -> Tuple[np.ndarray, int]:
-    model = self._ensure_model()
-    instruction = build_qwen3_instruction(self.config.style, language=self.config.language)
+  def synthesize_text(
+    self,
+    text: str,
+    *,
+    voice_override: str | None = None,
+    revision: Optional[RevisionKey] = None,
+  ) -> Tuple[np.ndarray, int]:
     speaker = voice_override.strip() if isinstance(voice_override, str) and voice_override.strip() != '' else self.config.speaker
-    wavs, sample_rate = model.generate_custom_voice(
-      text=text,
-      language=self.config.language,
-      speaker=speaker,
-      instruct=instruction,
-    )
-    audio = _normalize_qwen_audio(wavs)
-    audio = self._apply_qwen_speed(audio)
+    started = time.monotonic()
+    segments = self.split_segments(text)
+    if revision is not None:
+      # Raw segments are cached before speed and gain, so edits anywhere in the message re-render only their sentence.
+      rendered = self.revision_cache.render(
+        revision,
+        self._revision_voice(speaker),
+        segments,
+        lambda missing: self._render_segments([segments[index] for index in missing], speaker=speaker),
+      )
+    else:
+      rendered = list(self._iter_generated_segments(segments, speaker=speaker, first_alone=False))
+    pieces = [piece for piece, _ in rendered]
+    sample_rate = rendered[-1][1]
+    audio = np.concatenate(pieces) if len(pieces) > 1 else pieces[0]
+    audio = self._apply_qwen_speed(audio, sample_rate)
     audio = _apply_qwen_gain(audio, gain=self.config.gain)
+    self._record_rtf(time.monotonic() - started, audio.shape[0], sample_rate)
     return audio, int(sample_rate)
 
+  def stream_text(
+    self,
+    text: str,
+    *,
+    voice_override: str | None = None,
+    revision: Optional[RevisionKey] = None,
+  ) -> Iterator[Tuple[np.ndarray, int]]:
+    speaker = voice_override.strip() if isinstance(voice_override, str) and voice_override.strip() != '' else self.config.speaker
+    if not self.config.stream:
+      yield self.synthesize_text(text, voice_override=speaker, revision=revision)
+      return
+
+    segments = self.split_segments(text)
+    # qwen_tts only returns finished waveforms, so a finished sentence is the smallest unit that can stream.
+    if revision is not None:
+      # Cached sentences replay immediately.
+      raw_blocks = self._iter_revision_segments(segments, speaker=speaker, revision=revision)
+    else:
+      raw_blocks = self._iter_generated_segments(segments, speaker=speaker, first_alone=True)
+
+    limiter = _StreamingGainLimiter(self.config.gain)
+    stretcher: Optional[StreamingTimeStretcher] = None
+    sample_rate = 0
+    sample_count = 0
+    started = time.monotonic()
+    for block, sample_rate in raw_blocks:
+      if block.size == 0:
+        continue
+      if self._speed_enabled():
+        if stretcher is None:
+          stretcher = StreamingTimeStretcher(self.config.speed, sample_rate)
+        block = stretcher.process(block)
+        if block.size == 0:
+          continue
+      sample_count += block.shape[0]
+      yield limiter.process(block), sample_rate
+
+    if stretcher is not None:
+      tail = stretcher.flush()
+      if tail.size:
+        sample_count += tail.shape[0]
+        yield limiter.process(tail), sample_rate
+    self._record_rtf(time.monotonic() - started, sample_count, sample_rate)
+
+  def split_segments(self, text: str) -> list[str]:
+    if self.config.sentence_mode == 'off':
+      return [text]
+    return split_sentences(text) or [text]
+
+  def _iter_generated_segments(self, segments: list[str], *, speaker: str, first_alone: bool) -> Iterator[Tuple[np.ndarray, int]]:
+    if self.config.sentence_mode != 'batch' or len(segments) < 2:
+      groups = [[segment] for segment in segments]
+    elif first_alone:
+      # Render the opening sentence on its own so playback can start before the batch finishes.
+      groups = [segments[:1], segments[1:]]
+    else:
+      groups = [segments]
+    for group in groups:
+      yield from self._render_segments(group, speaker=speaker)
+
+  def _iter_revision_segments(self, segments: list[str], *, speaker: str, revision: RevisionKey) -> Iterator[Tuple[np.ndarray, int]]:
+    voice = self._revision_voice(speaker)
+    reusable = self.revision_cache.reusable(revision, voice)
+    rendered: list[Tuple[str, np.ndarray, int]] = []
+    for segment in segments:
+      cached = reusable.get(segment)
+      piece, sample_rate = cached if cached is not None else self._render_segments([segment], speaker=speaker)[0]
+      rendered.append((segment, piece, sample_rate))
+      yield piece, sample_rate
+    reused = sum(1 for segment in segments if segment in reusable)
+    self.revision_cache.commit(revision, voice, rendered, reused=reused)
+
+  def _revision_voice(self, speaker: str) -> str:
+    return f'{speaker}|{self.config.style}|{self.config.language}'
+
+  def _render_segments(self, segments: list[str], *, speaker: str) -> list[Tuple[np.ndarray, int]]:
+    if self._batcher is not None:
+      instruction = build_qwen3_instruction(self.config.style, language=self.config.language)
+      return self._batcher.synthesize(segments, speaker=speaker, instruct=instruction)
+    wavs, sample_rate = self._generate_items(segments, [speaker] * len(segments), None)
+    return [(wav, sample_rate) for wav in wavs]
+
+  def batching_stats(self) -> Optional[dict[str, Any]]:
+    if self._batcher is None:
+      return None
+    return self._batcher.stats()
+
+  def start_preload(self, on_done: Optional[Callable[[], None]] = None) -> bool:
+    if not self.config.preload:
+      return False
+    with self._state_lock:
+      if self._preload_thread is not None or self._model is not None:
+        return False
+      self._state = 'loading'
+      self._preload_thread = threading.Thread(target=self._run_preload, args=(on_done,), name='qwen3-preload', daemon=True)
+      self._preload_thread.start()
+    return True
+
+  def engine_status(self) -> dict[str, Any]:
+    with self._state_lock:
+      status: dict[str, Any] = {
+        'state': self._state,
+        'load_seconds': _round_seconds(self._load_seconds),
+        'warmup_seconds': _round_seconds(self._warmup_seconds),
+        'profile': self.config.profile,
+        'optimizations': list(self._optimizations),
+        'rtf': _round_seconds(self._rtf),
+        'warmup_rtf': _round_seconds(self._warmup_rtf),
+      }
+      batching = self.batching_stats()
+      if batching is not None:
+        status['batching'] = batching
+      if self._state_error is not None:
+        status['error'] = self._state_error
+    return status
+
+  def is_busy_loading(self) -> bool:
+    with self._state_lock:
+      return self._state in QWEN3_BUSY_STATES
+
+  def _run_preload(self, on_done: Optional[Callable[[], None]]) -> None:
+    try:
+      self._ensure_model()
+      self._set_state('warming')
+      warmup_started = time.monotonic()
+      warmup_text = self.prepare_text(QWEN3_WARMUP_TEXT.get(self.config.language, QWEN3_WARMUP_TEXT['English']))
+      wavs, sample_rate = self._generate(warmup_text, speaker=self.config.speaker)
+      warmup_seconds = time.monotonic() - warmup_started
+      warmup_samples = _normalize_qwen_audio(wavs).shape[0]
+      with self._state_lock:
+        self._warmup_seconds = warmup_seconds
+        if warmup_samples > 0 and sample_rate > 0:
+          self._warmup_rtf = warmup_seconds / (warmup_samples / sample_rate)
+        self._state = 'warm'
+    except Exception as error:
+      with self._state_lock:
+        self._state = 'failed'
+        self._state_error = str(error)
+      print(f'[qwen3] preload failed: {error}', file=sys.stderr)
+    if on_done is not None:
+      on_done()
+
+  def _record_rtf(self, elapsed_s: float, sample_count: int, sample_rate: int) -> None:
+    if sample_count <= 0 or sample_rate <= 0:
+      return
+    rtf = elapsed_s / (sample_count / sample_rate)
+    with self._state_lock:
+      if self._rtf is None:
+        self._rtf = rtf
+      else:
+        self._rtf += QWEN3_RTF_SMOOTHING * (rtf - self._rtf)
+
+  def _set_state(self, state: str) -> None:
+    with self._state_lock:
+      self._state = state
+
+  def _generate(self, text: str, *, speaker: str) -> Tuple[Any, int]:
+    model = self._ensure_model()
+    instruction = build_qwen3_instruction(self.config.style, language=self.config.language)
+    # Warm-up and request synthesis share one model; generation is not safe to run concurrently.
+    with self._generate_lock, self._inference_context():
+      wavs, sample_rate = model.generate_custom_voice(
+        text=text,
+        language=self.config.language,
+        speaker=speaker,
+        instruct=instruction,
+      )
+    return wavs, int(sample_rate)
+
+  def _generate_items(self, texts: list[str], speakers: list[str], instructs: Optional[list[str]]) -> Tuple[list[np.ndarray], int]:
+    if len(texts) == 1 and (instructs is None or instructs[0] == build_qwen3_instruction(self.config.style, language=self.config.language)):
+      wavs, sample_rate = self._generate(texts[0], speaker=speakers[0])
+      return [_normalize_qwen_audio(wavs)], sample_rate
+
+    model = self._ensure_model()
+    if instructs is None:
+      instructs = [build_qwen3_instruction(self.config.style, language=self.config.language)] * len(texts)
+    with self._generate_lock, self._inference_context():
+      wavs, sample_rate = model.generate_custom_voice(
+        text=list(texts),
+        language=[self.config.language] * len(texts),
+        speaker=list(speakers),
+        instruct=list(instructs),
+      )
+    if not isinstance(wavs, (list, tuple)) or len(wavs) != len(texts):
+      raise RuntimeError(f'qwen3 batch returned {len(wavs) if isinstance(wavs, (list, tuple)) else "no"} outputs for {len(texts)} texts')
+    # Wrap each item so it normalizes exactly like a single-text result.
+    return [_normalize_qwen_audio([wav]) for wav in wavs], int(sample_rate)
+
   def _ensure_model(self) -> Any:
     if self._model is not None:
       return self._model
+    with self._model_lock:
+      if self._model is not None:
+        return self._model
+      return self._load_model()
 
+  def _load_model(self) -> Any:
     torch = self._torch
     model_cls = self._model_cls
     if torch is None or model_cls is None:
@@ -104,16 +397,92 @@ class Qwen3TtsEngine:
         f'unsupported MH_QWEN_TTS_DTYPE: {self.config.dtype_name} (expected a torch dtype such as bfloat16 or float16)'
       )
 
+    load_started = time.monotonic()
+    if self.config.profile == 'cpu':
+      self._apply_cpu_threading(torch)
     try:
-      self._model = model_cls.from_pretrained(
+      model = model_cls.from_pretrained(
         self.config.model_id,
         device_map=self.config.device_map,
         dtype=dtype,
       )
     except Exception as error:  # pragma: no cover - depends on runtime env
       raise RuntimeError(f'failed to load qwen3 model {self.config.model_id}: {error}') from error
+    if self.config.profile == 'cpu':
+      model = self._optimize_for_cpu(model, torch)
+    with self._state_lock:
+      self._load_seconds = time.monotonic() - load_started
+      if self._state in ('cold', 'failed'):
+        # Lazy loads skip the warm-up generation, so report them separately from a warmed model.
+        self._state = 'loaded'
+        self._state_error = None
+    self._model = model
     return self._model
 
+  def _apply_cpu_threading(self, torch: Any) -> None:
+    threads = self.config.cpu_threads or max(1, (os.cpu_count() or 2) // 2)
+    torch.set_num_threads(threads)
+    try:
+      # Inter-op parallelism only adds contention for a single autoregressive stream.
+      torch.set_num_interop_threads(1)
+    except RuntimeError:
+      # Already fixed once any parallel work has run in this process.
+      pass
+    self._optimizations.append(f'threads:{threads}')
+
+  def _optimize_for_cpu(self, model: Any, torch: Any) -> Any:
+    """Quantize and compile the module generate() runs; returns the model to keep, which is the quantized copy
+    when the loaded model is itself that module."""
+    module, owner, attribute = _find_torch_module(model, torch)
+    if module is None:
+      print('[qwen3] cpu profile: no torch module found to optimize', file=sys.stderr)
+      return model
+
+    if self.config.quantize:
+      try:
+        quantized = torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+      except Exception as error:
+        print(f'[qwen3] cpu profile: int8 quantization skipped: {error}', file=sys.stderr)
+      else:
+        # quantize_dynamic returns a copy; swap it in wherever generate() will find it.
+        if owner is not None and attribute is not None:
+          setattr(owner, attribute, quantized)
+        else:
+          model = quantized
+        module = quantized
+        self._optimizations.append('int8-linear')
+
+    if self.config.compile:
+      try:
+        os.makedirs(self.config.compile_cache_dir, exist_ok=True)
+        os.environ.setdefault('TORCHINDUCTOR_CACHE_DIR', self.config.compile_cache_dir)
+        inductor_config = getattr(getattr(torch, '_inductor', None), 'config', None)
+        if inductor_config is not None:
+          inductor_config.fx_graph_cache = True
+        # Compile forward rather than the module so generate() keeps calling the compiled graph.
+        module.forward = torch.compile(module.forward, dynamic=True)
+      except Exception as error:
+        print(f'[qwen3] cpu profile: torch.compile skipped: {error}', file=sys.stderr)
+      else:
+        self._optimizations.append('compile')
+    return model
+
+  def _inference_context(self) -> Any:
+    inference_mode = getattr(self._torch, 'inference_mode', None)
+    if callable(inference_mode):
+      return inference_mode()
+    return contextlib.nullcontext()
+
+  def _cuda_available(self) -> bool:
+    cuda = getattr(self._torch, 'cuda', None)
+    is_available = getattr(cuda, 'is_available', None)
+    if not callable(is_available):
+      return False
+    try:
+      return bool(is_available())
+    except Exception:
+      return False
+
   def _verify_runtime_imports(self) -> None:
     if self._torch is not None and self._model_cls is not None:
       return
@@ -137,22 +506,13 @@ class Qwen3TtsEngine:
     self._torch = torch
     self._model_cls = Qwen3TTSModel
 
-  def _apply_qwen_speed(self, audio: np.ndarray) -> np.ndarray:
-    if audio.size == 0 or abs(self.config.speed - 1.0) < 1e-6:
-      return audio.astype(np.float32, copy=False)
-    librosa = self._ensure_librosa()
-    stretched = librosa.effects.time_stretch(audio.astype(np.float32, copy=False), rate=float(self.config.speed))
-    return np.asarray(stretched, dtype=np.float32)
+  def _speed_enabled(self) -> bool:
+    return abs(self.config.speed - 1.0) >= 1e-6
 
-  def _ensure_librosa(self):
-    if self._librosa is not None:
-      return self._librosa
-    try:
-      import librosa  # type: ignore
-    except Exception as error:  # pragma: no cover - depends on runtime env
-      raise RuntimeError(f'failed to import librosa for qwen3 speed control: {error}') from error
-    self._librosa = librosa
-    return self._librosa
+  def _apply_qwen_speed(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    if audio.size == 0 or not self._speed_enabled():
+      return audio.astype(np.float32, copy=False)
+    return time_stretch(audio, self.config.speed, int(sample_rate))
 
 
 def _env_or_default(name: str, fallback: str) -> str:
@@ -185,6 +545,79 @@ def _parse_speed(raw: str) -> float:
   return speed
 
 
+def _parse_profile(raw: str) -> str:
+  normalized = raw.strip().lower()
+  if normalized in QWEN3_PROFILES:
+    return normalized
+  raise RuntimeError(f'unsupported MH_QWEN_TTS_PROFILE: {raw} (expected auto|gpu|cpu)')
+
+
+def _parse_sentence_mode(raw: str) -> str:
+  normalized = raw.strip().lower()
+  if normalized in QWEN3_SENTENCE_MODES:
+    return normalized
+  raise RuntimeError(f'unsupported MH_QWEN_TTS_SENTENCE_MODE: {raw} (expected pipeline|batch|off)')
+
+
+def _parse_batch_max(raw: str) -> int:
+  try:
+    value = int(raw)
+  except ValueError as error:
+    raise RuntimeError(f'unsupported MH_QWEN_TTS_BATCH_MAX: {raw} (expected an integer such as 1 or 4)') from error
+  if value < 1 or value > 32:
+    raise RuntimeError(f'unsupported MH_QWEN_TTS_BATCH_MAX: {raw} (expected a value between 1 and 32)')
+  return value
+
+
+def _parse_batch_window(raw: str) -> int:
+  try:
+    value = int(raw)
+  except ValueError as error:
+    raise RuntimeError(f'unsupported MH_QWEN_TTS_BATCH_WINDOW_MS: {raw} (expected an integer number of milliseconds)') from error
+  if value < 0 or value > 1000:
+    raise RuntimeError(f'unsupported MH_QWEN_TTS_BATCH_WINDOW_MS: {raw} (expected a value between 0 and 1000)')
+  return value
+
+
+def _parse_cpu_threads(raw: str) -> int:
+  try:
+    threads = int(raw)
+  except ValueError as error:
+    raise RuntimeError(f'unsupported MH_QWEN_TTS_CPU_THREADS: {raw} (expected an integer, 0 for automatic)') from error
+  if threads < 0:
+    raise RuntimeError(f'unsupported MH_QWEN_TTS_CPU_THREADS: {raw} (expected 0 or a positive integer)')
+  return threads
+
+
+def _find_torch_module(model: Any, torch: Any) -> Tuple[Any, Any, Optional[str]]:
+  module_type = getattr(getattr(torch, 'nn', None), 'Module', None)
+  if module_type is None:
+    return None, None, None
+  if isinstance(model, module_type):
+    return model, None, None
+  # qwen_tts wraps the transformer; look one level down for the nn.Module that does the work.
+  for attribute in ('model', 'talker', 'module'):
+    candidate = getattr(model, attribute, None)
+    if isinstance(candidate, module_type):
+      return candidate, model, attribute
+  return None, None, None
+
+
+def _parse_flag(name: str, raw: str) -> bool:
+  normalized = raw.strip().lower()
+  if normalized in ('1', 'true', 'yes', 'on'):
+    return True
+  if normalized in ('0', 'false', 'no', 'off'):
+    return False
+  raise RuntimeError(f'unsupported {name}: {raw} (expected 1|0)')
+
+
+def _round_seconds(value: Optional[float]) -> Optional[float]:
+  if value is None:
+    return None
+  return round(value, 3)
+
+
 def _normalize_qwen_audio(wavs: Any) -> np.ndarray:
   if isinstance(wavs, np.ndarray):
     return _as_float_audio(wavs)
@@ -213,6 +646,23 @@ def _normalize_qwen_audio(wavs: Any) -> np.ndarray:
   return _as_float_audio(np.asarray(wavs, dtype=np.float32))
 
 
+class _StreamingGainLimiter:
+  """Apply the configured gain per block, lowering it for the rest of the stream once a peak would pass the ceiling."""
+
+  def __init__(self, gain: float) -> None:
+    self._gain = float(gain)
+    self._scale = 1.0
+
+  def process(self, block: np.ndarray) -> np.ndarray:
+    rendered = block.astype(np.float32, copy=False)
+    if self._gain == 1.0 or rendered.size == 0:
+      return rendered
+    peak = float(np.max(np.abs(rendered))) * self._gain
+    if peak * self._scale > QWEN3_PEAK_CEILING:
+      self._scale = QWEN3_PEAK_CEILING / peak
+    return rendered * np.float32(self._gain * self._scale)
+
+
 def _apply_qwen_gain(audio: np.ndarray, *, gain: float) -> np.ndarray:
   rendered = audio.astype(np.float32, copy=False)
   if gain == 1.0 or rendered.size == 0:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 
 
 QWEN3_ASCII_MODES = {'preserve', 'fullwidth', 'kana_alias'}
@@ -127,6 +128,7 @@ def prepare_qwen3_text(text: str, *, ascii_mode: str, language: str) -> str:
   return _ASCII_TOKEN_RE.sub(replace, text)
 
 
+@lru_cache(maxsize=16)
 def build_qwen3_instruction(style: str, *, language: str) -> str:
   normalized_language = normalize_language(language)
   normalized = normalize_style(style)
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import gc
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+
+REALTIME_MODES = {'off', 'on'}
+PLAYBACK_PRIORITIES = {'off', 'high'}
+PLAYBACK_FIFO_PRIORITY = 10
+PLAYBACK_NICE = -10
+PLAYBACK_FEEDER_THREADS = 2
+
+
+def resolve_realtime_mode(raw: Optional[str]) -> str:
+  if raw is None or raw.strip() == '':
+    return 'off'
+  normalized = raw.strip().lower()
+  if normalized in REALTIME_MODES:
+    return normalized
+  raise ValueError(f'unsupported MH_TTS_REALTIME: {raw} (expected off|on)')
+
+
+def resolve_playback_priority(raw: Optional[str]) -> str:
+  if raw is None or raw.strip() == '':
+    return 'off'
+  normalized = raw.strip().lower()
+  if normalized in PLAYBACK_PRIORITIES:
+    return normalized
+  raise ValueError(f'unsupported MH_TTS_PLAYBACK_PRIORITY: {raw} (expected off|high)')
+
+
+def parse_cpu_list(raw: str) -> frozenset[int]:
+  """Parse a Linux-style CPU list such as `3` or `0-2,6`."""
+  cpus: set[int] = set()
+  for part in raw.split(','):
+    part = part.strip()
+    if not part:
+      continue
+    try:
+      if '-' in part:
+        low, high = (int(value) for value in part.split('-', 1))
+        cpus.update(range(low, high + 1))
+      else:
+        cpus.add(int(part))
+    except ValueError as error:
+      raise ValueError(f'unsupported MH_TTS_PLAYBACK_CPUS: {raw} (expected a CPU list such as 3 or 0-2,6)') from error
+  if not cpus or min(cpus) < 0:
+    raise ValueError(f'unsupported MH_TTS_PLAYBACK_CPUS: {raw} (expected a CPU list such as 3 or 0-2,6)')
+  return frozenset(cpus)
+
+
+def resolve_cpu_split(raw: Optional[str], available: frozenset[int]) -> Optional[Tuple[frozenset[int], frozenset[int]]]:
+  """Split the CPUs this process may use into (synthesis, playback); None when there is nothing to split."""
+  if len(available) < 2:
+    return None
+  if raw is None or raw.strip() == '':
+    # The highest CPU tends to be the one the kernel and other workers touch least.
+    playback = frozenset({max(available)})
+  else:
+    playback = parse_cpu_list(raw) & available
+  if not playback or playback == available:
+    raise ValueError(f'MH_TTS_PLAYBACK_CPUS must name some, but not all, of the CPUs {sorted(available)}')
+  return available - playback, playback
+
+
+def _available_cpus() -> frozenset[int]:
+  getaffinity = getattr(os, 'sched_getaffinity', None)
+  if getaffinity is None:
+    return frozenset()
+  return frozenset(getaffinity(0))
+
+
+class GcPauseStats:
+  """Counts collections and their pauses through `gc.callbacks`; a full collection stalls every thread."""
+
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    self._started: Optional[float] = None
+    self.collections = 0
+    self.total_seconds = 0.0
+    self.max_seconds = 0.0
+
+  def __call__(self, phase: str, info: dict[str, Any]) -> None:
+    if phase == 'start':
+      self._started = time.perf_counter()
+      return
+    started, self._started = self._started, None
+    if started is None:
+      return
+    elapsed = time.perf_counter() - started
+    with self._lock:
+      self.collections += 1
+      self.total_seconds += elapsed
+      self.max_seconds = max(self.max_seconds, elapsed)
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      return {
+        'collections': self.collections,
+        'total_ms': round(self.total_seconds * 1000.0, 2),
+        'max_ms': round(self.max_seconds * 1000.0, 2),
+      }
+
+
+class RealtimeController:
+  """Keeps synthesis and playback on separate CPU sets and freezes the loaded model's objects out of the GC.
+
+  Affinity is per thread on Linux and new threads inherit their creator's, so the worker pins its main thread
+  to the synthesis set while engines start their pools, then moves it to the playback set for the mouth loop.
+  Executors and stream threads pin themselves as they start.
+  """
+
+  def __init__(self, *, playback_cpus: Optional[str] = None, priority: str = 'off') -> None:
+    self.priority = priority
+    self.priority_result = 'off'
+    # What the worker started with, so synthesis threads shed only what pin_playback raised.
+    self._base_priority = _thread_priority() if priority == 'high' else None
+    self.split = resolve_cpu_split(playback_cpus, _available_cpus())
+    self.frozen_objects = 0
+    self.gc_pauses = GcPauseStats()
+    gc.callbacks.append(self.gc_pauses)
+
+  def close(self) -> None:
+    if self.gc_pauses in gc.callbacks:
+      gc.callbacks.remove(self.gc_pauses)
+
+  def pin_synthesis(self) -> None:
+    if self.split is not None:
+      os.sched_setaffinity(0, self.split[0])
+    if self._base_priority is not None:
+      # New threads inherit their creator's policy and nice value, and synthesis threads start from the raised loop.
+      _restore_thread_priority(self._base_priority)
+
+  def pin_playback(self) -> None:
+    if self.split is not None:
+      os.sched_setaffinity(0, self.split[1])
+    if self.priority == 'high':
+      self.priority_result = _raise_thread_priority()
+
+  def on_synthesis_thread(self, produce: Callable[[], Any]) -> Callable[[], Any]:
+    def pinned() -> Any:
+      self.pin_synthesis()
+      return produce()
+
+    return pinned
+
+  def synthesis_executor(self) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(thread_name_prefix='tts-synth', initializer=self.pin_synthesis)
+
+  def playback_executor(self) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=PLAYBACK_FEEDER_THREADS, thread_name_prefix='tts-playback', initializer=self.pin_playback)
+
+  def freeze_heap(self) -> None:
+    """Move everything alive after the model load into the permanent generation, so later collections skip it."""
+    gc.collect()
+    gc.freeze()
+    self.frozen_objects = gc.get_freeze_count()
+
+  def stats(self) -> dict[str, Any]:
+    stats: dict[str, Any] = {
+      'frozen_objects': self.frozen_objects,
+      'priority': self.priority_result,
+      'gc': self.gc_pauses.stats(),
+    }
+    if self.split is not None:
+      stats['synthesis_cpus'] = sorted(self.split[0])
+      stats['playback_cpus'] = sorted(self.split[1])
+    return stats
+
+
+def _raise_thread_priority() -> str:
+  # SCHED_FIFO needs CAP_SYS_NICE or an rtprio limit; a negative nice value is the fallback.
+  try:
+    os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(PLAYBACK_FIFO_PRIORITY))
+    return 'fifo'
+  except (AttributeError, OSError):
+    pass
+  try:
+    os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PLAYBACK_NICE)
+    return 'nice'
+  except (AttributeError, OSError):
+    return 'denied'
+
+
+def _thread_priority() -> Optional[Tuple[int, int, int]]:
+  try:
+    thread_id = threading.get_native_id()
+    return os.sched_getscheduler(0), os.sched_getparam(0).sched_priority, os.getpriority(os.PRIO_PROCESS, thread_id)
+  except (AttributeError, OSError):
+    return None
+
+
+def _restore_thread_priority(base: Tuple[int, int, int]) -> None:
+  # Put back the policy and nice value the worker started with, so a worker started under `nice` keeps its own.
+  policy, rt_priority, nice = base
+  try:
+    if os.sched_getscheduler(0) != policy:
+      os.sched_setscheduler(0, policy, os.sched_param(rt_priority))
+  except (AttributeError, OSError):
+    pass
+  try:
+    thread_id = threading.get_native_id()
+    if os.getpriority(os.PRIO_PROCESS, thread_id) != nice:
+      os.setpriority(os.PRIO_PROCESS, thread_id, nice)
+  except (AttributeError, OSError):
+    pass
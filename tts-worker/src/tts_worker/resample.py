@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+
+# Zero crossings of the windowed sinc on each side; 16 keeps the passband flat to about 0.9 of Nyquist.
+RESAMPLE_HALF_ZEROS = 16
+RESAMPLE_ROLLOFF = 0.92
+RESAMPLE_KAISER_BETA = 8.6
+# Rows per matrix-vector product; bounds the gather buffer on long utterances.
+RESAMPLE_ROWS_PER_PASS = 32_768
+OUTPUT_RATE_MIN = 8_000
+OUTPUT_RATE_MAX = 96_000
+
+AudioBlock = Tuple[np.ndarray, int]
+
+
+def resolve_output_sample_rate(raw: Optional[str]) -> Optional[int]:
+  if raw is None or raw.strip() == '' or raw.strip().lower() == 'native':
+    return None
+  try:
+    rate = int(raw.strip())
+  except ValueError as error:
+    raise ValueError(f'unsupported MH_TTS_OUTPUT_RATE: {raw} (expected native or a rate in Hz)') from error
+  if not OUTPUT_RATE_MIN <= rate <= OUTPUT_RATE_MAX:
+    raise ValueError(f'unsupported MH_TTS_OUTPUT_RATE: {raw} (expected {OUTPUT_RATE_MIN}..{OUTPUT_RATE_MAX} Hz)')
+  return rate
+
+
+@lru_cache(maxsize=16)
+def _polyphase_bank(up: int, down: int) -> tuple[np.ndarray, int, int]:
+  """Kaiser-windowed sinc low-pass for an up/down rate pair, split into `up` phases of equal length.
+
+  Returns (bank, delay, taps): bank[p] holds the taps of phase p reversed, so a phase is applied as a dot
+  product with an ascending input window; delay centers the linear-phase filter on the upsampled grid.
+  """
+  factor = max(up, down)
+  length = 2 * RESAMPLE_HALF_ZEROS * factor + 1
+  delay = (length - 1) // 2
+  cutoff = 0.5 * RESAMPLE_ROLLOFF / factor
+  positions = np.arange(length, dtype=np.float64) - delay
+  taps_full = 2.0 * cutoff * np.sinc(2.0 * cutoff * positions) * np.kaiser(length, RESAMPLE_KAISER_BETA) * up
+  taps = math.ceil(length / up)
+  padded = np.zeros(taps * up, dtype=np.float64)
+  padded[:length] = taps_full
+  bank = padded.reshape(taps, up).T[:, ::-1]
+  return np.ascontiguousarray(bank, dtype=np.float32), delay, taps
+
+
+class StreamingResampler:
+  """Rational-ratio polyphase resampler that takes audio block by block.
+
+  Output sample n is centered on input time n / dst_rate, so block boundaries never shift the signal and
+  `process` + `flush` over any split matches `resample` on the whole signal.
+  """
+
+  def __init__(self, src_rate: int, dst_rate: int) -> None:
+    divisor = math.gcd(int(src_rate), int(dst_rate))
+    self.src_rate = int(src_rate)
+    self.dst_rate = int(dst_rate)
+    self.up = self.dst_rate // divisor
+    self.down = self.src_rate // divisor
+    self.bank, self.delay, self.taps = _polyphase_bank(self.up, self.down)
+    # Inputs before the stream are zero; the buffer starts with that history already in place.
+    self._buffer = np.zeros(self.taps, dtype=np.float32)
+    self._offset = -self.taps
+    self._consumed = 0
+    self._produced = 0
+
+  def process(self, block: np.ndarray) -> np.ndarray:
+    block = np.asarray(block, dtype=np.float32).reshape(-1)
+    if block.size:
+      self._buffer = np.concatenate([self._buffer, block])
+      self._consumed += int(block.shape[0])
+    # Output n is ready once its newest input, (n * down + delay) // up, has arrived.
+    ready = (self._consumed * self.up - 1 - self.delay) // self.down + 1
+    return self._emit(max(self._produced, ready))
+
+  def flush(self) -> np.ndarray:
+    total = -(-self._consumed * self.up // self.down)
+    if total <= self._produced:
+      return np.zeros(0, dtype=np.float32)
+    newest = ((total - 1) * self.down + self.delay) // self.up
+    missing = newest - (self._offset + self._buffer.shape[0]) + 1
+    if missing > 0:
+      self._buffer = np.concatenate([self._buffer, np.zeros(missing, dtype=np.float32)])
+    return self._emit(total)
+
+  def _emit(self, end: int) -> np.ndarray:
+    start = self._produced
+    output = np.zeros(max(0, end - start), dtype=np.float32)
+    if output.size == 0:
+      return output
+    windows = np.lib.stride_tricks.sliding_window_view(self._buffer, self.taps)
+    for residue in range(self.up):
+      first = start + ((residue - start) % self.up)
+      if first >= end:
+        continue
+      count = (end - first + self.up - 1) // self.up
+      position = first * self.down + self.delay
+      phase = self.bank[position % self.up]
+      # Window w covers inputs offset+w .. offset+w+taps-1 and must end on input position // up.
+      window = position // self.up - self.taps + 1 - self._offset
+      target = output[first - start::self.up]
+      for row in range(0, count, RESAMPLE_ROWS_PER_PASS):
+        rows = min(RESAMPLE_ROWS_PER_PASS, count - row)
+        begin = window + row * self.down
+        target[row:row + rows] = windows[begin:begin + (rows - 1) * self.down + 1:self.down] @ phase
+    self._produced = end
+    keep_from = (end * self.down + self.delay) // self.up - self.taps + 1 - self._offset
+    if keep_from > 0:
+      self._buffer = self._buffer[keep_from:]
+      self._offset += keep_from
+    return output
+
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+  if int(src_rate) == int(dst_rate):
+    return audio
+  resampler = StreamingResampler(src_rate, dst_rate)
+  head = resampler.process(audio)
+  tail = resampler.flush()
+  return np.concatenate([head, tail]) if tail.size else head
+
+
+def iter_resampled(blocks: Iterable[AudioBlock], dst_rate: Optional[int]) -> Iterator[AudioBlock]:
+  """Resample a block stream to dst_rate, keeping filter state across blocks; None passes blocks through."""
+  resampler: Optional[StreamingResampler] = None
+  for block, sample_rate in blocks:
+    if dst_rate is None or int(sample_rate) == dst_rate:
+      yield block, sample_rate
+      continue
+    if resampler is None or resampler.src_rate != int(sample_rate):
+      if resampler is not None:
+        yield resampler.flush(), dst_rate
+      resampler = StreamingResampler(sample_rate, dst_rate)
+    converted = resampler.process(block)
+    if converted.size:
+      yield converted, dst_rate
+  if resampler is not None:
+    tail = resampler.flush()
+    if tail.size:
+      yield tail, dst_rate
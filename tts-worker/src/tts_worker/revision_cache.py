@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+REVISION_CACHE_DEFAULT_MB = 16
+REVISION_CACHE_MAX_MESSAGES = 32
+
+RenderedChunk = Tuple['np.ndarray', int]
+
+
+@dataclass(frozen=True)
+class RevisionKey:
+  message_id: str
+  revision: int
+
+
+@dataclass
+class _MessageChunks:
+  revision: int
+  voice: str
+  chunks: dict[Hashable, RenderedChunk]
+  nbytes: int
+
+
+def resolve_revision_cache_budget(raw: Optional[str]) -> int:
+  if raw is None or raw.strip() == '':
+    return REVISION_CACHE_DEFAULT_MB * 1024 * 1024
+  try:
+    megabytes = float(raw)
+  except ValueError as error:
+    raise RuntimeError(f'unsupported MH_TTS_REVISION_CACHE_MB: {raw} (expected a number of megabytes)') from error
+  if megabytes < 0:
+    raise RuntimeError(f'unsupported MH_TTS_REVISION_CACHE_MB: {raw} (expected a non-negative value)')
+  return int(megabytes * 1024 * 1024)
+
+
+class RevisionChunkCache:
+  """Chunk audio of the latest revision per message_id, so a grown revision only renders what changed.
+
+  Chunks are matched by key (the exact text and settings that produced them), not by position, so an
+  appended sentence, an edited middle sentence and a re-split tail all reuse every unchanged chunk.
+  """
+
+  def __init__(self, *, budget_bytes: Optional[int] = None, max_messages: int = REVISION_CACHE_MAX_MESSAGES) -> None:
+    if budget_bytes is None:
+      budget_bytes = resolve_revision_cache_budget(os.environ.get('MH_TTS_REVISION_CACHE_MB'))
+    self.budget_bytes = max(0, int(budget_bytes))
+    self.max_messages = max(1, int(max_messages))
+    self._messages: OrderedDict[str, _MessageChunks] = OrderedDict()
+    self._lock = threading.Lock()
+    self.reused_chunks = 0
+    self.rendered_chunks = 0
+
+  def reusable(self, key: RevisionKey, voice: str) -> dict[Hashable, RenderedChunk]:
+    with self._lock:
+      entry = self._messages.get(key.message_id)
+      if entry is None or entry.voice != voice or entry.revision > key.revision:
+        return {}
+      return dict(entry.chunks)
+
+  def commit(self, key: RevisionKey, voice: str, chunks: Sequence[Tuple[Hashable, np.ndarray, int]], *, reused: int) -> None:
+    nbytes = sum(int(audio.nbytes) for _, audio, _ in chunks)
+    with self._lock:
+      self.reused_chunks += reused
+      self.rendered_chunks += len(chunks) - reused
+      entry = self._messages.get(key.message_id)
+      if entry is not None and entry.revision > key.revision:
+        # A late, older revision must not replace the audio of a newer one.
+        return
+      self._messages[key.message_id] = _MessageChunks(
+        revision=key.revision,
+        voice=voice,
+        chunks={chunk_key: (audio, sample_rate) for chunk_key, audio, sample_rate in chunks},
+        nbytes=nbytes,
+      )
+      self._messages.move_to_end(key.message_id)
+      while len(self._messages) > 1 and (
+        len(self._messages) > self.max_messages or self._total_bytes() > self.budget_bytes
+      ):
+        self._messages.popitem(last=False)
+
+  def render(
+    self,
+    key: RevisionKey,
+    voice: str,
+    chunk_keys: Sequence[Hashable],
+    render_missing: Callable[[list[int]], list[RenderedChunk]],
+  ) -> list[RenderedChunk]:
+    reusable = self.reusable(key, voice)
+    missing = [index for index, chunk_key in enumerate(chunk_keys) if chunk_key not in reusable]
+    rendered = dict(zip(missing, render_missing(missing))) if missing else {}
+    results = [rendered[index] if index in rendered else reusable[chunk_key] for index, chunk_key in enumerate(chunk_keys)]
+    self.commit(
+      key,
+      voice,
+      [(chunk_key, audio, sample_rate) for chunk_key, (audio, sample_rate) in zip(chunk_keys, results)],
+      reused=len(chunk_keys) - len(missing),
+    )
+    return results
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      return {
+        'messages': len(self._messages),
+        'bytes': self._total_bytes(),
+        'budget_bytes': self.budget_bytes,
+        'reused_chunks': self.reused_chunks,
+        'rendered_chunks': self.rendered_chunks,
+      }
+
+  def _total_bytes(self) -> int:
+    return sum(entry.nbytes for entry in self._messages.values())
@@ -0,0 +1,385 @@
+"""Service mode: one worker keeps one engine loaded and serves many clients over a Unix socket.
+
+Each connection speaks the same line protocol as stdio and gets its own `WorkerRuntime`, so generations,
+interrupts, lanes and playback stay per client. Only the engine is shared. Renders from different clients
+take turns through a round-robin `FairGate`, so a client reading a long text aloud cannot starve the others.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import itertools
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from .engine import EngineMetadata, TtsEngine
+from .protocol import ProtocolWriter
+
+
+SERVICE_DEFAULT_SLOTS = 1
+# A hosted render in flight may belong to another client, so a superseded speak must not kill it.
+UNSHARED_CAPABILITIES = frozenset({'cancel_stale', 'after_fork'})
+
+
+def resolve_service_socket(raw: Optional[str]) -> Path:
+  if raw is not None and raw.strip() != '':
+    return Path(raw.strip()).expanduser()
+  runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+  if runtime_dir:
+    return Path(runtime_dir) / 'mh-tts-service.sock'
+  return Path('/tmp') / f'mh-tts-service-{os.getuid()}.sock'
+
+
+def resolve_service_slots(raw: Optional[str]) -> int:
+  if raw is None or raw.strip() == '':
+    return SERVICE_DEFAULT_SLOTS
+  try:
+    slots = int(raw.strip())
+  except ValueError as error:
+    raise ValueError(f'unsupported MH_TTS_SERVICE_SLOTS: {raw} (expected an integer >= 1)') from error
+  if slots < 1:
+    raise ValueError(f'unsupported MH_TTS_SERVICE_SLOTS: {raw} (expected an integer >= 1)')
+  return slots
+
+
+class FairGate:
+  """Admits engine renders `slots` at a time, rotating between clients that are waiting."""
+
+  def __init__(self, slots: int = SERVICE_DEFAULT_SLOTS) -> None:
+    self.slots = slots
+    self._cond = threading.Condition()
+    self._active = 0
+    self._waiting: dict[str, int] = {}
+    self._rotation: deque[str] = deque()
+
+  @contextmanager
+  def turn(self, client: str) -> Iterator[None]:
+    with self._cond:
+      self._waiting[client] = self._waiting.get(client, 0) + 1
+      if client not in self._rotation:
+        self._rotation.append(client)
+      while self._active >= self.slots or self._rotation[0] != client:
+        self._cond.wait()
+      self._active += 1
+      self._rotation.popleft()
+      self._waiting[client] -= 1
+      if self._waiting[client] > 0:
+        # More renders from this client go to the back, behind everyone else who is waiting.
+        self._rotation.append(client)
+      else:
+        del self._waiting[client]
+      self._cond.notify_all()
+    try:
+      yield
+    finally:
+      with self._cond:
+        self._active -= 1
+        self._cond.notify_all()
+
+
+class ClientStats:
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    self.connected_at = time.monotonic()
+    self.renders = 0
+    self.wait_seconds = 0.0
+    self.max_wait_seconds = 0.0
+    self.render_seconds = 0.0
+
+  def observe(self, wait_seconds: float, render_seconds: float) -> None:
+    with self._lock:
+      self.renders += 1
+      self.wait_seconds += wait_seconds
+      self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+      self.render_seconds += render_seconds
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      return {
+        'connected_s': round(time.monotonic() - self.connected_at, 1),
+        'renders': self.renders,
+        'render_ms': round(self.render_seconds * 1000.0, 1),
+        'avg_wait_ms': round(self.wait_seconds * 1000.0 / self.renders, 2) if self.renders else None,
+        'max_wait_ms': round(self.max_wait_seconds * 1000.0, 2),
+      }
+
+
+class ClientEngine:
+  """One client's view of the shared engine: renders take a turn through the service gate, the rest is shared.
+
+  Routers are wrapped too, so the engine a route decision hands back renders through the gate as well.
+  """
+
+  def __init__(self, engine: TtsEngine, service: 'TtsService', client: str) -> None:
+    self._engine = engine
+    self._service = service
+    self._client = client
+    self._leaves: dict[int, ClientEngine] = {}
+
+  def __getattr__(self, name: str) -> Any:
+    engine = self.__dict__.get('_engine')
+    if engine is None or name.startswith('_') or name in UNSHARED_CAPABILITIES:
+      raise AttributeError(name)
+    value = getattr(engine, name)
+    if name == 'stream_text':
+      return functools.partial(self._stream, value)
+    if name == 'route':
+      return functools.partial(self._route, value)
+    if name == 'engines':
+      return [(engine_name, self._leaf(candidate)) for engine_name, candidate in value]
+    return value
+
+  @property
+  def metadata(self) -> EngineMetadata:
+    return self._engine.metadata
+
+  def prepare_text(self, text: str) -> str:
+    return self._engine.prepare_text(text)
+
+  def synthesize_text(self, text: str, **kwargs: Any) -> Any:
+    with self._turn():
+      return self._engine.synthesize_text(text, **kwargs)
+
+  def start_preload(self, on_done: Optional[Callable[[], None]] = None) -> bool:
+    # The service preloads the shared engine once; a client only hears when that finishes.
+    return self._service.when_preloaded(on_done)
+
+  def service_stats(self) -> dict[str, Any]:
+    return {'client': self._client, **self._service.stats()}
+
+  def _stream(self, stream_text: Callable[..., Any], text: str, **kwargs: Any) -> Iterator[Any]:
+    # Streams take one turn per block, so a long read-aloud interleaves with other clients' speech.
+    blocks = iter(stream_text(text, **kwargs))
+    try:
+      while True:
+        with self._turn():
+          block = next(blocks, None)
+        if block is None:
+          return
+        yield block
+    finally:
+      close = getattr(blocks, 'close', None)
+      if callable(close):
+        close()
+
+  def _route(self, route: Callable[..., Any], text: str, **kwargs: Any) -> Any:
+    decision = route(text, **kwargs)
+    if decision is None:
+      return None
+    return replace(decision, engine=self._leaf(decision.engine))
+
+  def _leaf(self, engine: TtsEngine) -> 'ClientEngine':
+    leaf = self._leaves.get(id(engine))
+    if leaf is None:
+      leaf = ClientEngine(engine, self._service, self._client)
+      self._leaves[id(engine)] = leaf
+    return leaf
+
+  @contextmanager
+  def _turn(self) -> Iterator[None]:
+    queued = time.monotonic()
+    with self._service.gate.turn(self._client):
+      started = time.monotonic()
+      try:
+        yield
+      finally:
+        self._service.observe(self._client, started - queued, time.monotonic() - started)
+
+
+class TtsService:
+  def __init__(self, socket_path: Path, *, engine: Optional[TtsEngine] = None, slots: int = SERVICE_DEFAULT_SLOTS) -> None:
+    self.socket_path = socket_path
+    self.engine = engine
+    self.gate = FairGate(slots)
+    self._ids = itertools.count(1)
+    self._lock = threading.Lock()
+    self._clients: dict[str, ClientStats] = {}
+    self._served = 0
+    self._preloading = False
+    self._preload_waiters: list[Callable[[], None]] = []
+    self._server: Optional[asyncio.AbstractServer] = None
+
+  def prepare(self) -> None:
+    """Build the shared engine and start its preload; runs once, before the socket opens."""
+    if self.engine is None:
+      from .__main__ import create_tts_engine
+
+      self.engine = create_tts_engine()
+    start_preload = getattr(self.engine, 'start_preload', None)
+    if callable(start_preload):
+      with self._lock:
+        self._preloading = True
+      if not start_preload(on_done=self._preloaded):
+        self._preloaded()
+
+  async def serve_forever(self) -> None:
+    await self.start()
+    assert self._server is not None
+    serving = asyncio.current_task()
+    if serving is not None:
+      try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serving.cancel)
+      except (NotImplementedError, RuntimeError, ValueError):
+        # Only the main thread may install signal handlers; an embedded service is stopped with close().
+        pass
+    try:
+      async with self._server:
+        await self._server.serve_forever()
+    except asyncio.CancelledError:
+      pass
+
+  async def start(self) -> None:
+    from .__main__ import STDIN_LINE_LIMIT
+
+    self.prepare()
+    if self.socket_path.exists():
+      self.socket_path.unlink()
+    self._server = await asyncio.start_unix_server(self._handle_client, path=str(self.socket_path), limit=STDIN_LINE_LIMIT)
+    os.chmod(self.socket_path, 0o600)
+
+  def close(self) -> None:
+    server, self._server = self._server, None
+    if server is not None:
+      server.close()
+    try:
+      self.socket_path.unlink()
+    except FileNotFoundError:
+      pass
+
+  def when_preloaded(self, on_done: Optional[Callable[[], None]]) -> bool:
+    with self._lock:
+      if not self._preloading:
+        return False
+      if on_done is not None:
+        self._preload_waiters.append(on_done)
+    return True
+
+  def observe(self, client: str, wait_seconds: float, render_seconds: float) -> None:
+    with self._lock:
+      stats = self._clients.get(client)
+    if stats is not None:
+      stats.observe(wait_seconds, render_seconds)
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      clients = dict(self._clients)
+      served = self._served
+    return {
+      'slots': self.gate.slots,
+      'served': served,
+      'clients': {client: stats.stats() for client, stats in clients.items()},
+    }
+
+  def _preloaded(self) -> None:
+    with self._lock:
+      self._preloading = False
+      waiters, self._preload_waiters = self._preload_waiters, []
+    for on_done in waiters:
+      on_done()
+
+  async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    from .__main__ import WorkerRuntime
+
+    assert self.engine is not None
+    loop = asyncio.get_running_loop()
+    client = f'c{next(self._ids)}'
+    with self._lock:
+      self._clients[client] = ClientStats()
+      self._served += 1
+
+    def output(data: bytes) -> None:
+      # Protocol lines come from playback and stream threads too; the transport is only touched on the loop.
+      try:
+        loop.call_soon_threadsafe(writer.write, data)
+      except RuntimeError:
+        pass
+
+    try:
+      runtime = WorkerRuntime(ClientEngine(self.engine, self, client), writer=ProtocolWriter(output))
+      await runtime.run(reader)
+    except Exception as error:
+      print(f'[tts-service] client {client} failed: {error}', file=sys.stderr)
+    finally:
+      with self._lock:
+        self._clients.pop(client, None)
+      # Let writes queued from other threads reach the transport before it closes.
+      await asyncio.sleep(0)
+      try:
+        await writer.drain()
+      except (ConnectionError, RuntimeError):
+        pass
+      writer.close()
+
+
+def connect(socket_path: Path) -> Optional[int]:
+  """Bridge this process's stdio to the service; None when no service is listening."""
+  client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  try:
+    client.connect(str(socket_path))
+  except OSError:
+    client.close()
+    return None
+
+  def forward_stdin() -> None:
+    try:
+      while chunk := os.read(0, 65536):
+        client.sendall(chunk)
+    except OSError:
+      pass
+    try:
+      # EOF on stdin becomes EOF on the socket, which ends this client's session like it ends a worker.
+      client.shutdown(socket.SHUT_WR)
+    except OSError:
+      pass
+
+  threading.Thread(target=forward_stdin, name='tts-service-stdin', daemon=True).start()
+  output = sys.stdout.buffer
+  try:
+    while chunk := client.recv(65536):
+      output.write(chunk)
+      output.flush()
+  except (OSError, BrokenPipeError):
+    return 1
+  finally:
+    client.close()
+  return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+  parser = argparse.ArgumentParser(description='Minimum Headroom TTS service (one engine, many clients)')
+  parser.add_argument('mode', choices=('serve', 'connect'))
+  parser.add_argument('--socket', default=None, help='Unix socket path (default: MH_TTS_SERVICE_SOCKET)')
+  args, worker_argv = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+  socket_path = resolve_service_socket(args.socket or os.environ.get('MH_TTS_SERVICE_SOCKET'))
+
+  if args.mode == 'connect':
+    code = connect(socket_path)
+    if code is not None:
+      return code
+    # No service is running: become an ordinary worker so launchers never depend on the service.
+    os.execv(sys.executable, [sys.executable, '-m', 'tts_worker', *worker_argv])
+    return 1
+
+  service = TtsService(socket_path, slots=resolve_service_slots(os.environ.get('MH_TTS_SERVICE_SLOTS')))
+  try:
+    asyncio.run(service.serve_forever())
+  except KeyboardInterrupt:
+    pass
+  finally:
+    service.close()
+  return 0
+
+
+if __name__ == '__main__':
+  raise SystemExit(main())
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+SILENCE_FRAME_MS = 10.0
+SILENCE_THRESHOLD_DBFS = -50.0
+# Kept on each side of voiced audio so soft onsets and decays are not clipped.
+EDGE_KEEP_MS = 30.0
+DEFAULT_MAX_PAUSE_MS = 300.0
+
+RenderedChunk = Tuple[np.ndarray, int]
+
+
+def resolve_max_pause_ms(raw: Optional[str]) -> Optional[float]:
+  if raw is None or raw.strip() == '':
+    return DEFAULT_MAX_PAUSE_MS
+  normalized = raw.strip().lower()
+  if normalized == 'off':
+    return None
+  try:
+    value = float(normalized)
+  except ValueError as error:
+    raise ValueError(f'unsupported MH_TTS_MAX_PAUSE_MS: {raw} (expected off or milliseconds)') from error
+  if value < 0.0:
+    raise ValueError(f'unsupported MH_TTS_MAX_PAUSE_MS: {raw} (expected off or milliseconds)')
+  return value
+
+
+def voiced_bounds(
+  audio: np.ndarray,
+  sample_rate: int,
+  *,
+  threshold_dbfs: float = SILENCE_THRESHOLD_DBFS,
+  frame_ms: float = SILENCE_FRAME_MS,
+) -> Optional[tuple[int, int]]:
+  """Sample range [start, end) from the first to the last frame whose RMS reaches the threshold, or None."""
+  samples = np.asarray(audio, dtype=np.float32).reshape(-1)
+  if samples.size == 0:
+    return None
+  frame = max(1, int(sample_rate * frame_ms / 1000.0))
+  frames = -(-samples.shape[0] // frame)
+  padded = np.zeros(frames * frame, dtype=np.float32)
+  padded[:samples.shape[0]] = samples
+  power = np.einsum('ij,ij->i', padded.reshape(frames, frame), padded.reshape(frames, frame)) / frame
+  voiced = np.flatnonzero(power >= 10.0 ** (threshold_dbfs / 10.0))
+  if voiced.size == 0:
+    return None
+  return int(voiced[0]) * frame, min(samples.shape[0], (int(voiced[-1]) + 1) * frame)
+
+
+def compact_pauses(rendered: Sequence[RenderedChunk], *, max_pause_ms: Optional[float]) -> list[RenderedChunk]:
+  """Trim silence at the utterance edges and cap the silence between chunks at max_pause_ms.
+
+  Each chunk keeps EDGE_KEEP_MS around its voiced range; the silence beyond those margins, summed across a
+  chunk boundary (and any fully silent chunks in it), becomes zeros of at most max_pause_ms. None disables
+  compaction.
+  """
+  if max_pause_ms is None:
+    return list(rendered)
+
+  result: list[RenderedChunk] = []
+  gap = 0
+  for audio, sample_rate in rendered:
+    keep = int(sample_rate * EDGE_KEEP_MS / 1000.0)
+    bounds = voiced_bounds(audio, sample_rate)
+    if bounds is None:
+      gap += int(audio.shape[0])
+      continue
+    start = max(0, bounds[0] - keep)
+    end = min(int(audio.shape[0]), bounds[1] + keep)
+    if result:
+      pause = min(gap + start, int(sample_rate * max_pause_ms / 1000.0))
+      if pause > 0:
+        result.append((np.zeros(pause, dtype=np.float32), sample_rate))
+    result.append((audio[start:end], sample_rate))
+    gap = int(audio.shape[0]) - end
+
+  # Nothing reached the threshold; leave the utterance as rendered.
+  return result if result else list(rendered)
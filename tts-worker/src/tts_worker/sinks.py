@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+import wave
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Mapping, Optional
+
+import numpy as np
+
+from .playback import PcmBuffer, encode_pcm
+
+
+ARCHIVE_NAME_RE = re.compile(r'[^A-Za-z0-9._-]+')
+
+# A sink gets a `delivered` callback to mark the moment its audio is handed over; sinks that never call it
+# are timed at completion.
+SinkDelivery = Callable[[Callable[[], None]], Awaitable[Any]]
+
+
+def resolve_archive_dir(raw: Optional[str]) -> Optional[Path]:
+  if raw is None or raw.strip() == '':
+    return None
+  return Path(raw.strip()).expanduser()
+
+
+class SinkFanout:
+  """Feeds one utterance to several sinks concurrently and keeps per-sink delivery latency."""
+
+  def __init__(self) -> None:
+    self._latency: dict[str, dict[str, float]] = {}
+
+  async def run(self, sinks: Mapping[str, SinkDelivery], *, started: Optional[float] = None) -> dict[str, Any]:
+    """Run every sink to completion; a failing sink's result is its exception, the others are unaffected."""
+    origin = time.monotonic() if started is None else started
+    results: dict[str, Any] = {}
+
+    async def drive(name: str, sink: SinkDelivery) -> None:
+      marked = False
+
+      def delivered() -> None:
+        nonlocal marked
+        if not marked:
+          marked = True
+          self.observe(name, time.monotonic() - origin)
+
+      try:
+        results[name] = await sink(delivered)
+      except asyncio.CancelledError:
+        raise
+      except Exception as error:
+        self.fail(name)
+        results[name] = error
+        return
+      delivered()
+
+    await asyncio.gather(*(drive(name, sink) for name, sink in sinks.items()))
+    return results
+
+  def observe(self, name: str, seconds: float) -> None:
+    entry = self._entry(name)
+    entry['deliveries'] += 1
+    entry['total_s'] += seconds
+    entry['max_s'] = max(entry['max_s'], seconds)
+    entry['last_s'] = seconds
+
+  def fail(self, name: str) -> None:
+    self._entry(name)['failures'] += 1
+
+  def stats(self) -> dict[str, dict[str, Any]]:
+    result: dict[str, dict[str, Any]] = {}
+    for name, entry in self._latency.items():
+      deliveries = int(entry['deliveries'])
+      result[name] = {
+        'deliveries': deliveries,
+        'failures': int(entry['failures']),
+        'avg_ms': round(entry['total_s'] * 1000.0 / deliveries, 3) if deliveries else None,
+        'max_ms': round(entry['max_s'] * 1000.0, 3) if deliveries else None,
+        'last_ms': round(entry['last_s'] * 1000.0, 3) if deliveries else None,
+      }
+    return result
+
+  def _entry(self, name: str) -> dict[str, float]:
+    return self._latency.setdefault(name, {'deliveries': 0, 'failures': 0, 'total_s': 0.0, 'max_s': 0.0, 'last_s': 0.0})
+
+
+class ArchiveSink:
+  """Writes each utterance as a WAV file; files appear under their final name only once complete."""
+
+  def __init__(self, directory: Path) -> None:
+    self.directory = directory
+    self.directory.mkdir(parents=True, exist_ok=True)
+
+  def path_for(self, session_id: str, utterance_id: str, generation: int) -> Path:
+    stamp = time.strftime('%Y%m%dT%H%M%S')
+    session = ARCHIVE_NAME_RE.sub('_', session_id)
+    utterance = ARCHIVE_NAME_RE.sub('_', utterance_id)
+    return self.directory / f'{stamp}-{session}-{utterance}-g{generation}.wav'
+
+  def write(self, path: Path, pcm: PcmBuffer) -> Path:
+    partial = path.with_name(f'{path.name}.part')
+    partial.write_bytes(pcm.wav)
+    partial.replace(path)
+    return path
+
+  def open_stream(self, path: Path, sample_rate: int) -> 'ArchiveStream':
+    return ArchiveStream(path, sample_rate)
+
+
+class ArchiveStream:
+  """Block-by-block WAV writer for streamed utterances; `abort` discards the partial file."""
+
+  def __init__(self, path: Path, sample_rate: int) -> None:
+    self.path = path
+    self.sample_rate = int(sample_rate)
+    self._partial = path.with_name(f'{path.name}.part')
+    self._wave = wave.open(str(self._partial), 'wb')
+    self._wave.setnchannels(1)
+    self._wave.setsampwidth(2)
+    self._wave.setframerate(self.sample_rate)
+    self.closed = False
+
+  def write(self, block: np.ndarray) -> None:
+    self._wave.writeframes(encode_pcm(block, self.sample_rate, fade=False).pcm)
+
+  def close(self) -> Path:
+    if not self.closed:
+      self.closed = True
+      self._wave.close()
+      self._partial.replace(self.path)
+    return self.path
+
+  def abort(self) -> None:
+    if self.closed:
+      return
+    self.closed = True
+    try:
+      self._wave.close()
+    finally:
+      self._partial.unlink(missing_ok=True)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+SCHEDULER_MODES = {'replace', 'lanes'}
+SPEAK_POLICIES = {'replace', 'interrupt', 'queue'}
+MAX_PRIORITY = 3
+
+
+def resolve_scheduler_mode(raw: Optional[str]) -> str:
+  if raw is None or raw.strip() == '':
+    return 'replace'
+  normalized = raw.strip().lower()
+  if normalized in SCHEDULER_MODES:
+    return normalized
+  raise ValueError(f'unsupported MH_TTS_SCHEDULER: {raw} (expected replace|lanes)')
+
+
+def clamp_priority(raw: Any) -> int:
+  # Mirrors face-app's clampPriority so both sides agree on the 0..3 scale.
+  if isinstance(raw, bool):
+    return 0
+  if isinstance(raw, (int, float)):
+    value = int(raw)
+  elif isinstance(raw, str):
+    try:
+      value = int(raw.strip())
+    except ValueError:
+      return 0
+  else:
+    return 0
+  return max(0, min(MAX_PRIORITY, value))
+
+
+def normalize_policy(raw: Any) -> str:
+  if isinstance(raw, str) and raw.strip().lower() in SPEAK_POLICIES:
+    return raw.strip().lower()
+  return 'replace'
+
+
+@dataclass
+class LaneEntry:
+  request: Any
+  session_id: str
+  priority: int
+  sequence: int
+  prerender: Any = None
+
+
+class SpeechLanes:
+  """Per-session FIFO lanes with a cross-lane priority pick.
+
+  Each session keeps its own order; between sessions the lane head with the highest priority goes next, and
+  equal priorities go oldest first.
+  """
+
+  def __init__(self) -> None:
+    self._lanes: dict[str, deque[LaneEntry]] = {}
+    self._sequence = 0
+
+  def push(self, session_id: str, request: Any, *, priority: int, replace: bool) -> tuple[LaneEntry, list[LaneEntry]]:
+    lane = self._lanes.setdefault(session_id, deque())
+    superseded: list[LaneEntry] = []
+    if replace:
+      superseded = list(lane)
+      lane.clear()
+    self._sequence += 1
+    entry = LaneEntry(request=request, session_id=session_id, priority=priority, sequence=self._sequence)
+    lane.append(entry)
+    return entry, superseded
+
+  def peek(self) -> Optional[LaneEntry]:
+    heads = [lane[0] for lane in self._lanes.values() if lane]
+    if not heads:
+      return None
+    return min(heads, key=lambda entry: (-entry.priority, entry.sequence))
+
+  def pop(self) -> Optional[LaneEntry]:
+    entry = self.peek()
+    if entry is None:
+      return None
+    lane = self._lanes[entry.session_id]
+    lane.popleft()
+    if not lane:
+      del self._lanes[entry.session_id]
+    return entry
+
+  def clear(self, session_id: Optional[str] = None) -> list[LaneEntry]:
+    if session_id is None:
+      removed = [entry for lane in self._lanes.values() for entry in lane]
+      self._lanes.clear()
+      return removed
+    lane = self._lanes.pop(session_id, None)
+    return list(lane) if lane else []
+
+  def depths(self) -> dict[str, int]:
+    return {session_id: len(lane) for session_id, lane in self._lanes.items() if lane}
+
+  def __len__(self) -> int:
+    return sum(len(lane) for lane in self._lanes.values())
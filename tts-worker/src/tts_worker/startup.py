@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import builtins
+import importlib.util
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from .engine import EngineMetadata, TtsEngine
+
+
+PROFILE_TOP_IMPORTS = 20
+
+
+def resolve_fast_start(raw: Optional[str]) -> bool:
+  if raw is None or raw.strip() == '':
+    return False
+  normalized = raw.strip().lower()
+  if normalized in ('1', 'true', 'yes', 'on'):
+    return True
+  if normalized in ('0', 'false', 'no', 'off'):
+    return False
+  raise ValueError(f'unsupported MH_TTS_FAST_START: {raw} (expected 1|0)')
+
+
+def _process_age_ms() -> Optional[float]:
+  """Milliseconds since this process was started, from /proc; None where that is unavailable."""
+  try:
+    with open('/proc/self/stat', 'rb') as stat_file:
+      # The command name may contain spaces, so count fields from the closing parenthesis.
+      fields = stat_file.read().rsplit(b')', 1)[1].split()
+    with open('/proc/uptime', 'rb') as uptime_file:
+      uptime = float(uptime_file.read().split()[0])
+    started = int(fields[19]) / os.sysconf('SC_CLK_TCK')
+  except (OSError, ValueError, IndexError):
+    return None
+  return max(0.0, (uptime - started) * 1000.0)
+
+
+class StartupProfile:
+  """Wall-clock startup stages, and with `report` also per-import times printed once the engine is ready."""
+
+  def __init__(self, *, report: bool = False) -> None:
+    self.report = report
+    self.started = time.monotonic()
+    self.before_start_ms = _process_age_ms()
+    self._lock = threading.Lock()
+    self._stages: dict[str, float] = {}
+    self._marks: dict[str, float] = {}
+    self._imports: list[tuple[str, float]] = []
+    self._original_import: Optional[Callable[..., Any]] = None
+    self._finished = False
+    if report:
+      self._trace_imports()
+
+  @contextmanager
+  def stage(self, name: str) -> Iterator[None]:
+    started = time.monotonic()
+    try:
+      yield
+    finally:
+      with self._lock:
+        self._stages[name] = (time.monotonic() - started) * 1000.0
+
+  def mark(self, name: str) -> None:
+    with self._lock:
+      self._marks.setdefault(name, (time.monotonic() - self.started) * 1000.0)
+
+  def finish(self) -> None:
+    """Record `engine_ready`, stop tracing imports and print the report; later calls do nothing."""
+    self.mark('engine_ready')
+    with self._lock:
+      if self._finished:
+        return
+      self._finished = True
+    self._stop_tracing()
+    if self.report:
+      self._print_report()
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      stats: dict[str, Any] = {f'{name}_ms': round(value, 1) for name, value in self._marks.items()}
+      stats['stages'] = {name: round(value, 1) for name, value in self._stages.items()}
+      if self.before_start_ms is not None:
+        stats['before_start_ms'] = round(self.before_start_ms, 1)
+      if self.report:
+        stats['imports'] = [{'module': module, 'ms': round(ms, 1)} for module, ms in self._top_imports()]
+    return stats
+
+  def _top_imports(self) -> list[tuple[str, float]]:
+    return sorted(self._imports, key=lambda item: item[1], reverse=True)[:PROFILE_TOP_IMPORTS]
+
+  def _trace_imports(self) -> None:
+    original = builtins.__import__
+    self._original_import = original
+
+    def timed_import(name: str, globals: Any = None, locals: Any = None, fromlist: Any = (), level: int = 0) -> Any:
+      if level == 0 and name in sys.modules:
+        return original(name, globals, locals, fromlist, level)
+      loaded = len(sys.modules)
+      started = time.monotonic()
+      try:
+        return original(name, globals, locals, fromlist, level)
+      finally:
+        if len(sys.modules) > loaded:
+          # Times are inclusive: a module's entry also covers whatever it imported first.
+          elapsed = (time.monotonic() - started) * 1000.0
+          with self._lock:
+            self._imports.append((_absolute_name(name, globals, level), elapsed))
+
+    builtins.__import__ = timed_import
+
+  def _stop_tracing(self) -> None:
+    original, self._original_import = self._original_import, None
+    if original is not None:
+      builtins.__import__ = original
+
+  def _print_report(self) -> None:
+    stats = self.stats()
+    before = stats.get('before_start_ms')
+    print(
+      f'[tts-worker] startup: ready {stats.get("ready_ms", 0.0):.1f} ms, engine ready {stats["engine_ready_ms"]:.1f} ms'
+      + (f' (+{before:.1f} ms before the worker started)' if before is not None else ''),
+      file=sys.stderr,
+    )
+    for name, ms in stats['stages'].items():
+      print(f'[tts-worker]   stage  {ms:9.1f} ms  {name}', file=sys.stderr)
+    for item in stats['imports']:
+      print(f'[tts-worker]   import {item["ms"]:9.1f} ms  {item["module"]}', file=sys.stderr)
+
+
+def _absolute_name(name: str, globals: Any, level: int) -> str:
+  if level == 0:
+    return name
+  package = (globals or {}).get('__package__') or ''
+  try:
+    return importlib.util.resolve_name('.' * level + name, package)
+  except (ImportError, ValueError):
+    return '.' * level + name
+
+
+class DeferredTtsEngine:
+  """Builds the real engine on a background thread so the worker can answer before the model is loaded.
+
+  Until then `metadata` is a placeholder and `is_busy_loading` holds speaks under the loading policy. Once built,
+  optional engine capabilities (`stream_text`, `revision_cache`, `engines`, ...) are looked up on the real engine.
+  """
+
+  def __init__(self, factory: Callable[[], TtsEngine], metadata: EngineMetadata, *, profile: Optional[StartupProfile] = None) -> None:
+    self._factory = factory
+    self._placeholder = metadata
+    self._profile = profile
+    self._load_lock = threading.Lock()
+    self._state_lock = threading.Lock()
+    self._engine: Optional[TtsEngine] = None
+    self._state = 'pending'
+    self._error: Optional[str] = None
+    self._build_seconds: Optional[float] = None
+    self._thread: Optional[threading.Thread] = None
+
+  def __getattr__(self, name: str) -> Any:
+    engine = self.__dict__.get('_engine')
+    if engine is None or name.startswith('_'):
+      raise AttributeError(name)
+    return getattr(engine, name)
+
+  @property
+  def metadata(self) -> EngineMetadata:
+    engine = self._engine
+    return engine.metadata if engine is not None else self._placeholder
+
+  def load(self) -> TtsEngine:
+    """Build the engine now, or return it if already built; raises again for a failed build."""
+    with self._load_lock:
+      if self._engine is not None:
+        return self._engine
+      if self._error is not None:
+        raise RuntimeError(f'tts engine failed to load: {self._error}')
+      self._set_state('loading')
+      started = time.monotonic()
+      try:
+        if self._profile is not None:
+          with self._profile.stage('engine_build'):
+            engine = self._factory()
+        else:
+          engine = self._factory()
+      except Exception as error:
+        with self._state_lock:
+          self._state = 'failed'
+          self._error = str(error)
+        raise
+      with self._state_lock:
+        self._engine = engine
+        self._build_seconds = time.monotonic() - started
+        self._state = 'ready'
+      return engine
+
+  def start_preload(self, on_done: Optional[Callable[[], None]] = None) -> bool:
+    with self._state_lock:
+      if self._thread is not None or self._state != 'pending':
+        return False
+      self._state = 'loading'
+      self._thread = threading.Thread(target=self._run_load, args=(on_done,), name='tts-deferred-load', daemon=True)
+      self._thread.start()
+    return True
+
+  def _run_load(self, on_done: Optional[Callable[[], None]]) -> None:
+    try:
+      engine: Optional[TtsEngine] = self.load()
+    except Exception as error:
+      print(f'[tts-worker] engine load failed: {error}', file=sys.stderr)
+      engine = None
+    # Engines that warm up on their own (Qwen3 preload) report done when that finishes instead.
+    start_preload = getattr(engine, 'start_preload', None)
+    if callable(start_preload) and start_preload(on_done=on_done):
+      return
+    if on_done is not None:
+      on_done()
+
+  def is_busy_loading(self) -> bool:
+    with self._state_lock:
+      state = self._state
+    if state == 'loading':
+      return True
+    is_busy_loading = getattr(self._engine, 'is_busy_loading', None)
+    return bool(callable(is_busy_loading) and is_busy_loading())
+
+  def engine_status(self) -> dict[str, Any]:
+    with self._state_lock:
+      state = self._state
+      error = self._error
+      build_seconds = self._build_seconds
+    engine_status = getattr(self._engine, 'engine_status', None)
+    status: dict[str, Any] = dict(engine_status()) if callable(engine_status) else {'state': state}
+    if error is not None:
+      status['error'] = error
+    if build_seconds is not None:
+      status['build_seconds'] = round(build_seconds, 3)
+    return status
+
+  def prepare_text(self, text: str) -> str:
+    return self.load().prepare_text(text)
+
+  def synthesize_text(self, text: str, **kwargs: Any) -> Any:
+    return self.load().synthesize_text(text, **kwargs)
+
+  def _set_state(self, state: str) -> None:
+    with self._state_lock:
+      self._state = state
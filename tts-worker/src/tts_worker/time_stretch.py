@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+
+FRAME_MS = 30.0
+TOLERANCE_MS = 8.0
+_WEIGHT_FLOOR = 1e-3
+
+
+class StreamingTimeStretcher:
+  """WSOLA time-stretcher that keeps pitch and accepts audio block by block.
+
+  Each output frame is taken from near its nominal input position, shifted within a small tolerance to the
+  offset that best continues the previously placed frame, then overlap-added with a Hann window. `rate`
+  follows librosa semantics: 1.25 plays 25% faster and shortens the output.
+  """
+
+  def __init__(self, rate: float, sample_rate: int, *, frame_ms: float = FRAME_MS, tolerance_ms: float = TOLERANCE_MS) -> None:
+    if rate <= 0.0:
+      raise ValueError(f'time-stretch rate must be positive: {rate}')
+    self.rate = float(rate)
+    self._frame = max(32, int(round(sample_rate * frame_ms / 1000.0)) // 2 * 2)
+    self._hop_out = self._frame // 2
+    self._hop_in = self._hop_out * self.rate
+    self._tolerance = max(1, int(round(sample_rate * tolerance_ms / 1000.0)))
+    # A periodic Hann window sums to one at 50% overlap, so steady-state frames need no renormalization.
+    self._window = (0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(self._frame) / self._frame)).astype(np.float32)
+
+    self._input = np.zeros(0, dtype=np.float32)
+    self._input_start = 0
+    self._input_total = 0
+    self._frame_index = 0
+    self._prev_pos: Optional[int] = None
+    self._acc = np.zeros(self._frame, dtype=np.float32)
+    self._weights = np.zeros(self._frame, dtype=np.float32)
+    self._emitted = 0
+
+  def process(self, block: np.ndarray) -> np.ndarray:
+    samples = np.asarray(block, dtype=np.float32).reshape(-1)
+    if samples.size:
+      self._input = np.concatenate([self._input, samples]) if self._input.size else samples.copy()
+      self._input_total += samples.shape[0]
+    return self._render(final=False)
+
+  def flush(self) -> np.ndarray:
+    return self._render(final=True)
+
+  def _render(self, *, final: bool) -> np.ndarray:
+    target_total = int(round(self._input_total / self.rate)) if final else None
+    rendered: list[np.ndarray] = []
+
+    while True:
+      nominal = int(round(self._frame_index * self._hop_in))
+      if target_total is not None:
+        if self._emitted >= target_total:
+          break
+      else:
+        needed = nominal + self._tolerance + self._frame
+        if self._prev_pos is not None:
+          needed = max(needed, self._prev_pos + self._hop_out + self._frame)
+        if needed > self._input_total:
+          break
+
+      position = self._select_position(nominal)
+      self._acc += self._read(position, self._frame) * self._window
+      self._weights += self._window
+      self._prev_pos = position
+      self._frame_index += 1
+
+      hop = self._hop_out
+      if target_total is not None:
+        hop = min(hop, target_total - self._emitted)
+      rendered.append(self._acc[:hop] / np.maximum(self._weights[:hop], _WEIGHT_FLOOR))
+      self._emitted += hop
+      self._acc = np.concatenate([self._acc[self._hop_out:], np.zeros(self._hop_out, dtype=np.float32)])
+      self._weights = np.concatenate([self._weights[self._hop_out:], np.zeros(self._hop_out, dtype=np.float32)])
+
+    self._trim_input()
+    if not rendered:
+      return np.zeros(0, dtype=np.float32)
+    return np.concatenate(rendered).astype(np.float32, copy=False)
+
+  def _select_position(self, nominal: int) -> int:
+    if self._prev_pos is None:
+      return nominal
+
+    template = self._read(self._prev_pos + self._hop_out, self._frame)
+    low = max(0, nominal - self._tolerance)
+    high = nominal + self._tolerance
+    region = self._read(low, high - low + self._frame)
+
+    correlation = np.correlate(region, template, mode='valid')
+    energy = np.cumsum(np.square(region, dtype=np.float64))
+    energy = energy[self._frame - 1:] - np.concatenate([[0.0], energy[:-self._frame]])
+    score = correlation / np.sqrt(np.maximum(energy, 1e-12))
+    return low + int(np.argmax(score))
+
+  def _read(self, start: int, length: int) -> np.ndarray:
+    # Reads outside the buffered input are zero-padded; that only happens at the stream edges.
+    out = np.zeros(length, dtype=np.float32)
+    source_start = max(start, self._input_start)
+    source_end = min(start + length, self._input_start + self._input.shape[0])
+    if source_end > source_start:
+      out[source_start - start:source_end - start] = self._input[source_start - self._input_start:source_end - self._input_start]
+    return out
+
+  def _trim_input(self) -> None:
+    keep_from = int(round(self._frame_index * self._hop_in)) - self._tolerance
+    if self._prev_pos is not None:
+      keep_from = min(keep_from, self._prev_pos + self._hop_out)
+    drop = keep_from - self._input_start
+    if drop > 0:
+      self._input = self._input[drop:]
+      self._input_start += drop
+
+
+def time_stretch(audio: np.ndarray, rate: float, sample_rate: int) -> np.ndarray:
+  samples = np.asarray(audio, dtype=np.float32).reshape(-1)
+  if samples.size == 0 or abs(rate - 1.0) < 1e-6:
+    return samples
+  stretcher = StreamingTimeStretcher(rate, sample_rate)
+  head = stretcher.process(samples)
+  tail = stretcher.flush()
+  return np.concatenate([head, tail]) if tail.size else head
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+from tts_worker.chunking import split_sentences
+
+
+class SentenceSplitTests(unittest.TestCase):
+  def test_splits_japanese_sentences_at_terminal_punctuation(self) -> None:
+    self.assertEqual(
+      split_sentences('本日は状態を確認します。次にテストを実行します！結果はどうでしょうか？'),
+      ['本日は状態を確認します。', '次にテストを実行します！', '結果はどうでしょうか？'],
+    )
+
+  def test_english_periods_split_only_before_whitespace(self) -> None:
+    self.assertEqual(
+      split_sentences('This is version 1.5 of the tool. It ships today.'),
+      ['This is version 1.5 of the tool.', 'It ships today.'],
+    )
+
+  def test_closing_brackets_stay_with_their_sentence(self) -> None:
+    self.assertEqual(
+      split_sentences('「準備ができました。」では始めましょう。'),
+      ['「準備ができました。」', 'では始めましょう。'],
+    )
+
+  def test_short_fragments_merge_with_the_next_sentence(self) -> None:
+    self.assertEqual(
+      split_sentences('Hi. OK. The build finished without errors.'),
+      ['Hi. OK. The build finished without errors.'],
+    )
+
+  def test_short_trailing_fragment_joins_the_previous_sentence(self) -> None:
+    self.assertEqual(split_sentences('テストを実行しました。はい。'), ['テストを実行しました。はい。'])
+
+  def test_overlong_sentences_are_split_to_chunk_limits(self) -> None:
+    sentences = split_sentences('あ' * 300 + '。')
+    self.assertTrue(all(len(sentence) <= 120 for sentence in sentences))
+    self.assertEqual(''.join(sentences), 'あ' * 300 + '。')
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.protocol import ParsedCommand
+
+
+class RecordingEngine:
+  metadata = EngineMetadata(voice='v', engine='fake', model_path='m', voices_path='p')
+
+  def __init__(self) -> None:
+    self.calls: list[str] = []
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    self.calls.append(text)
+    return np.zeros(240, dtype=np.float32), 24_000
+
+
+def speak(generation: int, **extra: object) -> ParsedCommand:
+  raw = {
+    'op': 'speak',
+    'generation': generation,
+    'session_id': 's',
+    'utterance_id': f'u{generation}',
+    'text': f'line {generation}',
+    'expires_at': int(time.time() * 1000) + 5_000,
+    **extra,
+  }
+  return ParsedCommand(raw=raw, op='speak', request_id=f'r{generation}')
+
+
+class CommandCoalescingTests(unittest.TestCase):
+  def run_burst(self, commands: list[ParsedCommand], env: dict[str, str] | None = None):
+    engine = RecordingEngine()
+    with patch.object(worker_main, 'create_tts_engine', lambda: engine), patch.dict(os.environ, {'MH_AUDIO_TARGET': 'browser', **(env or {})}, clear=True):
+      runtime = worker_main.WorkerRuntime()
+    sent: list[dict] = []
+    runtime.writer.send = sent.append
+
+    async def burst_reader(queue: asyncio.Queue[ParsedCommand]) -> None:
+      for command in commands:
+        queue.put_nowait(command)
+      while not queue.empty():
+        await asyncio.sleep(0.01)
+      await asyncio.sleep(0.01)
+      while runtime.current_task is not None or (runtime.lanes is not None and len(runtime.lanes)):
+        await asyncio.sleep(0.01)
+      await queue.put(ParsedCommand(raw={'op': 'shutdown'}, op='shutdown', request_id=None))
+
+    runtime._stdin_reader = burst_reader
+    asyncio.run(runtime.run())
+    return sent, engine, runtime
+
+  def test_burst_of_speaks_synthesizes_only_the_newest(self) -> None:
+    sent, engine, runtime = self.run_burst([speak(generation) for generation in range(1, 11)])
+
+    self.assertEqual(engine.calls, ['line 10'])
+    dropped = [event['generation'] for event in sent if event.get('phase') == 'dropped']
+    self.assertEqual(dropped, list(range(1, 10)))
+    self.assertTrue(all(event['reason'] == 'stale_generation' for event in sent if event.get('phase') == 'dropped'))
+    self.assertEqual(len([message for message in sent if message['type'] == 'response' and message['ok']]), 11)
+    self.assertEqual(runtime._collect_stats()['coalesced_speaks'], 9)
+
+  def test_other_commands_split_the_burst(self) -> None:
+    stats = ParsedCommand(raw={'op': 'ping'}, op='ping', request_id='p')
+    _, _, runtime = self.run_burst([speak(1), speak(2), stats, speak(3)])
+
+    self.assertEqual(runtime._collect_stats()['coalesced_speaks'], 1)
+
+  def test_invalid_speaks_still_report_their_error(self) -> None:
+    sent, engine, _ = self.run_burst([speak(1), speak(2, text=''), speak(3)])
+
+    self.assertEqual(engine.calls, ['line 3'])
+    errors = [message for message in sent if message['type'] == 'response' and not message['ok']]
+    self.assertEqual([message['id'] for message in errors], ['r2'])
+
+  def test_lanes_keep_every_speak(self) -> None:
+    _, engine, runtime = self.run_burst([speak(1, session_id='a'), speak(2, session_id='b')], env={'MH_TTS_SCHEDULER': 'lanes'})
+
+    self.assertEqual(sorted(engine.calls), ['line 1', 'line 2'])
+    self.assertEqual(runtime._collect_stats()['coalesced_speaks'], 0)
+
+
+if __name__ == '__main__':
+  unittest.main()
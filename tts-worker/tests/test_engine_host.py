@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.engine_host import FOREGROUND_RENDER, EngineHostError, HostedTtsEngine, resolve_engine_host_mode, resolve_host_kill_after
+from tts_worker.playback import PlaybackEngine
+from tts_worker.protocol import ParsedCommand
+
+
+class HostableEngine:
+  """Built inside the host process; `hang` blocks a render and `crash` takes the process down."""
+
+  metadata = EngineMetadata(voice='v', engine='hostable', model_path='m', voices_path='p')
+
+  def prepare_text(self, text: str) -> str:
+    return text.strip()
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    if text == 'hang':
+      time.sleep(60)
+    if text == 'crash':
+      os._exit(3)
+    return np.arange(len(text) * 100, dtype=np.float32) / 1000.0, 24_000
+
+  def stream_text(self, text: str, *, voice_override: str | None = None):
+    for index in range(3):
+      yield np.full(50, index, dtype=np.float32), 24_000
+
+
+class PreloadingEngine(HostableEngine):
+  """Takes PRELOAD_S to load, like Qwen3 warming up."""
+
+  PRELOAD_S = 1.0
+
+  def __init__(self) -> None:
+    self.state = 'cold'
+
+  def start_preload(self, on_done=None) -> bool:
+    def load() -> None:
+      time.sleep(self.PRELOAD_S)
+      self.state = 'ready'
+      if on_done is not None:
+        on_done()
+
+    self.state = 'loading'
+    threading.Thread(target=load, daemon=True).start()
+    return True
+
+  def engine_status(self) -> dict:
+    return {'state': self.state}
+
+  def is_busy_loading(self) -> bool:
+    return self.state == 'loading'
+
+
+class HostModeTests(unittest.TestCase):
+  def test_mode_and_kill_after_parsing(self) -> None:
+    self.assertEqual(resolve_engine_host_mode(None), 'off')
+    self.assertEqual(resolve_engine_host_mode(' Standby '), 'standby')
+    with self.assertRaises(ValueError):
+      resolve_engine_host_mode('thread')
+    self.assertEqual(resolve_host_kill_after(None), 0.3)
+    self.assertEqual(resolve_host_kill_after('1500'), 1.5)
+    with self.assertRaises(ValueError):
+      resolve_host_kill_after('-1')
+
+
+class HostedEngineTests(unittest.TestCase):
+  def setUp(self) -> None:
+    self.engine = HostedTtsEngine(HostableEngine, standby=True, kill_after_s=0.05)
+    self.addCleanup(self.engine.close)
+
+  def test_audio_comes_back_through_shared_memory(self) -> None:
+    self.assertEqual(self.engine.metadata.engine, 'hostable')
+    self.assertEqual(self.engine.prepare_text('  hi '), 'hi')
+
+    audio, sample_rate = self.engine.synthesize_text('hello')
+    np.testing.assert_array_equal(audio, np.arange(500, dtype=np.float32) / 1000.0)
+    self.assertEqual(sample_rate, 24_000)
+
+    blocks = list(self.engine.stream_text('hello'))
+    self.assertEqual([float(block[0]) for block, _ in blocks], [0.0, 1.0, 2.0])
+    self.assertIsNone(self.engine.revision_cache)
+
+  def test_stale_render_is_killed_and_standby_takes_over(self) -> None:
+    first_pid = self.engine.host_pid
+    errors: list[Exception] = []
+
+    def render() -> None:
+      FOREGROUND_RENDER.set(True)
+      try:
+        self.engine.synthesize_text('hang')
+      except EngineHostError as error:
+        errors.append(error)
+
+    thread = threading.Thread(target=render)
+    thread.start()
+    time.sleep(0.2)
+    self.assertTrue(self.engine.cancel_stale())
+    thread.join(5)
+
+    self.assertEqual(len(errors), 1)
+    self.assertNotEqual(self.engine.host_pid, first_pid)
+    self.assertEqual(self.engine.synthesize_text('ok')[0].shape[0], 200)
+    self.assertFalse(self.engine.cancel_stale())
+    self.assertEqual(self.engine.engine_status()['host']['kills'], 1)
+
+  def test_crashed_host_is_replaced_on_the_next_call(self) -> None:
+    with self.assertRaises(EngineHostError):
+      self.engine.synthesize_text('crash')
+
+    self.assertEqual(self.engine.synthesize_text('ok')[0].shape[0], 200)
+    self.assertEqual(self.engine.engine_status()['host']['restarts'], 1)
+
+
+class HostPreloadTests(unittest.TestCase):
+  def test_preload_and_background_renders_are_never_reaped(self) -> None:
+    engine = HostedTtsEngine(PreloadingEngine, kill_after_s=0.05)
+    self.addCleanup(engine.close)
+    first_pid = engine.host_pid
+    done = threading.Event()
+    self.assertTrue(engine.start_preload(on_done=done.set))
+    # A prefetch render, with no speak behind it, is running alongside the preload.
+    def prefetch() -> None:
+      try:
+        engine.synthesize_text('hang')
+      except EngineHostError:
+        pass
+
+    background = threading.Thread(target=prefetch, daemon=True)
+    background.start()
+    time.sleep(0.3)
+
+    self.assertFalse(engine.cancel_stale())
+    self.assertTrue(done.wait(10))
+    self.assertEqual(engine.host_pid, first_pid)
+    self.assertEqual(engine.engine_status()['state'], 'ready')
+
+  def test_replacement_host_is_preloaded(self) -> None:
+    engine = HostedTtsEngine(PreloadingEngine, kill_after_s=0.05)
+    self.addCleanup(engine.close)
+    done = threading.Event()
+    engine.start_preload(on_done=done.set)
+
+    def render() -> None:
+      FOREGROUND_RENDER.set(True)
+      try:
+        engine.synthesize_text('hang')
+      except EngineHostError:
+        pass
+
+    thread = threading.Thread(target=render)
+    thread.start()
+    time.sleep(0.3)
+    # The speak is abandoned mid-preload; the new host must finish the load the first one was asked for.
+    self.assertTrue(engine.cancel_stale())
+    thread.join(5)
+
+    self.assertTrue(done.wait(20))
+    self.assertEqual(engine.engine_status()['state'], 'ready')
+    self.assertFalse(engine.is_busy_loading())
+
+
+class ReapingEngine:
+  metadata = EngineMetadata(voice='v', engine='reaping', model_path='m', voices_path='p')
+
+  def __init__(self) -> None:
+    self.reaped = 0
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    time.sleep(0.2)
+    return np.zeros(240, dtype=np.float32), 24_000
+
+  def cancel_stale(self) -> bool:
+    self.reaped += 1
+    return True
+
+
+class RuntimeReapTests(unittest.TestCase):
+  def test_superseded_speak_reaps_its_render(self) -> None:
+    engine = ReapingEngine()
+    with patch.object(worker_main, 'create_tts_engine', lambda: engine), patch.dict(os.environ, {'MH_AUDIO_TARGET': 'local'}, clear=True):
+      runtime = worker_main.WorkerRuntime()
+    runtime.playback = PlaybackEngine(allow_local_output=False)
+    runtime.writer.send = lambda payload: None
+
+    async def scenario() -> None:
+      for generation in (1, 2):
+        raw = {
+          'op': 'speak',
+          'generation': generation,
+          'session_id': 's',
+          'utterance_id': f'u{generation}',
+          'text': 'hello',
+          'expires_at': int(time.time() * 1000) + 5_000,
+        }
+        await runtime._handle_command(ParsedCommand(raw=raw, op='speak', request_id=str(generation)))
+        await asyncio.sleep(0.05)
+      while runtime.current_task is not None:
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+
+    self.assertEqual(engine.reaped, 1)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.playback import PlaybackEngine
+from tts_worker.protocol import ParsedCommand
+from tts_worker.engine_router import EngineCostModel, RoutingTtsEngine, load_route_config, route_language
+
+
+class FakeEngine:
+  def __init__(self, name: str, *, busy: bool = False, sentences: bool = False) -> None:
+    self.name = name
+    self.busy = busy
+    self.sentences = sentences
+
+  @property
+  def metadata(self) -> EngineMetadata:
+    return EngineMetadata(voice='v', engine=self.name, model_path='m', voices_path='p')
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    return np.zeros(10, dtype=np.float32), 24_000
+
+  def is_busy_loading(self) -> bool:
+    return self.busy
+
+  def split_segments(self, text: str) -> list[str]:
+    return [part + '。' for part in text.split('。') if part] if self.sentences else [text]
+
+
+PRIORS = {'qwen3': (0.3, 0.05), 'kokoro': (0.05, 0.005)}
+
+
+def make_router(qwen: FakeEngine | None = None, kokoro: FakeEngine | None = None) -> RoutingTtsEngine:
+  return RoutingTtsEngine(
+    [('qwen3', qwen or FakeEngine('qwen3')), ('kokoro', kokoro or FakeEngine('kokoro'))],
+    margin_ms=100,
+    cost_model=EngineCostModel(PRIORS),
+  )
+
+
+def no_streaming(_engine) -> bool:
+  return False
+
+
+class EngineRouterTests(unittest.TestCase):
+  def test_prefers_the_quality_engine_when_it_fits(self) -> None:
+    router = make_router()
+
+    decision = router.route('a' * 20, seconds_left=4.0, streams=no_streaming)
+
+    self.assertEqual(decision.engine_name, 'qwen3')
+    self.assertAlmostEqual(decision.predicted_seconds, 1.3)
+
+  def test_falls_back_to_the_faster_engine_for_short_deadlines(self) -> None:
+    router = make_router()
+
+    decision = router.route('a' * 20, seconds_left=0.5, streams=no_streaming)
+
+    self.assertEqual(decision.engine_name, 'kokoro')
+
+  def test_returns_none_when_no_engine_can_make_the_deadline(self) -> None:
+    router = make_router()
+
+    self.assertIsNone(router.route('a' * 20, seconds_left=0.1, streams=no_streaming))
+    self.assertEqual(router.route_stats()['deadline_unreachable'], 1)
+
+  def test_streaming_engines_are_judged_on_their_first_sentence(self) -> None:
+    router = make_router(qwen=FakeEngine('qwen3', sentences=True))
+    text = '短い文。' + 'とても長い二番目の文章です' * 6 + '。'
+
+    decision = router.route(text, seconds_left=1.0, streams=lambda engine: True)
+
+    self.assertEqual(decision.engine_name, 'qwen3')
+    self.assertGreater(decision.predicted_total_seconds, 1.0)
+
+  def test_engines_still_loading_are_skipped(self) -> None:
+    router = make_router(qwen=FakeEngine('qwen3', busy=True))
+
+    decision = router.route('hello', seconds_left=10.0, streams=no_streaming)
+
+    self.assertEqual(decision.engine_name, 'kokoro')
+    self.assertFalse(router.is_busy_loading())
+
+  def test_observations_update_the_cost_model_and_error_stats(self) -> None:
+    router = make_router()
+    decision = router.route('a' * 20, seconds_left=4.0, streams=no_streaming)
+
+    router.observe(decision, 0.5)
+
+    self.assertAlmostEqual(router.cost_model.predict('qwen3', 'en', 20), 0.5)
+    stats = router.route_stats()
+    self.assertEqual(stats['routed'], {'qwen3': 1, 'kokoro': 0})
+    self.assertEqual(stats['mean_abs_error_ms'], 800.0)
+    self.assertEqual(stats['mean_error_ms'], -800.0)
+    self.assertEqual(stats['cost_model']['qwen3:en']['samples'], 1)
+
+  def test_cost_is_tracked_per_language(self) -> None:
+    model = EngineCostModel(PRIORS)
+
+    model.observe('kokoro', 'ja', 10, 1.05)
+
+    self.assertAlmostEqual(model.predict('kokoro', 'ja', 10), 1.05)
+    self.assertAlmostEqual(model.predict('kokoro', 'en', 10), 0.1)
+    self.assertEqual((route_language('hello'), route_language('こんにちは')), ('en', 'ja'))
+
+  def test_metadata_names_the_route(self) -> None:
+    self.assertEqual(make_router().metadata.engine, 'route(qwen3>kokoro)')
+
+
+class StreamingEngine(FakeEngine):
+  def stream_text(self, text: str, *, voice_override: str | None = None):
+    # Rendered at once, but 0.6 s long: playback takes far longer than synthesis.
+    for _ in range(3):
+      yield np.zeros(4_800, dtype=np.float32), 24_000
+
+
+class RuntimeObservationTests(unittest.TestCase):
+  def test_streamed_speak_reports_render_time_not_playback_time(self) -> None:
+    router = make_router(StreamingEngine('qwen3'), FakeEngine('kokoro'))
+    observed: list[float] = []
+    router.observe = lambda decision, seconds: observed.append(seconds)
+    with patch.dict(os.environ, {'MH_AUDIO_TARGET': 'local'}, clear=True):
+      runtime = worker_main.WorkerRuntime(router)
+    runtime.playback = PlaybackEngine(allow_local_output=False)
+    # A device write blocks for as long as the block plays.
+    blocking_write = lambda block: time.sleep(block.shape[0] / 24_000)
+    runtime.playback._open_stream_output = lambda sample_rate: (blocking_write, lambda: None)
+    runtime.writer.send = lambda payload: None
+
+    async def scenario() -> None:
+      raw = {
+        'op': 'speak',
+        'generation': 1,
+        'session_id': 's',
+        'utterance_id': 'u1',
+        'text': 'hello',
+        'expires_at': int(time.time() * 1000) + 5_000,
+      }
+      await runtime._handle_command(ParsedCommand(raw=raw, op='speak', request_id='1'))
+      while runtime.current_task is not None:
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+
+    self.assertEqual(len(observed), 1)
+    self.assertLess(observed[0], 0.3)
+
+
+class RouteConfigTests(unittest.TestCase):
+  def test_defaults(self) -> None:
+    with patch.dict(os.environ, {}, clear=True):
+      config = load_route_config()
+    self.assertEqual((config.engines, config.margin_ms), (('qwen3', 'kokoro'), 150))
+
+  def test_rejects_a_single_engine(self) -> None:
+    with patch.dict(os.environ, {'MH_TTS_ROUTE_ENGINES': 'qwen3'}, clear=True):
+      with self.assertRaises(RuntimeError):
+        load_route_config()
+
+
+if __name__ == '__main__':
+  unittest.main()
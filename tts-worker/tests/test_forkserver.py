@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+from tts_worker.engine import EngineMetadata
+from tts_worker.forkserver import ForkServer, connect, resolve_forkserver_socket
+
+
+class PreloadedEngine:
+  metadata = EngineMetadata(voice='v', engine='preloaded', model_path='m', voices_path='p')
+
+  def __init__(self) -> None:
+    self.forks = 0
+
+  def after_fork(self) -> None:
+    self.forks += 1
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    return np.zeros(240, dtype=np.float32), 24_000
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'fork-server mode needs os.fork')
+class ForkServerTests(unittest.TestCase):
+  def setUp(self) -> None:
+    directory = tempfile.TemporaryDirectory()
+    self.addCleanup(directory.cleanup)
+    self.socket_path = Path(directory.name) / 'tts.sock'
+    self.server = ForkServer(self.socket_path, engine=PreloadedEngine())
+    thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+    thread.start()
+    self.addCleanup(thread.join, 5)
+    self.addCleanup(self.server.close)
+    deadline = time.monotonic() + 5
+    while not self.socket_path.exists() and time.monotonic() < deadline:
+      time.sleep(0.01)
+
+  def launch(self, stdin: bytes) -> subprocess.CompletedProcess[bytes]:
+    env = {'PATH': os.environ.get('PATH', ''), 'PYTHONPATH': str(SRC_DIR), 'MH_AUDIO_TARGET': 'browser'}
+    return subprocess.run(
+      [sys.executable, '-m', 'tts_worker.forkserver', 'connect', '--socket', str(self.socket_path)],
+      input=stdin,
+      capture_output=True,
+      env=env,
+      timeout=30,
+    )
+
+  def test_forked_worker_serves_the_launchers_stdio(self) -> None:
+    result = self.launch(b'{"op": "ping", "id": "p1"}\n{"op": "shutdown", "id": "s1"}\n')
+
+    self.assertEqual(result.returncode, 0, result.stderr.decode())
+    messages = [json.loads(line) for line in result.stdout.decode().splitlines()]
+    ready = next(message for message in messages if message['type'] == 'ready')
+    self.assertEqual(ready['engine'], 'preloaded')
+    self.assertIn('p1', [message.get('id') for message in messages if message['type'] == 'response'])
+
+  def test_each_launch_gets_its_own_worker(self) -> None:
+    first = self.launch(b'{"op": "shutdown"}\n')
+    second = self.launch(b'{"op": "shutdown"}\n')
+
+    self.assertEqual((first.returncode, second.returncode), (0, 0))
+    # after_fork runs in the children, so the server's own engine never sees it.
+    self.assertEqual(self.server.engine.forks, 0)
+
+
+class ForkServerClientTests(unittest.TestCase):
+  def test_connect_without_a_server_returns_none(self) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+      self.assertIsNone(connect(Path(directory) / 'missing.sock', []))
+
+  def test_socket_path_resolution(self) -> None:
+    self.assertEqual(resolve_forkserver_socket(' /tmp/x.sock '), Path('/tmp/x.sock'))
+    self.assertTrue(str(resolve_forkserver_socket(None)).endswith('.sock'))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.leadin import resolve_leadin_mode, split_leadin
+from tts_worker.playback import PlaybackEngine
+from tts_worker.protocol import ParsedCommand
+
+
+class SplitLeadinTests(unittest.TestCase):
+  def test_splits_the_filler_off_the_remainder(self) -> None:
+    self.assertEqual(split_leadin('はい、3件のテストが通りました。'), '3件のテストが通りました。')
+    self.assertEqual(split_leadin('「はい、Kokoro です」'), '「Kokoro です」')
+
+  def test_leaves_other_text_alone(self) -> None:
+    self.assertIsNone(split_leadin('了解です。'))
+    self.assertIsNone(split_leadin('はい、'))
+    self.assertIsNone(split_leadin('いいえ、はい、です'))
+
+  def test_mode_parsing(self) -> None:
+    self.assertEqual(resolve_leadin_mode(None), 'off')
+    self.assertEqual(resolve_leadin_mode(' Cached '), 'cached')
+    with self.assertRaises(ValueError):
+      resolve_leadin_mode('always')
+
+
+class RecordingEngine:
+  metadata = EngineMetadata(voice='v', engine='fake', model_path='m', voices_path='p')
+
+  def __init__(self) -> None:
+    self.calls: list[str] = []
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    self.calls.append(text)
+    return np.full(240, 0.1, dtype=np.float32), 24_000
+
+
+class LeadinRuntimeTests(unittest.TestCase):
+  def run_speaks(self, texts: list[str], *, mode: str = 'cached'):
+    engine = RecordingEngine()
+    env = {'MH_AUDIO_TARGET': 'local', 'MH_TTS_LEADIN': mode}
+    with patch.object(worker_main, 'create_tts_engine', lambda: engine), patch.dict(os.environ, env, clear=True):
+      runtime = worker_main.WorkerRuntime()
+    runtime.playback = PlaybackEngine(allow_local_output=False)
+    events: list[dict] = []
+    runtime.writer.send = lambda payload: events.append(payload) if payload.get('type') == 'event' else None
+
+    async def scenario() -> None:
+      runtime._warm_leadin()
+      while runtime._leadin_tasks:
+        await asyncio.sleep(0.01)
+      for generation, text in enumerate(texts, start=1):
+        raw = {
+          'op': 'speak',
+          'generation': generation,
+          'session_id': 's',
+          'utterance_id': f'u{generation}',
+          'text': text,
+          'expires_at': int(time.time() * 1000) + 5_000,
+        }
+        await runtime._handle_command(ParsedCommand(raw=raw, op='speak', request_id=str(generation)))
+        while runtime.current_task is not None:
+          await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    return events, engine, runtime
+
+  def test_cached_clip_plays_ahead_of_the_remainder(self) -> None:
+    events, engine, runtime = self.run_speaks(['はい、テストが通りました。'])
+
+    self.assertEqual(engine.calls, ['はい、', 'テストが通りました。'])
+    play_start = next(event for event in events if event['phase'] == 'play_start')
+    self.assertTrue(play_start['leadin'])
+    synth_done = next(event for event in events if event['phase'] == 'synth_done')
+    self.assertEqual(synth_done['sample_count'], 480)
+    self.assertEqual(runtime._collect_stats()['leadin'], {'clips': 1, 'hits': 1, 'misses': 0})
+
+  def test_unseen_speaker_renders_its_clip_for_next_time(self) -> None:
+    engine = RecordingEngine()
+    with patch.object(worker_main, 'create_tts_engine', lambda: engine), patch.dict(os.environ, {'MH_TTS_LEADIN': 'cached'}, clear=True):
+      runtime = worker_main.WorkerRuntime()
+
+    async def scenario() -> None:
+      self.assertIsNone(runtime._take_leadin(engine, self.request('Ono_Anna'), 'はい、了解です。'))
+      while runtime._leadin_tasks:
+        await asyncio.sleep(0.01)
+      self.assertIsNotNone(runtime._take_leadin(engine, self.request('Ono_Anna'), 'はい、了解です。'))
+
+    asyncio.run(scenario())
+
+  def test_disabled_mode_synthesizes_the_filler_inline(self) -> None:
+    events, engine, runtime = self.run_speaks(['はい、テストが通りました。'], mode='off')
+
+    self.assertEqual(engine.calls, ['はい、テストが通りました。'])
+    self.assertNotIn('leadin', runtime._collect_stats())
+
+  def request(self, speaker: str) -> worker_main.SpeakRequest:
+    return worker_main.SpeakRequest(
+      request_id=None,
+      generation=1,
+      session_id='s',
+      utterance_id='u',
+      text='はい、了解です。',
+      speaker=speaker,
+      expires_at=0,
+      message_id=None,
+      revision=None,
+    )
+
+
+if __name__ == '__main__':
+  unittest.main()
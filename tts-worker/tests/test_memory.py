@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.memory import MemoryAccounting, read_rss_bytes, resolve_memory_budget, resolve_memory_profile
+from tts_worker.playback import PlaybackEngine
+from tts_worker.protocol import ParsedCommand
+
+
+LONG_TEXT = 'Sentence number one is here. Sentence number two is here. Sentence number three is here. Sentence four ends it.'
+
+
+class MemoryConfigTests(unittest.TestCase):
+  def test_profile_and_budget_parsing(self) -> None:
+    self.assertEqual(resolve_memory_profile(None), 'off')
+    self.assertEqual(resolve_memory_profile(' RSS '), 'rss')
+    with self.assertRaises(ValueError):
+      resolve_memory_profile('heap')
+    self.assertIsNone(resolve_memory_budget(None))
+    self.assertIsNone(resolve_memory_budget('0'))
+    self.assertEqual(resolve_memory_budget('1.5'), 1_572_864)
+    with self.assertRaises(ValueError):
+      resolve_memory_budget('-1')
+
+  def test_long_text_is_grouped_under_the_budget(self) -> None:
+    accounting = MemoryAccounting(budget_bytes=500_000)
+    self.assertTrue(accounting.over_budget(LONG_TEXT))
+    chunks = accounting.chunk_text(LONG_TEXT)
+    self.assertEqual(len(chunks), 4)
+    self.assertFalse(any(accounting.over_budget(chunk) for chunk in chunks))
+    # Japanese sentences rejoin without a separator.
+    accounting = MemoryAccounting(budget_bytes=1_000_000)
+    self.assertEqual(accounting.chunk_text('テストが通りました。ビルドも通りました。'), ['テストが通りました。ビルドも通りました。'])
+
+
+class UtteranceMemoryTests(unittest.TestCase):
+  def test_tracemalloc_reports_each_stage_peak(self) -> None:
+    accounting = MemoryAccounting('tracemalloc')
+    self.addCleanup(accounting.close)
+    memory = accounting.begin()
+    buffer = np.ones(1_000_000, dtype=np.float32)
+    memory.sample('synth')
+    del buffer
+    # A stage's peak starts from what the previous stage still held.
+    memory.sample('encode')
+    memory.sample('play')
+
+    report = accounting.finish(memory)
+    self.assertGreaterEqual(report['stages']['synth'], 3.5)
+    self.assertGreaterEqual(report['stages']['encode'], 3.5)
+    self.assertLess(report['stages']['play'], 1.0)
+    self.assertEqual(accounting.stats()['utterances'], 1)
+    self.assertGreaterEqual(accounting.stats()['max_peak_mb'], 3.5)
+
+  def test_off_mode_reports_nothing(self) -> None:
+    accounting = MemoryAccounting()
+    memory = accounting.begin()
+    memory.sample('synth')
+    self.assertIsNone(accounting.finish(memory))
+    self.assertNotIn('utterances', accounting.stats())
+
+
+class BatchEngine:
+  metadata = EngineMetadata(voice='v', engine='fake', model_path='m', voices_path='p')
+
+  def __init__(self) -> None:
+    self.calls: list[str] = []
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    self.calls.append(text)
+    return np.full(240, 0.1, dtype=np.float32), 24_000
+
+
+class MemoryGuardRuntimeTests(unittest.TestCase):
+  def run_speak(self, env: dict[str, str]):
+    engine = BatchEngine()
+    with patch.object(worker_main, 'create_tts_engine', lambda: engine), patch.dict(os.environ, env, clear=True):
+      runtime = worker_main.WorkerRuntime()
+    self.addCleanup(runtime.memory.close)
+    runtime.playback = PlaybackEngine(allow_local_output=False)
+    events: list[dict] = []
+    runtime.writer.send = lambda payload: events.append(payload) if payload.get('type') == 'event' else None
+
+    async def scenario() -> None:
+      raw = {
+        'op': 'speak',
+        'generation': 1,
+        'session_id': 's',
+        'utterance_id': 'u1',
+        'text': LONG_TEXT,
+        'expires_at': int(time.time() * 1000) + 5_000,
+      }
+      await runtime._handle_command(ParsedCommand(raw=raw, op='speak', request_id='1'))
+      while runtime.current_task is not None:
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    return events, engine, runtime
+
+  def test_over_budget_text_renders_in_chunks(self) -> None:
+    env = {'MH_AUDIO_TARGET': 'local', 'MH_TTS_UTTERANCE_BUDGET_MB': '0.5', 'MH_TTS_MEMORY_PROFILE': 'rss'}
+    events, engine, runtime = self.run_speak(env)
+
+    self.assertEqual(len(engine.calls), 4)
+    synth_done = next(event for event in events if event['phase'] == 'synth_done')
+    self.assertEqual((synth_done['memory_guard'], synth_done['sample_count']), ('chunked', 960))
+    play_stop = next(event for event in events if event['phase'] == 'play_stop')
+    self.assertEqual(play_stop['reason'], 'completed')
+    if read_rss_bytes() is not None:
+      self.assertEqual(set(play_stop['memory']['stages']), {'synth', 'play'})
+    self.assertEqual(runtime._collect_stats()['memory']['chunked'], 1)
+
+  def test_browser_only_target_keeps_one_clip(self) -> None:
+    events, engine, runtime = self.run_speak({'MH_AUDIO_TARGET': 'browser', 'MH_TTS_UTTERANCE_BUDGET_MB': '0.5'})
+
+    self.assertEqual(engine.calls, [LONG_TEXT])
+    self.assertNotIn('memory', next(event for event in events if event['phase'] == 'play_stop'))
+    self.assertEqual(runtime._collect_stats()['memory']['chunked'], 0)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import io
+import json
+import sys
+import unittest
+import wave
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+from tts_worker.audio_stream import ThreadedBlockStream
+from tts_worker.playback import (
+  ENCODE_BLOCK_SAMPLES,
+  OPUS_MIME_TYPE,
+  BrowserAudioStats,
+  BrowserClipEncoder,
+  PlaybackEngine,
+  encode_browser_clip,
+  encode_pcm,
+  resolve_browser_audio_codec,
+)
+from tts_worker.protocol import ProtocolWriter
+
+
+def produce_blocks(count: int, size: int):
+  for index in range(count):
+    yield np.full(size, 0.25, dtype=np.float32) * (index + 1), 8_000
+
+
+class ThreadedBlockStreamTests(unittest.TestCase):
+  def test_blocks_arrive_in_order_and_are_counted(self) -> None:
+    async def collect() -> tuple[list[float], ThreadedBlockStream]:
+      stream = ThreadedBlockStream(lambda: produce_blocks(3, 16))
+      stream.start()
+      levels = [float(block[0]) async for block, _ in stream]
+      return levels, stream
+
+    levels, stream = asyncio.run(collect())
+
+    self.assertEqual(levels, [0.25, 0.5, 0.75])
+    self.assertEqual(stream.block_count, 3)
+    self.assertEqual(stream.sample_count, 48)
+    self.assertTrue(stream.finished)
+
+  def test_producer_errors_surface_on_the_consumer(self) -> None:
+    def failing():
+      yield np.zeros(4, dtype=np.float32), 8_000
+      raise RuntimeError('synthesis failed')
+
+    async def collect() -> None:
+      stream = ThreadedBlockStream(failing)
+      stream.start()
+      async for _ in stream:
+        pass
+
+    with self.assertRaisesRegex(RuntimeError, 'synthesis failed'):
+      asyncio.run(collect())
+
+
+class PlaybackStreamTests(unittest.TestCase):
+  def test_silent_stream_plays_every_block_and_closes_the_mouth(self) -> None:
+    mouth: list[float] = []
+
+    async def run() -> str:
+      async def blocks():
+        for block, _ in produce_blocks(3, 240):
+          await asyncio.sleep(0)
+          yield block
+
+      playback = PlaybackEngine(allow_local_output=False)
+      return await playback.play_stream(blocks(), 8_000, on_mouth=mouth.append, should_stop=lambda: False)
+
+    reason = asyncio.run(run())
+
+    self.assertEqual(reason, 'completed')
+    self.assertEqual(mouth[-1], 0.0)
+    self.assertTrue(any(value > 0.0 for value in mouth))
+
+  def test_stream_stops_when_requested(self) -> None:
+    async def run() -> str:
+      async def blocks():
+        while True:
+          await asyncio.sleep(0.01)
+          yield np.full(80, 0.5, dtype=np.float32)
+
+      playback = PlaybackEngine(allow_local_output=False)
+      started = asyncio.get_running_loop().time()
+      return await playback.play_stream(
+        blocks(),
+        8_000,
+        on_mouth=lambda _: None,
+        should_stop=lambda: asyncio.get_running_loop().time() - started > 0.1,
+      )
+
+    self.assertEqual(asyncio.run(run()), 'interrupted')
+
+
+class PcmEncodingTests(unittest.TestCase):
+  def test_buffer_is_a_valid_wav_matching_the_clipped_samples(self) -> None:
+    samples = np.linspace(-1.5, 1.5, ENCODE_BLOCK_SAMPLES * 2 + 7, dtype=np.float32)
+
+    buffer = encode_pcm(samples, 24_000, fade=False)
+
+    with wave.open(io.BytesIO(bytes(buffer.wav)), 'rb') as wav_file:
+      self.assertEqual((wav_file.getnchannels(), wav_file.getsampwidth(), wav_file.getframerate()), (1, 2, 24_000))
+      frames = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+    expected = (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16)
+    np.testing.assert_array_equal(frames, expected)
+    self.assertEqual(buffer.sample_count, samples.shape[0])
+
+  def test_samples_view_shares_the_buffer(self) -> None:
+    buffer = encode_pcm(np.full(100, 0.5, dtype=np.float32), 8_000, fade=False)
+
+    self.assertFalse(buffer.samples.flags.owndata)
+    self.assertEqual(bytes(buffer.pcm), buffer.samples.tobytes())
+
+  def test_fades_shape_both_ends(self) -> None:
+    buffer = encode_pcm(np.full(24_000, 0.5, dtype=np.float32), 24_000)
+
+    samples = buffer.samples
+    self.assertEqual((int(samples[0]), int(samples[-1])), (0, 0))
+    self.assertEqual(int(samples[12_000]), 16_383)
+
+  def test_writer_splices_encoded_audio_into_the_json_line(self) -> None:
+    buffer = encode_pcm(np.full(10, 0.25, dtype=np.float32), 8_000)
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding='utf-8')
+
+    with patch.object(sys, 'stdout', stdout):
+      ProtocolWriter().audio(
+        generation=1,
+        session_id='s',
+        utterance_id='u',
+        mime_type='audio/wav',
+        audio_base64=buffer.wav_base64(),
+        sample_rate=8_000,
+      )
+
+    payload = json.loads(stdout.buffer.getvalue().decode('utf-8'))
+    self.assertEqual(base64.b64decode(payload['audio_base64']), bytes(buffer.wav))
+    self.assertEqual(payload['utterance_id'], 'u')
+
+
+try:
+  import soundfile
+
+  HAS_OPUS = 'OPUS' in soundfile.available_subtypes('OGG')
+except Exception:
+  HAS_OPUS = False
+
+
+def speech_like(seconds: float, sample_rate: int) -> np.ndarray:
+  t = np.arange(int(seconds * sample_rate)) / sample_rate
+  return (0.3 * np.sin(2.0 * np.pi * 220.0 * t) * (0.5 + 0.5 * np.sin(2.0 * np.pi * 3.0 * t))).astype(np.float32)
+
+
+class BrowserClipTests(unittest.TestCase):
+  def test_wav_clip_reuses_the_shared_buffer(self) -> None:
+    pcm = encode_pcm(speech_like(0.5, 24_000), 24_000)
+
+    clip = encode_browser_clip(pcm, 'wav')
+
+    self.assertEqual(clip.mime_type, 'audio/wav')
+    self.assertEqual(base64.b64decode(clip.audio_base64), bytes(pcm.wav))
+    self.assertEqual(clip.wav_bytes, clip.encoded_bytes)
+
+  @unittest.skipUnless(HAS_OPUS, 'libsndfile without Ogg/Opus support')
+  def test_opus_clip_is_much_smaller_than_wav(self) -> None:
+    clip = encode_browser_clip(encode_pcm(speech_like(2.0, 24_000), 24_000), 'opus')
+
+    self.assertEqual(clip.mime_type, OPUS_MIME_TYPE)
+    self.assertTrue(base64.b64decode(clip.audio_base64).startswith(b'OggS'))
+    self.assertLess(clip.encoded_bytes * 4, clip.wav_bytes)
+
+  @unittest.skipUnless(HAS_OPUS, 'libsndfile without Ogg/Opus support')
+  def test_streamed_opus_blocks_decode_to_the_full_length(self) -> None:
+    audio = speech_like(1.0, 24_000)
+    encoder = BrowserClipEncoder('opus', 24_000)
+    for start in range(0, audio.shape[0], 4_800):
+      encoder.write(audio[start:start + 4_800])
+
+    clip = encoder.finish()
+
+    decoded, sample_rate = soundfile.read(io.BytesIO(base64.b64decode(clip.audio_base64)))
+    self.assertEqual(sample_rate, 24_000)
+    self.assertLess(abs(decoded.shape[0] - audio.shape[0]), 24_000 // 50)
+
+  def test_rates_opus_cannot_encode_fall_back_to_wav(self) -> None:
+    self.assertEqual(BrowserClipEncoder('opus', 22_050).codec, 'wav')
+
+  def test_stats_report_bytes_saved(self) -> None:
+    stats = BrowserAudioStats('wav')
+    stats.observe(encode_browser_clip(encode_pcm(speech_like(0.1, 24_000), 24_000), 'wav'))
+
+    self.assertEqual((stats.stats()['clips'], stats.stats()['bytes_saved']), (1, 0))
+
+  def test_codec_parsing(self) -> None:
+    self.assertEqual(resolve_browser_audio_codec(None), 'wav')
+    with self.assertRaises(ValueError):
+      resolve_browser_audio_codec('mp3')
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.prefetch import PrefetchCache, PrefetchEntry, resolve_prefetch_budget
+from tts_worker.protocol import ParsedCommand
+
+
+def make_entry(utterance_id: str, *, text: str = 'hello', expires_at: int = 10_000, task=None) -> PrefetchEntry:
+  return PrefetchEntry(
+    session_id='s',
+    utterance_id=utterance_id,
+    text=text,
+    speaker=None,
+    expires_at=expires_at,
+    request=None,
+    task=task,
+  )
+
+
+class PrefetchCacheTests(unittest.TestCase):
+  def test_take_returns_matching_entries_once(self) -> None:
+    loop = asyncio.new_event_loop()
+    self.addCleanup(loop.close)
+    cache = PrefetchCache(1_000)
+    cache.add(make_entry('u1', task=loop.create_future()))
+
+    self.assertIsNotNone(cache.take('s', 'u1', text='hello', speaker=None))
+    self.assertIsNone(cache.take('s', 'u1', text='hello', speaker=None))
+    self.assertEqual(cache.stats()['hits'], 1)
+
+  def test_unstarted_entry_is_a_miss(self) -> None:
+    cache = PrefetchCache(1_000)
+    cache.add(make_entry('u1'))
+
+    self.assertIsNone(cache.take('s', 'u1', text='hello', speaker=None))
+    self.assertIsNone(cache.next_pending())
+    self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (0, 1))
+
+  def test_changed_text_discards_the_entry(self) -> None:
+    cache = PrefetchCache(1_000)
+    cache.add(make_entry('u1'))
+
+    self.assertIsNone(cache.take('s', 'u1', text='hello again', speaker=None))
+    self.assertEqual((len(cache), cache.stats()['mismatched']), (0, 1))
+
+  def test_budget_evicts_the_oldest_rendered_audio(self) -> None:
+    cache = PrefetchCache(1_000)
+    first, second = make_entry('u1'), make_entry('u2')
+    cache.add(first)
+    cache.add(second)
+    cache.settle(first, 600)
+
+    evicted = cache.settle(second, 600)
+
+    self.assertEqual([entry.utterance_id for entry in evicted], ['u1'])
+    self.assertEqual(cache.stats()['bytes'], 600)
+
+  def test_expired_entries_are_purged(self) -> None:
+    cache = PrefetchCache(1_000)
+    cache.add(make_entry('u1', expires_at=100))
+    cache.add(make_entry('u2', expires_at=5_000))
+
+    cache.purge_expired(1_000)
+
+    self.assertEqual([entry.utterance_id for entry in [cache.next_pending()]], ['u2'])
+    self.assertEqual(cache.stats()['expired'], 1)
+
+  def test_budget_parsing(self) -> None:
+    self.assertEqual(resolve_prefetch_budget(None), 32 * 1024 * 1024)
+    self.assertEqual(resolve_prefetch_budget('0.5'), 512 * 1024)
+    with self.assertRaises(ValueError):
+      resolve_prefetch_budget('lots')
+
+
+class RecordingEngine:
+  metadata = EngineMetadata(voice='v', engine='fake', model_path='m', voices_path='p')
+
+  def __init__(self) -> None:
+    self.calls: list[str] = []
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    self.calls.append(text)
+    return np.zeros(240, dtype=np.float32), 24_000
+
+
+class PrefetchRuntimeTests(unittest.TestCase):
+  def test_speak_plays_from_the_prefetched_buffer(self) -> None:
+    engine = RecordingEngine()
+    with patch.object(worker_main, 'create_tts_engine', lambda: engine), patch.dict(os.environ, {'MH_AUDIO_TARGET': 'browser'}, clear=True):
+      runtime = worker_main.WorkerRuntime()
+    events: list[dict] = []
+    runtime.writer.send = lambda payload: events.append(payload)
+
+    async def scenario() -> None:
+      base = {'session_id': 's', 'utterance_id': 'u1', 'text': 'next line'}
+      await runtime._handle_command(ParsedCommand(raw={'op': 'prefetch', **base}, op='prefetch', request_id='p1'))
+      while runtime.prefetch.stats()['rendered'] == 0:
+        await asyncio.sleep(0.01)
+      speak = {'op': 'speak', 'generation': 1, 'expires_at': int(time.time() * 1000) + 5_000, **base}
+      await runtime._handle_command(ParsedCommand(raw=speak, op='speak', request_id='s1'))
+      while runtime.current_task is not None:
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+
+    self.assertEqual(engine.calls, ['next line'])
+    synth_start = next(event for event in events if event.get('phase') == 'synth_start')
+    self.assertTrue(synth_start['prerendered'])
+    self.assertEqual(events[0], {'type': 'response', 'id': 'p1', 'ok': True, 'result': {'accepted': True, 'queued': 1}})
+    self.assertEqual(runtime._collect_stats()['prefetch']['hits'], 1)
+
+
+if __name__ == '__main__':
+  unittest.main()
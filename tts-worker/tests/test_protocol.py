@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.protocol import SPEAK_SCHEMA, IngestLatency, ParsedCommand, compile_schema, parse_command
+
+
+class SpeakSchemaTests(unittest.TestCase):
+  def test_fields_fail_in_declaration_order(self) -> None:
+    with self.assertRaisesRegex(ValueError, r'^speak\.generation must be integer$'):
+      SPEAK_SCHEMA({'session_id': ''})
+    with self.assertRaisesRegex(ValueError, r'^speak\.session_id must be non-empty string$'):
+      SPEAK_SCHEMA({'generation': 1, 'session_id': '  '})
+
+  def test_optional_fields_are_normalized(self) -> None:
+    fields = SPEAK_SCHEMA({
+      'generation': 1,
+      'session_id': 's',
+      'utterance_id': 'u',
+      'text': 'hi',
+      'speaker': '  ',
+      'message_id': ' m1 ',
+      'revision': 2.0,
+      'ts': 'soon',
+    })
+
+    self.assertEqual((fields['speaker'], fields['message_id'], fields['revision'], fields['ts']), (None, 'm1', 2, None))
+
+  def test_compiled_schema_rejects_unknown_kinds(self) -> None:
+    with self.assertRaises(KeyError):
+      compile_schema('ping', {'id': 'uuid'})
+
+  def test_parse_command_accepts_bytes(self) -> None:
+    command = parse_command(b'{"op": " ping ", "id": "1"}', received_at=5.0)
+
+    self.assertEqual((command.op, command.request_id, command.received_at), ('ping', '1', 5.0))
+
+
+class FakeEngine:
+  metadata = EngineMetadata(voice='v', engine='fake', model_path='m', voices_path='p')
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    return np.zeros(240, dtype=np.float32), 24_000
+
+
+def make_runtime() -> tuple[worker_main.WorkerRuntime, list[dict]]:
+  with patch.object(worker_main, 'create_tts_engine', FakeEngine), patch.dict(os.environ, {'MH_AUDIO_TARGET': 'browser'}, clear=True):
+    runtime = worker_main.WorkerRuntime()
+  sent: list[dict] = []
+  runtime.writer.send = sent.append
+  return runtime, sent
+
+
+class CommandReaderTests(unittest.TestCase):
+  def test_bulk_input_is_split_into_commands(self) -> None:
+    runtime, sent = make_runtime()
+
+    async def scenario() -> list[ParsedCommand]:
+      reader = asyncio.StreamReader(limit=64)
+      reader.feed_data(b'{"op": "ping"}\n\n{"op": "stats"}\n{bad\n' + b'x' * 100 + b'\n{"op": "ping"}')
+      reader.feed_eof()
+      queue: asyncio.Queue[ParsedCommand] = asyncio.Queue()
+      await runtime._read_commands(reader, queue)
+      return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    commands = asyncio.run(scenario())
+
+    self.assertEqual([command.op for command in commands], ['ping', 'stats', 'ping', 'shutdown'])
+    self.assertTrue(all(command.received_at > 0 for command in commands))
+    errors = [message['message'] for message in sent if message['type'] == 'error']
+    self.assertEqual(len(errors), 2)
+    self.assertTrue(errors[0].startswith('invalid json command'))
+    self.assertTrue(errors[1].startswith('command line too long'))
+
+  def test_pipe_stdin_uses_the_event_loop_reader(self) -> None:
+    runtime, _ = make_runtime()
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b'{"op": "stats", "id": "s"}\n')
+    os.close(write_fd)
+
+    async def scenario() -> list[ParsedCommand]:
+      queue: asyncio.Queue[ParsedCommand] = asyncio.Queue()
+      with os.fdopen(read_fd, 'rb', buffering=0) as stdin, patch.object(worker_main.sys, 'stdin', stdin):
+        await runtime._stdin_reader(queue)
+      return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    commands = asyncio.run(scenario())
+
+    self.assertEqual([command.op for command in commands], ['stats', 'shutdown'])
+    self.assertEqual(runtime.ingest.reader, 'stream')
+
+  def test_latency_stats(self) -> None:
+    latency = IngestLatency('stream')
+    self.assertIsNone(latency.stats()['avg_ms'])
+
+    latency.observe(0.002)
+    latency.observe(0.004)
+
+    self.assertEqual(latency.stats(), {'reader': 'stream', 'commands': 2, 'avg_ms': 3.0, 'max_ms': 4.0, 'last_ms': 4.0})
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+from tts_worker.qwen3_batching import Qwen3BatchScheduler
+
+
+class RecordingBatchModel:
+  def __init__(self, gate: threading.Event | None = None) -> None:
+    self.gate = gate
+    self.batches: list[list[tuple[str, str, str]]] = []
+    self.started = threading.Event()
+
+  def __call__(self, texts: list[str], speakers: list[str], instructs: list[str]):
+    self.batches.append(list(zip(texts, speakers, instructs)))
+    self.started.set()
+    if self.gate is not None:
+      self.gate.wait(timeout=2.0)
+    # Each output encodes its text length so callers can check they got their own audio back.
+    return [np.full(len(text) * 10, len(text), dtype=np.float32) for text in texts], 24_000
+
+
+class Qwen3BatchSchedulerTests(unittest.TestCase):
+  def test_lone_request_dispatches_immediately(self) -> None:
+    model = RecordingBatchModel()
+    scheduler = Qwen3BatchScheduler(model, max_batch=4)
+
+    [(wav, sample_rate)] = scheduler.synthesize(['hello'], speaker='ryan', instruct='calm')
+
+    self.assertEqual(sample_rate, 24_000)
+    self.assertEqual(wav.shape[0], 50)
+    self.assertEqual(model.batches, [[('hello', 'ryan', 'calm')]])
+    scheduler.close()
+
+  def test_requests_queued_behind_a_running_batch_share_the_next_one(self) -> None:
+    gate = threading.Event()
+    model = RecordingBatchModel(gate)
+    scheduler = Qwen3BatchScheduler(model, max_batch=4)
+
+    first = scheduler.submit(['first'], speaker='ryan', instruct='calm')
+    self.assertTrue(model.started.wait(timeout=2.0))
+    second = scheduler.submit(['agent two'], speaker='vivian', instruct='bright')
+    third = scheduler.submit(['agent three, longer'], speaker='ryan', instruct='calm')
+    gate.set()
+
+    self.assertEqual(first[0].result(timeout=2.0)[0].shape[0], 50)
+    self.assertEqual(second[0].result(timeout=2.0)[0][0], len('agent two'))
+    self.assertEqual(third[0].result(timeout=2.0)[0][0], len('agent three, longer'))
+    self.assertEqual(len(model.batches), 2)
+    self.assertEqual(
+      model.batches[1],
+      [('agent two', 'vivian', 'bright'), ('agent three, longer', 'ryan', 'calm')],
+    )
+
+    stats = scheduler.stats()
+    self.assertEqual(stats['batches'], 2)
+    self.assertEqual(stats['requests'], 3)
+    self.assertEqual(stats['largest_batch'], 2)
+    self.assertEqual(stats['occupancy'], 0.375)
+    scheduler.close()
+
+  def test_batches_never_exceed_max_batch(self) -> None:
+    model = RecordingBatchModel()
+    scheduler = Qwen3BatchScheduler(model, max_batch=2)
+
+    results = scheduler.synthesize(['a', 'bb', 'ccc'], speaker='ryan', instruct='calm')
+
+    self.assertEqual([wav.shape[0] for wav, _ in results], [10, 20, 30])
+    self.assertEqual([len(batch) for batch in model.batches], [2, 1])
+    scheduler.close()
+
+  def test_batch_errors_reach_every_caller(self) -> None:
+    def broken(texts, speakers, instructs):
+      raise RuntimeError('cuda out of memory')
+
+    scheduler = Qwen3BatchScheduler(broken, max_batch=4)
+
+    with self.assertRaisesRegex(RuntimeError, 'out of memory'):
+      scheduler.synthesize(['one', 'two'], speaker='ryan', instruct='calm')
+    self.assertEqual(scheduler.stats()['failed_batches'], 1)
+    scheduler.close()
+
+  def test_closed_scheduler_rejects_new_work(self) -> None:
+    scheduler = Qwen3BatchScheduler(RecordingBatchModel(), max_batch=4)
+    scheduler.close()
+
+    with self.assertRaises(RuntimeError):
+      scheduler.submit(['late'], speaker='ryan', instruct='calm')
+
+
+if __name__ == '__main__':
+  unittest.main()
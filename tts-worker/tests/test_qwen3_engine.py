@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import copy
 import os
 import sys
+import threading
 import types
 import unittest
 from pathlib import Path
@@ -13,10 +15,61 @@ SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
 if str(SRC_DIR) not in sys.path:
   sys.path.insert(0, str(SRC_DIR))
 
-if 'numpy' not in sys.modules:
+try:
+  import numpy  # noqa: F401
+
+  HAS_NUMPY = True
+except ImportError:
+  HAS_NUMPY = False
   sys.modules['numpy'] = types.ModuleType('numpy')
 
-from tts_worker.qwen3_engine import load_qwen3_config
+from tts_worker.qwen3_engine import Qwen3TtsEngine, load_qwen3_config, resolve_qwen3_profile
+from tts_worker.revision_cache import RevisionKey
+
+
+class FakeQwenModel:
+  load_gate: threading.Event | None = None
+
+  def __init__(self) -> None:
+    self.calls: list[dict[str, str]] = []
+
+  @classmethod
+  def from_pretrained(cls, model_id: str, **_: object) -> 'FakeQwenModel':
+    if cls.load_gate is not None:
+      cls.load_gate.wait(timeout=2.0)
+    return cls()
+
+  def generate_custom_voice(self, *, text, language, speaker, instruct):
+    self.calls.append({'text': text, 'language': language, 'speaker': speaker})
+    if isinstance(text, list):
+      return [[0.1] * 240 for _ in text], 24_000
+    return [[0.1] * 240], 24_000
+
+
+class FakeLoudQwenModel(FakeQwenModel):
+  def generate_custom_voice(self, *, text, language, speaker, instruct):
+    import numpy as np
+
+    self.calls.append({'text': text, 'language': language, 'speaker': speaker})
+    # A rising ramp, so the per-block gain and the peak ceiling show up in the streamed audio.
+    return [np.linspace(0.0, 0.5, 1_200, dtype=np.float32)], 24_000
+
+
+def make_fake_engine(
+  env: dict[str, str] | None = None,
+  model_cls: type = FakeQwenModel,
+  torch: types.SimpleNamespace | None = None,
+) -> Qwen3TtsEngine:
+  fake_torch = torch or types.SimpleNamespace(bfloat16='bf16', cuda=types.SimpleNamespace(is_available=lambda: True))
+
+  def fake_imports(engine: Qwen3TtsEngine) -> None:
+    engine._torch = fake_torch
+    engine._model_cls = model_cls
+
+  with patch.dict(os.environ, env or {}, clear=True):
+    config = load_qwen3_config()
+  with patch.object(Qwen3TtsEngine, '_verify_runtime_imports', fake_imports):
+    return Qwen3TtsEngine(config=config)
 
 
 class Qwen3EngineConfigTests(unittest.TestCase):
@@ -30,6 +83,320 @@ class Qwen3EngineConfigTests(unittest.TestCase):
       config = load_qwen3_config()
     self.assertEqual(config.speed, 1.1)
 
+  def test_preload_can_be_disabled(self) -> None:
+    with patch.dict(os.environ, {'MH_QWEN_TTS_PRELOAD': '0'}, clear=True):
+      config = load_qwen3_config()
+    self.assertFalse(config.preload)
+
+  def test_cross_request_batching_defaults_to_four_without_a_window(self) -> None:
+    with patch.dict(os.environ, {}, clear=True):
+      config = load_qwen3_config()
+    self.assertEqual((config.batch_max, config.batch_window_ms), (4, 0))
+
+  def test_rejects_out_of_range_batch_size(self) -> None:
+    with patch.dict(os.environ, {'MH_QWEN_TTS_BATCH_MAX': '0'}, clear=True):
+      with self.assertRaises(RuntimeError):
+        load_qwen3_config()
+
+  def test_cpu_profile_defaults_to_cpu_device_and_float32(self) -> None:
+    with patch.dict(os.environ, {'MH_QWEN_TTS_PROFILE': 'cpu'}, clear=True):
+      config = load_qwen3_config()
+    self.assertEqual((config.profile, config.device_map, config.dtype_name), ('cpu', 'cpu', 'float32'))
+
+  def test_auto_profile_falls_back_to_cpu_without_cuda(self) -> None:
+    with patch.dict(os.environ, {}, clear=True):
+      config = load_qwen3_config()
+
+    on_gpu = resolve_qwen3_profile(config, cuda_available=True)
+    on_cpu = resolve_qwen3_profile(config, cuda_available=False)
+
+    self.assertEqual((on_gpu.profile, on_gpu.device_map, on_gpu.dtype_name), ('gpu', 'auto', 'bfloat16'))
+    self.assertEqual((on_cpu.profile, on_cpu.device_map, on_cpu.dtype_name), ('cpu', 'cpu', 'float32'))
+
+  def test_rejects_unknown_profile(self) -> None:
+    with patch.dict(os.environ, {'MH_QWEN_TTS_PROFILE': 'tpu'}, clear=True):
+      with self.assertRaises(RuntimeError):
+        load_qwen3_config()
+
+
+class FakeTorchModule:
+  pass
+
+
+class FakeCpuQwenModel(FakeQwenModel):
+  def __init__(self) -> None:
+    super().__init__()
+    self.model = FakeTorchModule()
+
+
+class FakeModuleQwenModel(FakeTorchModule, FakeQwenModel):
+  def forward(self) -> None:
+    pass
+
+
+class FakeInferenceMode:
+  active = 0
+
+  def __enter__(self) -> None:
+    FakeInferenceMode.active += 1
+
+  def __exit__(self, *_: object) -> None:
+    FakeInferenceMode.active -= 1
+
+
+def make_fake_torch(calls: list[str]) -> types.SimpleNamespace:
+  def quantize_dynamic(module, layers, dtype):
+    calls.append(f'quantize:{dtype}')
+    # Like the real call, hand back a quantized copy and leave the original alone.
+    quantized = copy.copy(module)
+    quantized.source = module
+    return quantized
+
+  return types.SimpleNamespace(
+    bfloat16='bf16',
+    float32='f32',
+    qint8='qint8',
+    nn=types.SimpleNamespace(Module=FakeTorchModule, Linear=object),
+    ao=types.SimpleNamespace(quantization=types.SimpleNamespace(quantize_dynamic=quantize_dynamic)),
+    cuda=types.SimpleNamespace(is_available=lambda: False),
+    set_num_threads=lambda count: calls.append(f'threads:{count}'),
+    set_num_interop_threads=lambda count: calls.append(f'interop:{count}'),
+    inference_mode=FakeInferenceMode,
+    compile=lambda fn, dynamic: types.SimpleNamespace(compiled=fn),
+  )
+
+
+class Qwen3EngineCpuProfileTests(unittest.TestCase):
+  def test_cpu_profile_tunes_threads_and_quantizes_linear_layers(self) -> None:
+    calls: list[str] = []
+    engine = make_fake_engine(
+      {'MH_QWEN_TTS_PROFILE': 'cpu', 'MH_QWEN_TTS_CPU_THREADS': '3'},
+      model_cls=FakeCpuQwenModel,
+      torch=make_fake_torch(calls),
+    )
+
+    model = engine._ensure_model()
+
+    self.assertEqual(calls, ['threads:3', 'interop:1', 'quantize:qint8'])
+    self.assertIsInstance(model.model, FakeTorchModule)
+    self.assertTrue(hasattr(model.model, 'source'))
+    self.assertEqual(engine.engine_status()['optimizations'], ['threads:3', 'int8-linear'])
+
+  def test_model_that_is_the_module_is_replaced_by_its_optimized_copy(self) -> None:
+    calls: list[str] = []
+    engine = make_fake_engine(
+      {'MH_QWEN_TTS_PROFILE': 'cpu', 'MH_QWEN_TTS_CPU_THREADS': '1', 'MH_QWEN_TTS_COMPILE': '1'},
+      model_cls=FakeModuleQwenModel,
+      torch=make_fake_torch(calls),
+    )
+
+    with patch.object(os, 'makedirs'), patch.dict(os.environ, {}, clear=False):
+      model = engine._ensure_model()
+    engine._generate('Hello.', speaker='Serena')
+
+    self.assertIs(engine._model, model)
+    self.assertTrue(hasattr(model, 'source'))
+    self.assertIsNotNone(getattr(model.forward, 'compiled', None))
+    self.assertEqual(len(model.calls), 1)
+    self.assertEqual(engine.engine_status()['optimizations'], ['threads:1', 'int8-linear', 'compile'])
+
+  def test_generation_runs_under_inference_mode(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_QUANTIZE': '0'}, model_cls=FakeCpuQwenModel, torch=make_fake_torch([]))
+    observed: list[int] = []
+    original = FakeCpuQwenModel.generate_custom_voice
+
+    def spy(model, **kwargs):
+      observed.append(FakeInferenceMode.active)
+      return original(model, **kwargs)
+
+    with patch.object(FakeCpuQwenModel, 'generate_custom_voice', spy):
+      engine._generate('Hello.', speaker='Serena')
+
+    self.assertEqual(observed, [1])
+
+  def test_warmup_reports_real_time_factor(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_QUANTIZE': '0'}, model_cls=FakeCpuQwenModel, torch=make_fake_torch([]))
+    done = threading.Event()
+
+    engine.start_preload(on_done=done.set)
+
+    self.assertTrue(done.wait(timeout=2.0))
+    status = engine.engine_status()
+    self.assertEqual(status['state'], 'warm')
+    self.assertEqual(status['profile'], 'cpu')
+    self.assertIsNotNone(status['warmup_rtf'])
+
+
+class Qwen3EnginePreloadTests(unittest.TestCase):
+  def tearDown(self) -> None:
+    FakeQwenModel.load_gate = None
+
+  def test_preload_loads_and_warms_in_background(self) -> None:
+    engine = make_fake_engine()
+    self.assertEqual(engine.engine_status()['state'], 'cold')
+
+    self.assertTrue(engine.start_preload())
+    engine._preload_thread.join(timeout=2.0)
+
+    status = engine.engine_status()
+    self.assertEqual(status['state'], 'warm')
+    self.assertIsNotNone(status['load_seconds'])
+    self.assertIsNotNone(status['warmup_seconds'])
+    self.assertEqual(len(engine._model.calls), 1)
+    self.assertFalse(engine.start_preload())
+
+  def test_status_reports_loading_until_model_is_ready(self) -> None:
+    FakeQwenModel.load_gate = threading.Event()
+    engine = make_fake_engine()
+    engine.start_preload()
+
+    self.assertEqual(engine.engine_status()['state'], 'loading')
+    self.assertTrue(engine.is_busy_loading())
+
+    FakeQwenModel.load_gate.set()
+    engine._preload_thread.join(timeout=2.0)
+    self.assertFalse(engine.is_busy_loading())
+
+  @unittest.skipUnless(HAS_NUMPY, 'numpy is required for synthesis output')
+  def test_disabled_preload_keeps_lazy_loading(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_PRELOAD': '0'})
+    self.assertFalse(engine.start_preload())
+
+    audio, sample_rate = engine.synthesize_text('Hello.')
+
+    self.assertEqual(sample_rate, 24_000)
+    self.assertEqual(audio.shape[0], 240)
+    self.assertEqual(engine.engine_status()['state'], 'loaded')
+
+
+@unittest.skipUnless(HAS_NUMPY, 'numpy is required for streaming synthesis')
+class Qwen3EngineStreamingTests(unittest.TestCase):
+  def test_stream_yields_one_block_per_sentence(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '1.0'})
+
+    blocks = list(engine.stream_text('はい、確認します。First sentence here. Second one?'))
+
+    self.assertEqual(len(blocks), 3)
+    self.assertTrue(all(rate == 24_000 and block.shape[0] == 240 for block, rate in blocks))
+    self.assertEqual(
+      [call['text'] for call in engine._model.calls],
+      ['はい、確認します。', 'First sentence here.', 'Second one?'],
+    )
+
+  def test_stream_gain_never_pushes_peaks_past_the_ceiling(self) -> None:
+    import numpy as np
+
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '3.0'}, model_cls=FakeLoudQwenModel)
+
+    combined = np.concatenate([block for block, _ in engine.stream_text('First sentence here. Second sentence here.')])
+
+    self.assertLessEqual(float(np.max(np.abs(combined))), 0.98 + 1e-6)
+
+  def test_stream_speed_shortens_the_streamed_audio(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '1.0', 'MH_QWEN_TTS_SPEED': '1.25'}, model_cls=FakeLoudQwenModel)
+
+    total = sum(block.shape[0] for block, _ in engine.stream_text('First sentence here. Second sentence here.'))
+
+    self.assertEqual(total, round(2 * 1_200 / 1.25))
+
+  def test_stream_can_be_disabled(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_STREAM': '0', 'MH_QWEN_TTS_GAIN': '1.0'})
+
+    blocks = list(engine.stream_text('First sentence here. Second sentence here.'))
+
+    self.assertEqual(len(blocks), 1)
+
+
+@unittest.skipUnless(HAS_NUMPY, 'numpy is required for sentence synthesis')
+class Qwen3EngineSentencePipelineTests(unittest.TestCase):
+  TEXT = 'はい、本日は状態を確認します。次にテストを実行します。最後に結果を報告します。'
+
+  def test_pipeline_yields_each_sentence_as_it_finishes(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '1.0'})
+
+    blocks = list(engine.stream_text(self.TEXT))
+
+    self.assertEqual(len(blocks), 3)
+    self.assertEqual(
+      [call['text'] for call in engine._model.calls],
+      ['はい、本日は状態を確認します。', '次にテストを実行します。', '最後に結果を報告します。'],
+    )
+
+  def test_batch_mode_renders_the_first_sentence_alone_then_batches_the_rest(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '1.0', 'MH_QWEN_TTS_SENTENCE_MODE': 'batch'})
+
+    blocks = list(engine.stream_text(self.TEXT))
+
+    self.assertEqual(len(blocks), 3)
+    texts = [call['text'] for call in engine._model.calls]
+    self.assertEqual(texts, ['はい、本日は状態を確認します。', ['次にテストを実行します。', '最後に結果を報告します。']])
+
+  def test_batch_mode_synthesizes_everything_in_one_call(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '1.0', 'MH_QWEN_TTS_SENTENCE_MODE': 'batch'})
+
+    audio, _ = engine.synthesize_text(self.TEXT)
+
+    self.assertEqual(audio.shape[0], 720)
+    self.assertEqual(len(engine._model.calls), 1)
+
+  def test_batching_disabled_renders_each_sentence_directly(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '1.0', 'MH_QWEN_TTS_BATCH_MAX': '1'})
+
+    blocks = list(engine.stream_text(self.TEXT))
+
+    self.assertEqual(len(blocks), 3)
+    self.assertIsNone(engine.batching_stats())
+    self.assertNotIn('batching', engine.engine_status())
+
+  def test_engine_status_reports_batch_occupancy(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '1.0', 'MH_QWEN_TTS_SENTENCE_MODE': 'batch'})
+
+    engine.synthesize_text(self.TEXT)
+
+    batching = engine.engine_status()['batching']
+    self.assertEqual((batching['batches'], batching['requests'], batching['max_batch']), (1, 3, 4))
+
+  def test_off_mode_sends_the_whole_text(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '1.0', 'MH_QWEN_TTS_SENTENCE_MODE': 'off'})
+
+    blocks = list(engine.stream_text(self.TEXT))
+
+    self.assertEqual(len(blocks), 1)
+    self.assertEqual(engine._model.calls[0]['text'], self.TEXT)
+
+
+@unittest.skipUnless(HAS_NUMPY, 'numpy is required for revision caching tests')
+class Qwen3EngineRevisionTests(unittest.TestCase):
+  FIRST = 'はい、本日は状態を確認します。'
+  SECOND = '次にテストを実行します。'
+
+  def test_grown_revision_streams_cached_sentences_and_renders_the_new_one(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '1.0', 'MH_QWEN_TTS_BATCH_MAX': '1'})
+
+    list(engine.stream_text(self.FIRST, revision=RevisionKey('m1', 1)))
+    blocks = list(engine.stream_text(self.FIRST + self.SECOND, revision=RevisionKey('m1', 2)))
+
+    self.assertEqual(len(blocks), 2)
+    self.assertEqual([call['text'] for call in engine._model.calls], [self.FIRST, self.SECOND])
+    self.assertEqual(engine.revision_cache.stats()['reused_chunks'], 1)
+
+  def test_synthesis_reuses_raw_sentences_across_revisions(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '1.0', 'MH_QWEN_TTS_BATCH_MAX': '1'})
+
+    engine.synthesize_text(self.FIRST, revision=RevisionKey('m1', 1))
+    audio, _ = engine.synthesize_text(self.FIRST + self.SECOND, revision=RevisionKey('m1', 2))
+
+    self.assertEqual(audio.shape[0], 480)
+    self.assertEqual([call['text'] for call in engine._model.calls], [self.FIRST, self.SECOND])
+
+  def test_other_speaker_does_not_reuse_audio(self) -> None:
+    engine = make_fake_engine({'MH_QWEN_TTS_GAIN': '1.0', 'MH_QWEN_TTS_BATCH_MAX': '1'})
+
+    engine.synthesize_text(self.FIRST, revision=RevisionKey('m1', 1))
+    engine.synthesize_text(self.FIRST, voice_override='Ono_Anna', revision=RevisionKey('m1', 2))
+
+    self.assertEqual(len(engine._model.calls), 2)
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import os
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.playback import PlaybackEngine, PlaybackTiming, _MouthTicker
+from tts_worker.realtime import GcPauseStats, RealtimeController, parse_cpu_list, resolve_cpu_split, resolve_playback_priority, resolve_realtime_mode
+
+
+class RealtimeConfigTests(unittest.TestCase):
+  def test_mode_and_priority_parsing(self) -> None:
+    self.assertEqual(resolve_realtime_mode(None), 'off')
+    self.assertEqual(resolve_realtime_mode(' ON '), 'on')
+    with self.assertRaises(ValueError):
+      resolve_realtime_mode('fifo')
+    self.assertEqual(resolve_playback_priority('high'), 'high')
+    with self.assertRaises(ValueError):
+      resolve_playback_priority('max')
+
+  def test_cpu_split(self) -> None:
+    available = frozenset({0, 1, 2, 3})
+    self.assertEqual(parse_cpu_list('0-2, 5'), frozenset({0, 1, 2, 5}))
+    self.assertEqual(resolve_cpu_split(None, available), (frozenset({0, 1, 2}), frozenset({3})))
+    self.assertEqual(resolve_cpu_split('0,1', available), (frozenset({2, 3}), frozenset({0, 1})))
+    self.assertIsNone(resolve_cpu_split(None, frozenset({0})))
+    with self.assertRaises(ValueError):
+      resolve_cpu_split('0-3', available)
+    with self.assertRaises(ValueError):
+      parse_cpu_list('one')
+
+  def test_gc_pauses_are_counted(self) -> None:
+    pauses = GcPauseStats()
+    gc.callbacks.append(pauses)
+    try:
+      gc.collect()
+    finally:
+      gc.callbacks.remove(pauses)
+    self.assertGreaterEqual(pauses.stats()['collections'], 1)
+
+
+class PriorityTests(unittest.TestCase):
+  def test_synthesis_threads_drop_the_inherited_playback_priority(self) -> None:
+    controller = RealtimeController(priority='high')
+    self.addCleanup(controller.close)
+    seen: dict[str, object] = {}
+
+    def priority() -> tuple[int, int]:
+      return os.sched_getscheduler(0), os.getpriority(os.PRIO_PROCESS, threading.get_native_id())
+
+    def event_loop_thread() -> None:
+      controller.pin_playback()
+      seen['raised'] = controller.priority_result
+      # Threads started from the raised loop inherit its policy until they pin themselves to synthesis.
+      executor = controller.synthesis_executor()
+      seen['executor'] = executor.submit(priority).result()
+      executor.shutdown()
+      stream = threading.Thread(target=controller.on_synthesis_thread(lambda: seen.__setitem__('stream', priority())))
+      stream.start()
+      stream.join()
+
+    thread = threading.Thread(target=event_loop_thread)
+    thread.start()
+    thread.join()
+
+    if seen['raised'] == 'denied':
+      self.skipTest('this process may not raise thread priority')
+    self.assertEqual(seen['executor'], (os.SCHED_OTHER, 0))
+    self.assertEqual(seen['stream'], (os.SCHED_OTHER, 0))
+
+  def test_synthesis_threads_keep_the_nice_value_the_worker_started_with(self) -> None:
+    for nice in (5, -3):
+      with self.subTest(nice=nice):
+        seen: dict[str, object] = {}
+
+        def worker_thread() -> None:
+          # Stands in for a worker launched under `nice`; the controller is built on the thread that starts it.
+          try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+          except OSError:
+            seen['raised'] = 'denied'
+            return
+          controller = RealtimeController(priority='high')
+          controller.pin_playback()
+          seen['raised'] = controller.priority_result
+          executor = controller.synthesis_executor()
+          seen['executor'] = executor.submit(lambda: os.getpriority(os.PRIO_PROCESS, threading.get_native_id())).result()
+          executor.shutdown()
+          controller.close()
+
+        thread = threading.Thread(target=worker_thread)
+        thread.start()
+        thread.join()
+
+        if seen['raised'] == 'denied':
+          continue
+        self.assertEqual(seen['executor'], nice)
+
+
+class MouthTickerTests(unittest.TestCase):
+  def test_late_ticks_and_device_drift_are_measured(self) -> None:
+    timing = PlaybackTiming()
+    # A device clock running at 90% of wall time drifts 4 ms per 40 ms tick.
+    origin = time.monotonic()
+
+    async def scenario() -> None:
+      ticker = _MouthTicker(timing, lambda: (time.monotonic() - origin) * 0.9)
+      for index in range(5):
+        if index == 2:
+          time.sleep(0.06)
+        await ticker.wait()
+
+    asyncio.run(scenario())
+
+    stats = timing.stats()
+    self.assertEqual(stats['ticks'], 5)
+    self.assertGreaterEqual(stats['late_ticks'], 1)
+    self.assertGreaterEqual(stats['max_lateness_ms'], 10.0)
+    self.assertGreater(stats['max_clock_drift_ms'], 5.0)
+    self.assertEqual(stats['underruns'], 0)
+
+  def test_silent_playback_reports_ticks_without_a_device_clock(self) -> None:
+    playback = PlaybackEngine(allow_local_output=False)
+
+    async def scenario() -> str:
+      return await playback.play(np.zeros(4_800, dtype=np.float32), 24_000, lambda value: None, lambda: False)
+
+    self.assertEqual(asyncio.run(scenario()), 'completed')
+    stats = playback.timing.stats()
+    self.assertGreaterEqual(stats['ticks'], 4)
+    self.assertIsNone(stats['max_clock_drift_ms'])
+
+
+class FakeEngine:
+  metadata = EngineMetadata(voice='v', engine='fake', model_path='m', voices_path='p')
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    return np.zeros(240, dtype=np.float32), 24_000
+
+
+@unittest.skipUnless(hasattr(os, 'sched_setaffinity'), 'CPU pinning needs sched_setaffinity')
+class RealtimeRuntimeTests(unittest.TestCase):
+  def test_runtime_pins_synthesis_and_freezes_the_loaded_heap(self) -> None:
+    pins: list[frozenset[int]] = []
+    env = {'MH_AUDIO_TARGET': 'browser', 'MH_TTS_REALTIME': 'on'}
+    with (
+      patch.object(worker_main, 'create_tts_engine', FakeEngine),
+      patch.dict(os.environ, env, clear=True),
+      patch('os.sched_getaffinity', lambda pid: {0, 1}),
+      patch('os.sched_setaffinity', lambda pid, cpus: pins.append(frozenset(cpus))),
+    ):
+      runtime = worker_main.WorkerRuntime()
+      self.addCleanup(runtime.realtime.close)
+      self.addCleanup(gc.unfreeze)
+      runtime._engine_settled()
+
+    self.assertEqual(pins, [frozenset({0})])
+    stats = runtime._collect_stats()
+    self.assertEqual((stats['realtime']['synthesis_cpus'], stats['realtime']['playback_cpus']), ([0], [1]))
+    self.assertGreater(stats['realtime']['frozen_objects'], 0)
+    self.assertEqual(stats['realtime']['priority'], 'off')
+    self.assertIn('late_ticks', stats['playback_timing'])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.playback import PlaybackEngine
+from tts_worker.protocol import ParsedCommand
+from tts_worker.resample import StreamingResampler, iter_resampled, resample, resolve_output_sample_rate
+
+
+def tone(frequency: float, sample_rate: int, seconds: float = 0.5) -> np.ndarray:
+  times = np.arange(int(sample_rate * seconds)) / sample_rate
+  return (0.5 * np.sin(2 * np.pi * frequency * times)).astype(np.float32)
+
+
+class ResampleTests(unittest.TestCase):
+  def test_tone_survives_common_rate_pairs(self) -> None:
+    for src_rate, dst_rate in ((24_000, 48_000), (24_000, 16_000), (24_000, 44_100)):
+      with self.subTest(src_rate=src_rate, dst_rate=dst_rate):
+        output = resample(tone(1_000, src_rate), src_rate, dst_rate)
+
+        self.assertEqual(output.shape[0], dst_rate // 2)
+        expected = tone(1_000, dst_rate)
+        middle = slice(dst_rate // 8, 3 * dst_rate // 8)
+        self.assertLess(np.max(np.abs(output[middle] - expected[middle])), 1e-3)
+
+  def test_content_above_the_new_nyquist_is_filtered(self) -> None:
+    output = resample(tone(10_000, 24_000), 24_000, 16_000)
+
+    self.assertLess(float(np.sqrt(np.mean(output[500:-500] ** 2))), 1e-3)
+
+  def test_blockwise_matches_whole_signal(self) -> None:
+    audio = np.random.default_rng(4).standard_normal(10_000).astype(np.float32)
+    whole = resample(audio, 24_000, 16_000)
+
+    resampler = StreamingResampler(24_000, 16_000)
+    parts = [resampler.process(audio[start:start + 333]) for start in range(0, audio.shape[0], 333)]
+    parts.append(resampler.flush())
+
+    np.testing.assert_allclose(np.concatenate(parts), whole, atol=1e-6)
+
+  def test_stream_passes_matching_rates_through(self) -> None:
+    block = np.ones(10, dtype=np.float32)
+
+    self.assertIs(next(iter_resampled([(block, 24_000)], None))[0], block)
+    self.assertIs(next(iter_resampled([(block, 48_000)], 48_000))[0], block)
+    converted = list(iter_resampled([(block, 24_000), (block, 24_000)], 48_000))
+    self.assertEqual({rate for _, rate in converted}, {48_000})
+    self.assertEqual(sum(audio.shape[0] for audio, _ in converted), 40)
+
+  def test_rate_parsing(self) -> None:
+    self.assertIsNone(resolve_output_sample_rate(None))
+    self.assertIsNone(resolve_output_sample_rate(' Native '))
+    self.assertEqual(resolve_output_sample_rate('16000'), 16_000)
+    for raw in ('16k', '4000'):
+      with self.assertRaises(ValueError):
+        resolve_output_sample_rate(raw)
+
+
+class ToneEngine:
+  metadata = EngineMetadata(voice='v', engine='fake', model_path='m', voices_path='p')
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    return tone(440, 24_000, 0.1), 24_000
+
+
+class StreamingToneEngine(ToneEngine):
+  def stream_text(self, text: str, *, voice_override: str | None = None):
+    audio = tone(440, 24_000, 0.1)
+    yield audio[:1_000], 24_000
+    yield audio[1_000:], 24_000
+
+
+class OutputRateRuntimeTests(unittest.TestCase):
+  def run_speak(self, engine: ToneEngine, target: str) -> tuple[list[dict], worker_main.WorkerRuntime]:
+    env = {'MH_AUDIO_TARGET': target, 'MH_TTS_OUTPUT_RATE': '16000'}
+    with patch.object(worker_main, 'create_tts_engine', lambda: engine), patch.dict(os.environ, env, clear=True):
+      runtime = worker_main.WorkerRuntime()
+    runtime.playback = PlaybackEngine(allow_local_output=False)
+    sent: list[dict] = []
+    runtime.writer.send = sent.append
+    raw = {
+      'op': 'speak',
+      'generation': 1,
+      'session_id': 's',
+      'utterance_id': 'u',
+      'text': 'hello',
+      'expires_at': int(time.time() * 1000) + 5_000,
+    }
+
+    async def scenario() -> None:
+      await runtime._handle_command(ParsedCommand(raw=raw, op='speak', request_id='1'))
+      while runtime.current_task is not None:
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    return sent, runtime
+
+  def test_clip_reaches_the_sinks_at_the_output_rate(self) -> None:
+    sent, runtime = self.run_speak(ToneEngine(), 'browser')
+
+    synth_done = next(message for message in sent if message.get('phase') == 'synth_done')
+    self.assertEqual((synth_done['sample_rate'], synth_done['sample_count']), (16_000, 1_600))
+    self.assertEqual(synth_done['engine_sample_rate'], 24_000)
+    audio = next(message for message in sent if message['type'] == 'audio')
+    self.assertEqual(audio['sample_rate'], 16_000)
+    self.assertEqual(runtime._collect_stats()['output_sample_rate'], 16_000)
+
+  def test_streamed_blocks_are_resampled(self) -> None:
+    sent, _ = self.run_speak(StreamingToneEngine(), 'both')
+
+    synth_done = next(message for message in sent if message.get('phase') == 'synth_done')
+    self.assertEqual((synth_done['sample_rate'], synth_done['sample_count']), (16_000, 1_600))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.protocol import ParsedCommand
+from tts_worker.revision_cache import RevisionChunkCache, RevisionKey, resolve_revision_cache_budget
+
+
+class CountingRenderer:
+  def __init__(self, samples: int = 240) -> None:
+    self.samples = samples
+    self.rendered: list[str] = []
+
+  def for_keys(self, keys: list[str]):
+    def render(missing: list[int]):
+      self.rendered.extend(keys[index] for index in missing)
+      return [(np.full(self.samples, float(index), dtype=np.float32), 24_000) for index in missing]
+
+    return render
+
+
+class RevisionChunkCacheTests(unittest.TestCase):
+  def render(self, cache: RevisionChunkCache, revision: int, keys: list[str], renderer: CountingRenderer, *, voice: str = 'v'):
+    return cache.render(RevisionKey('m1', revision), voice, keys, renderer.for_keys(keys))
+
+  def test_appended_sentence_renders_only_the_new_chunk(self) -> None:
+    cache = RevisionChunkCache(budget_bytes=1 << 20)
+    renderer = CountingRenderer()
+
+    self.render(cache, 1, ['a', 'b'], renderer)
+    results = self.render(cache, 2, ['a', 'b', 'c'], renderer)
+
+    self.assertEqual(renderer.rendered, ['a', 'b', 'c'])
+    self.assertEqual(len(results), 3)
+    self.assertEqual(cache.stats()['reused_chunks'], 2)
+
+  def test_edited_middle_sentence_keeps_the_rest(self) -> None:
+    cache = RevisionChunkCache(budget_bytes=1 << 20)
+    renderer = CountingRenderer()
+
+    self.render(cache, 1, ['a', 'b', 'c'], renderer)
+    renderer.rendered.clear()
+    self.render(cache, 2, ['a', 'B', 'c'], renderer)
+
+    self.assertEqual(renderer.rendered, ['B'])
+
+  def test_older_revision_neither_reuses_nor_replaces_newer_audio(self) -> None:
+    cache = RevisionChunkCache(budget_bytes=1 << 20)
+    renderer = CountingRenderer()
+
+    self.render(cache, 3, ['a', 'b'], renderer)
+    renderer.rendered.clear()
+    self.render(cache, 2, ['a'], renderer)
+    self.render(cache, 4, ['a', 'b'], renderer)
+
+    self.assertEqual(renderer.rendered, ['a'])
+
+  def test_voice_change_renders_everything_again(self) -> None:
+    cache = RevisionChunkCache(budget_bytes=1 << 20)
+    renderer = CountingRenderer()
+
+    self.render(cache, 1, ['a'], renderer)
+    self.render(cache, 2, ['a'], renderer, voice='other')
+
+    self.assertEqual(renderer.rendered, ['a', 'a'])
+
+  def test_oldest_message_is_evicted_past_the_budget(self) -> None:
+    renderer = CountingRenderer(samples=1000)
+    cache = RevisionChunkCache(budget_bytes=6000)
+
+    cache.render(RevisionKey('m1', 1), 'v', ['a'], renderer.for_keys(['a']))
+    cache.render(RevisionKey('m2', 1), 'v', ['b'], renderer.for_keys(['b']))
+
+    stats = cache.stats()
+    self.assertEqual((stats['messages'], stats['bytes']), (1, 4000))
+    self.assertEqual(cache.reusable(RevisionKey('m1', 2), 'v'), {})
+
+  def test_budget_parsing(self) -> None:
+    self.assertEqual(resolve_revision_cache_budget(None), 16 * 1024 * 1024)
+    self.assertEqual(resolve_revision_cache_budget('0.5'), 512 * 1024)
+    with self.assertRaises(RuntimeError):
+      resolve_revision_cache_budget('lots')
+
+
+class RevisionEngine:
+  metadata = EngineMetadata(voice='v', engine='fake', model_path='m', voices_path='p')
+
+  def __init__(self) -> None:
+    self.revision_cache = RevisionChunkCache(budget_bytes=1 << 20)
+    self.revisions: list[RevisionKey | None] = []
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None, revision: RevisionKey | None = None):
+    self.revisions.append(revision)
+    return np.zeros(240, dtype=np.float32), 24_000
+
+
+class RevisionRuntimeTests(unittest.TestCase):
+  def test_speak_passes_message_revisions_to_the_engine(self) -> None:
+    engine = RevisionEngine()
+    with patch.object(worker_main, 'create_tts_engine', lambda: engine), patch.dict(os.environ, {'MH_AUDIO_TARGET': 'browser'}, clear=True):
+      runtime = worker_main.WorkerRuntime()
+    runtime.writer.send = lambda payload: None
+
+    async def scenario() -> None:
+      expires_at = int(time.time() * 1000) + 5_000
+      for generation, extra in enumerate([{'message_id': 'm1', 'revision': 2}, {}], start=1):
+        raw = {'op': 'speak', 'generation': generation, 'session_id': 's', 'utterance_id': f'u{generation}', 'text': 'hi', 'expires_at': expires_at, **extra}
+        await runtime._handle_command(ParsedCommand(raw=raw, op='speak', request_id=str(generation)))
+        while runtime.current_task is not None:
+          await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+
+    self.assertEqual(engine.revisions, [RevisionKey('m1', 2), None])
+    self.assertIn('fake', runtime._collect_stats()['revision_cache'])
+
+
+if __name__ == '__main__':
+  unittest.main()
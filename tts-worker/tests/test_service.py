@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+from tts_worker.engine import EngineMetadata
+from tts_worker.engine_router import RoutingTtsEngine
+from tts_worker.service import ClientEngine, FairGate, TtsService, resolve_service_slots
+
+
+class SharedEngine:
+  metadata = EngineMetadata(voice='v', engine='shared', model_path='m', voices_path='p')
+
+  def __init__(self, name: str = 'shared') -> None:
+    self.name = name
+    self.renders = 0
+
+  def prepare_text(self, text: str) -> str:
+    return text.strip()
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    self.renders += 1
+    return np.zeros(240, dtype=np.float32), 24_000
+
+  def cancel_stale(self) -> bool:
+    return True
+
+
+class FairGateTests(unittest.TestCase):
+  def test_waiting_clients_take_turns(self) -> None:
+    gate = FairGate(1)
+    order: list[str] = []
+    lock = threading.Lock()
+
+    def render(client: str) -> None:
+      with gate.turn(client):
+        with lock:
+          order.append(client)
+        time.sleep(0.01)
+
+    with gate.turn('busy'):
+      threads = []
+      # Client a queues three renders before b queues one; b must not wait for all of a's.
+      for client in ('a', 'a', 'a', 'b'):
+        thread = threading.Thread(target=render, args=(client,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)
+    for thread in threads:
+      thread.join(5)
+
+    self.assertEqual(order, ['a', 'b', 'a', 'a'])
+
+  def test_slots_parsing(self) -> None:
+    self.assertEqual(resolve_service_slots(None), 1)
+    self.assertEqual(resolve_service_slots(' 2 '), 2)
+    with self.assertRaises(ValueError):
+      resolve_service_slots('0')
+
+
+class ClientEngineTests(unittest.TestCase):
+  def test_capabilities_and_route_wrapping(self) -> None:
+    service = TtsService(Path('/unused.sock'))
+    qwen, kokoro = SharedEngine('qwen3'), SharedEngine('kokoro')
+    router = RoutingTtsEngine([('qwen3', qwen), ('kokoro', kokoro)], margin_ms=0)
+    client = ClientEngine(router, service, 'c1')
+
+    self.assertIsNone(getattr(client, 'cancel_stale', None))
+    self.assertIsNone(getattr(client, 'stream_text', None))
+    decision = client.route('hello', seconds_left=60.0, streams=lambda engine: False)
+    self.assertIsInstance(decision.engine, ClientEngine)
+    # The runtime names the chosen engine by identity against `engines`, so the wrappers must be stable.
+    self.assertIn(decision.engine, [engine for _, engine in client.engines])
+    self.assertIsNone(getattr(decision.engine, 'cancel_stale', None))
+
+
+@unittest.skipUnless(hasattr(asyncio, 'start_unix_server'), 'service mode needs Unix sockets')
+class ServiceTests(unittest.TestCase):
+  def test_two_clients_share_one_engine(self) -> None:
+    engine = SharedEngine()
+
+    async def session(path: Path, utterance: str) -> list[dict]:
+      reader, writer = await asyncio.open_unix_connection(str(path))
+      speak = {
+        'op': 'speak',
+        'id': utterance,
+        'generation': 1,
+        'session_id': 's',
+        'utterance_id': utterance,
+        'text': 'hello',
+        'expires_at': int(time.time() * 1000) + 5_000,
+      }
+      writer.write((json.dumps(speak) + '\n').encode('utf-8'))
+      messages: list[dict] = []
+      while True:
+        line = await asyncio.wait_for(reader.readline(), 10)
+        if not line:
+          break
+        message = json.loads(line)
+        messages.append(message)
+        if message.get('phase') == 'play_stop':
+          writer.write(b'{"op": "stats", "id": "st"}\n{"op": "shutdown"}\n')
+      writer.close()
+      return messages
+
+    async def scenario(path: Path) -> tuple[list[dict], list[dict]]:
+      service = TtsService(path, engine=engine)
+      await service.start()
+      try:
+        return tuple(await asyncio.gather(session(path, 'u1'), session(path, 'u2')))
+      finally:
+        service.close()
+
+    with tempfile.TemporaryDirectory() as directory, patch.dict(os.environ, {'MH_AUDIO_TARGET': 'browser'}, clear=True):
+      first, second = asyncio.run(scenario(Path(directory) / 'service.sock'))
+
+    self.assertEqual(engine.renders, 2)
+    for messages, utterance in ((first, 'u1'), (second, 'u2')):
+      self.assertEqual(messages[0]['type'], 'ready')
+      self.assertIn('audio', [message['type'] for message in messages])
+      self.assertEqual({message.get('utterance_id') for message in messages if message['type'] == 'event'}, {utterance})
+      stats = next(message for message in messages if message.get('id') == 'st')['result']['service']
+      self.assertEqual(stats['clients'][stats['client']]['renders'], 1)
+    self.assertNotEqual(
+      next(message for message in first if message.get('id') == 'st')['result']['service']['client'],
+      next(message for message in second if message.get('id') == 'st')['result']['service']['client'],
+    )
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+from tts_worker.kokoro_engine import _concatenate_chunks
+from tts_worker.silence import compact_pauses, resolve_max_pause_ms, voiced_bounds
+
+
+SAMPLE_RATE = 24_000
+
+
+def chunk(lead_ms: float, voiced_ms: float, trail_ms: float) -> tuple[np.ndarray, int]:
+  def samples(ms: float) -> int:
+    return int(SAMPLE_RATE * ms / 1000)
+
+  voiced = 0.3 * np.sin(2 * np.pi * 220 * np.arange(samples(voiced_ms)) / SAMPLE_RATE)
+  noise = np.full(samples(lead_ms) + samples(trail_ms), 1e-4)
+  audio = np.concatenate([noise[:samples(lead_ms)], voiced, noise[samples(lead_ms):]]).astype(np.float32)
+  return audio, SAMPLE_RATE
+
+
+class VoicedBoundsTests(unittest.TestCase):
+  def test_bounds_follow_frames_above_the_threshold(self) -> None:
+    audio, _ = chunk(200, 500, 300)
+
+    start, end = voiced_bounds(audio, SAMPLE_RATE)
+
+    self.assertAlmostEqual(start / SAMPLE_RATE, 0.2, delta=0.011)
+    self.assertAlmostEqual(end / SAMPLE_RATE, 0.7, delta=0.011)
+
+  def test_silent_audio_has_no_bounds(self) -> None:
+    self.assertIsNone(voiced_bounds(np.full(2_400, 1e-4, dtype=np.float32), SAMPLE_RATE))
+    self.assertIsNone(voiced_bounds(np.zeros(0, dtype=np.float32), SAMPLE_RATE))
+
+
+class CompactPausesTests(unittest.TestCase):
+  def test_edges_are_trimmed_and_gaps_capped(self) -> None:
+    rendered = [chunk(200, 500, 400), chunk(400, 500, 200)]
+
+    audio, sample_rate = _concatenate_chunks(compact_pauses(rendered, max_pause_ms=250))
+
+    # 500 ms voiced per chunk, 30 ms margins at each edge, and one 250 ms pause.
+    self.assertEqual(sample_rate, SAMPLE_RATE)
+    self.assertAlmostEqual(audio.shape[0] / SAMPLE_RATE, 1.0 + 0.12 + 0.25, delta=0.03)
+
+  def test_short_gaps_and_silent_chunks(self) -> None:
+    short = compact_pauses([chunk(0, 300, 50), chunk(50, 300, 0)], max_pause_ms=250)
+    self.assertEqual(sum(audio.shape[0] for audio, _ in short), 2 * int(SAMPLE_RATE * 0.35))
+
+    silent = (np.zeros(SAMPLE_RATE, dtype=np.float32), SAMPLE_RATE)
+    folded = compact_pauses([chunk(0, 300, 0), silent, chunk(0, 300, 0)], max_pause_ms=250)
+    self.assertEqual([audio.shape[0] for audio, _ in folded], [7_200, 6_000, 7_200])
+
+  def test_disabled_or_all_silent_input_is_unchanged(self) -> None:
+    rendered = [chunk(200, 500, 400)]
+    self.assertIs(compact_pauses(rendered, max_pause_ms=None)[0][0], rendered[0][0])
+
+    silent = [(np.zeros(2_400, dtype=np.float32), SAMPLE_RATE)]
+    self.assertEqual(compact_pauses(silent, max_pause_ms=100)[0][0].shape[0], 2_400)
+
+  def test_max_pause_parsing(self) -> None:
+    self.assertEqual(resolve_max_pause_ms(None), 300.0)
+    self.assertIsNone(resolve_max_pause_ms(' OFF '))
+    self.assertEqual(resolve_max_pause_ms('120'), 120.0)
+    for raw in ('-1', 'short'):
+      with self.assertRaises(ValueError):
+        resolve_max_pause_ms(raw)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+import wave
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.playback import PlaybackEngine, encode_pcm
+from tts_worker.protocol import ParsedCommand
+from tts_worker.sinks import ArchiveSink, SinkFanout, resolve_archive_dir
+
+
+class SinkFanoutTests(unittest.TestCase):
+  def test_slow_sink_does_not_delay_fast_sink(self) -> None:
+    fanout = SinkFanout()
+
+    async def fast(delivered) -> str:
+      delivered()
+      await asyncio.sleep(0.05)
+      return 'fast'
+
+    async def slow(delivered) -> str:
+      await asyncio.sleep(0.05)
+      return 'slow'
+
+    async def broken(delivered) -> None:
+      raise OSError('disk full')
+
+    results = asyncio.run(fanout.run({'fast': fast, 'slow': slow, 'broken': broken}))
+
+    self.assertEqual((results['fast'], results['slow']), ('fast', 'slow'))
+    self.assertIsInstance(results['broken'], OSError)
+    stats = fanout.stats()
+    self.assertLess(stats['fast']['last_ms'], 25.0)
+    self.assertGreaterEqual(stats['slow']['last_ms'], 45.0)
+    self.assertEqual((stats['broken']['deliveries'], stats['broken']['failures']), (0, 1))
+
+  def test_archive_dir_parsing(self) -> None:
+    self.assertIsNone(resolve_archive_dir(None))
+    self.assertIsNone(resolve_archive_dir('  '))
+    self.assertEqual(resolve_archive_dir('/tmp/tts'), Path('/tmp/tts'))
+
+
+class ArchiveSinkTests(unittest.TestCase):
+  def test_whole_and_streamed_utterances_become_wav_files(self) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+      archive = ArchiveSink(Path(directory) / 'nested')
+      path = archive.write(archive.path_for('s/1', 'u 1', 3), encode_pcm(np.zeros(480, dtype=np.float32), 24_000))
+      self.assertTrue(path.name.endswith('-s_1-u_1-g3.wav'))
+
+      stream = archive.open_stream(Path(directory) / 'stream.wav', 16_000)
+      stream.write(np.zeros(160, dtype=np.float32))
+      stream.write(np.zeros(160, dtype=np.float32))
+      stream.close()
+      with wave.open(str(Path(directory) / 'stream.wav'), 'rb') as wav_file:
+        self.assertEqual((wav_file.getframerate(), wav_file.getnframes()), (16_000, 320))
+
+      aborted = archive.open_stream(Path(directory) / 'aborted.wav', 16_000)
+      aborted.write(np.zeros(160, dtype=np.float32))
+      aborted.abort()
+      self.assertEqual(sorted(item.name for item in Path(directory).iterdir()), ['nested', 'stream.wav'])
+
+
+class FakeEngine:
+  metadata = EngineMetadata(voice='v', engine='fake', model_path='m', voices_path='p')
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    return np.full(2_400, 0.1, dtype=np.float32), 24_000
+
+
+class StreamingEngine(FakeEngine):
+  def stream_text(self, text: str, *, voice_override: str | None = None):
+    yield np.full(1_200, 0.1, dtype=np.float32), 24_000
+    yield np.full(1_200, 0.1, dtype=np.float32), 24_000
+
+
+class FanoutRuntimeTests(unittest.TestCase):
+  def run_speak(self, engine: FakeEngine, directory: str) -> tuple[list[dict], worker_main.WorkerRuntime]:
+    env = {'MH_AUDIO_TARGET': 'both', 'MH_TTS_ARCHIVE_DIR': directory}
+    with patch.object(worker_main, 'create_tts_engine', lambda: engine), patch.dict(os.environ, env, clear=True):
+      runtime = worker_main.WorkerRuntime()
+    runtime.playback = PlaybackEngine(allow_local_output=False)
+    sent: list[dict] = []
+    runtime.writer.send = sent.append
+    raw = {
+      'op': 'speak',
+      'generation': 1,
+      'session_id': 's',
+      'utterance_id': 'u',
+      'text': 'hello',
+      'expires_at': int(time.time() * 1000) + 5_000,
+    }
+
+    async def scenario() -> None:
+      await runtime._handle_command(ParsedCommand(raw=raw, op='speak', request_id='1'))
+      while runtime.current_task is not None:
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    return sent, runtime
+
+  def test_local_playback_starts_before_a_slow_browser_clip(self) -> None:
+    encode_browser_clip = worker_main.encode_browser_clip
+
+    def slow_encode(pcm, codec):
+      time.sleep(0.05)
+      return encode_browser_clip(pcm, codec)
+
+    with tempfile.TemporaryDirectory() as directory, patch.object(worker_main, 'encode_browser_clip', slow_encode):
+      sent, runtime = self.run_speak(FakeEngine(), directory)
+      self.assertEqual(len(list(Path(directory).glob('*-s-u-g1.wav'))), 1)
+
+    sinks = runtime._collect_stats()['sinks']
+    self.assertEqual(set(sinks), {'local', 'browser', 'archive'})
+    self.assertLess(sinks['local']['last_ms'], sinks['browser']['last_ms'])
+    order = [message.get('phase', message['type']) for message in sent if message['type'] in ('event', 'audio')]
+    self.assertLess(order.index('play_start'), order.index('audio'))
+    self.assertLess(order.index('audio'), order.index('play_stop'))
+
+  def test_streamed_blocks_are_archived(self) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+      sent, runtime = self.run_speak(StreamingEngine(), directory)
+      (path,) = Path(directory).glob('*.wav')
+      with wave.open(str(path), 'rb') as wav_file:
+        self.assertEqual(wav_file.getnframes(), 2_400)
+
+    self.assertEqual(runtime._collect_stats()['sinks']['archive']['deliveries'], 1)
+    self.assertIn('audio', [message['type'] for message in sent])
+
+
+if __name__ == '__main__':
+  unittest.main()
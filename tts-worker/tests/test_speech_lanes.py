@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.protocol import ParsedCommand
+from tts_worker.speech_lanes import SpeechLanes, clamp_priority, normalize_policy, resolve_scheduler_mode
+
+
+class SpeechLanesTests(unittest.TestCase):
+  def test_higher_priority_lane_head_goes_first(self) -> None:
+    lanes = SpeechLanes()
+    lanes.push('a', 'a1', priority=0, replace=False)
+    lanes.push('b', 'b1', priority=2, replace=False)
+
+    self.assertEqual(lanes.pop().request, 'b1')
+    self.assertEqual(lanes.pop().request, 'a1')
+    self.assertIsNone(lanes.pop())
+
+  def test_equal_priorities_go_oldest_first_and_sessions_keep_their_order(self) -> None:
+    lanes = SpeechLanes()
+    lanes.push('a', 'a1', priority=1, replace=False)
+    lanes.push('b', 'b1', priority=1, replace=False)
+    lanes.push('a', 'a2', priority=2, replace=False)
+
+    self.assertEqual([lanes.pop().request for _ in range(3)], ['a1', 'a2', 'b1'])
+
+  def test_replace_supersedes_only_the_same_session(self) -> None:
+    lanes = SpeechLanes()
+    lanes.push('a', 'a1', priority=0, replace=True)
+    lanes.push('b', 'b1', priority=0, replace=True)
+
+    _, superseded = lanes.push('a', 'a2', priority=0, replace=True)
+
+    self.assertEqual([entry.request for entry in superseded], ['a1'])
+    self.assertEqual(lanes.depths(), {'a': 1, 'b': 1})
+
+  def test_clear_by_session(self) -> None:
+    lanes = SpeechLanes()
+    lanes.push('a', 'a1', priority=0, replace=False)
+    lanes.push('b', 'b1', priority=0, replace=False)
+
+    self.assertEqual([entry.request for entry in lanes.clear('a')], ['a1'])
+    self.assertEqual(len(lanes), 1)
+
+  def test_request_fields_are_normalized(self) -> None:
+    self.assertEqual([clamp_priority(value) for value in (None, -1, 2, '3', 9, 'x')], [0, 0, 2, 3, 3, 0])
+    self.assertEqual([normalize_policy(value) for value in ('queue', 'INTERRUPT', 'other', None)], ['queue', 'interrupt', 'replace', 'replace'])
+    self.assertEqual(resolve_scheduler_mode(None), 'replace')
+    with self.assertRaises(ValueError):
+      resolve_scheduler_mode('fifo')
+
+
+class RecordingEngine:
+  metadata = EngineMetadata(voice='v', engine='fake', model_path='m', voices_path='p')
+
+  def __init__(self) -> None:
+    self.calls: list[str] = []
+    self.active = 0
+    self.max_active = 0
+    self._lock = threading.Lock()
+
+  def prepare_text(self, text: str) -> str:
+    return text
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    with self._lock:
+      self.calls.append(text)
+      self.active += 1
+      self.max_active = max(self.max_active, self.active)
+    time.sleep(0.05)
+    with self._lock:
+      self.active -= 1
+    return np.zeros(240, dtype=np.float32), 24_000
+
+
+class LaneRuntimeTests(unittest.TestCase):
+  def run_speaks(self, speaks: list[dict]) -> tuple[list[dict], RecordingEngine, worker_main.WorkerRuntime]:
+    engine = RecordingEngine()
+    env = {'MH_AUDIO_TARGET': 'browser', 'MH_TTS_SCHEDULER': 'lanes'}
+    with patch.object(worker_main, 'create_tts_engine', lambda: engine), patch.dict(os.environ, env, clear=True):
+      runtime = worker_main.WorkerRuntime()
+    events: list[dict] = []
+    runtime.writer.send = lambda payload: events.append(payload) if payload.get('type') == 'event' else None
+
+    async def scenario() -> None:
+      expires_at = int(time.time() * 1000) + 10_000
+      for generation, speak in enumerate(speaks, start=1):
+        raw = {
+          'op': 'speak',
+          'generation': generation,
+          'utterance_id': f'{speak["session_id"]}-{generation}',
+          'expires_at': expires_at,
+          **speak,
+        }
+        await runtime._handle_command(ParsedCommand(raw=raw, op='speak', request_id=str(generation)))
+      while runtime.current_task is not None or len(runtime.lanes):
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    return events, engine, runtime
+
+  def test_speech_from_several_sessions_queues_by_priority(self) -> None:
+    events, engine, runtime = self.run_speaks([
+      {'session_id': 'a', 'text': 'one'},
+      {'session_id': 'b', 'text': 'two'},
+      {'session_id': 'c', 'text': 'three', 'priority': 2},
+    ])
+
+    played = [event['utterance_id'] for event in events if event['phase'] == 'play_stop']
+    self.assertEqual(played, ['a-1', 'c-3', 'b-2'])
+    # `two` was already the lookahead pick when `three` arrived, so `three` renders live and each text renders once.
+    self.assertEqual(sorted(engine.calls), ['one', 'three', 'two'])
+    self.assertEqual(runtime._collect_stats()['lanes']['prerendered_played'], 1)
+
+  def test_lookahead_waits_for_the_current_synthesis(self) -> None:
+    _, engine, runtime = self.run_speaks([
+      {'session_id': 'a', 'text': 'one'},
+      {'session_id': 'b', 'text': 'two'},
+    ])
+
+    self.assertEqual(engine.calls, ['one', 'two'])
+    self.assertEqual(engine.max_active, 1)
+    self.assertEqual(runtime._collect_stats()['lanes']['prerendered_played'], 1)
+
+  def test_newer_speak_supersedes_the_queued_one_in_its_session(self) -> None:
+    events, engine, _ = self.run_speaks([
+      {'session_id': 'a', 'text': 'one'},
+      {'session_id': 'b', 'text': 'two'},
+      {'session_id': 'b', 'text': 'two again'},
+    ])
+
+    dropped = [(event['utterance_id'], event['reason']) for event in events if event['phase'] == 'dropped']
+    self.assertEqual(dropped, [('b-2', 'superseded')])
+    self.assertNotIn('two', engine.calls)
+
+
+if __name__ == '__main__':
+  unittest.main()
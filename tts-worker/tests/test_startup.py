@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import builtins
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+import tts_worker.__main__ as worker_main
+from tts_worker.engine import EngineMetadata
+from tts_worker.playback import PlaybackEngine
+from tts_worker.protocol import ParsedCommand
+from tts_worker.startup import DeferredTtsEngine, StartupProfile, resolve_fast_start
+
+
+class SlowEngine:
+  metadata = EngineMetadata(voice='v', engine='slow', model_path='m', voices_path='p')
+
+  def prepare_text(self, text: str) -> str:
+    return text.strip()
+
+  def synthesize_text(self, text: str, *, voice_override: str | None = None):
+    return np.zeros(240, dtype=np.float32), 24_000
+
+
+class BlockingFactory:
+  def __init__(self) -> None:
+    self.release = threading.Event()
+    self.calls = 0
+
+  def __call__(self) -> SlowEngine:
+    self.calls += 1
+    self.release.wait(5)
+    return SlowEngine()
+
+
+PLACEHOLDER = EngineMetadata(voice='', engine='kokoro', model_path='', voices_path='')
+
+
+class DeferredEngineTests(unittest.TestCase):
+  def test_fast_start_parsing(self) -> None:
+    self.assertFalse(resolve_fast_start(None))
+    self.assertTrue(resolve_fast_start(' ON '))
+    self.assertFalse(resolve_fast_start('0'))
+    with self.assertRaises(ValueError):
+      resolve_fast_start('soon')
+
+  def test_background_load_then_delegation(self) -> None:
+    factory = BlockingFactory()
+    engine = DeferredTtsEngine(factory, PLACEHOLDER)
+    done = threading.Event()
+
+    self.assertTrue(engine.start_preload(on_done=done.set))
+    self.assertTrue(engine.is_busy_loading())
+    self.assertEqual(engine.metadata.engine, 'kokoro')
+    self.assertEqual(engine.engine_status()['state'], 'loading')
+    self.assertIsNone(getattr(engine, 'stream_text', None))
+
+    factory.release.set()
+    self.assertTrue(done.wait(5))
+    self.assertFalse(engine.is_busy_loading())
+    self.assertEqual(engine.metadata.engine, 'slow')
+    self.assertEqual(engine.prepare_text(' hi '), 'hi')
+    self.assertEqual(engine.engine_status()['state'], 'ready')
+    # SlowEngine does not stream, so the runtime must not see a stream_text capability.
+    self.assertIsNone(getattr(engine, 'stream_text', None))
+    self.assertEqual(factory.calls, 1)
+
+  def test_failed_load_is_reported(self) -> None:
+    def broken() -> SlowEngine:
+      raise FileNotFoundError('missing model file')
+
+    engine = DeferredTtsEngine(broken, PLACEHOLDER)
+    done = threading.Event()
+    with patch('sys.stderr'):
+      engine.start_preload(on_done=done.set)
+      self.assertTrue(done.wait(5))
+
+    status = engine.engine_status()
+    self.assertEqual((status['state'], status['error']), ('failed', 'missing model file'))
+    self.assertFalse(engine.is_busy_loading())
+    with self.assertRaises(RuntimeError):
+      engine.synthesize_text('hello')
+
+
+class StartupProfileTests(unittest.TestCase):
+  def test_stages_marks_and_traced_imports(self) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+      (Path(directory) / 'mh_profiled_module.py').write_text('VALUE = 1\n', encoding='utf-8')
+      sys.path.insert(0, directory)
+      self.addCleanup(sys.modules.pop, 'mh_profiled_module', None)
+      self.addCleanup(sys.path.remove, directory)
+      original_import = builtins.__import__
+      profile = StartupProfile(report=True)
+      with profile.stage('engine_build'):
+        __import__('mh_profiled_module')
+      profile.mark('ready')
+      with patch('sys.stderr') as stderr:
+        profile.finish()
+        profile.finish()
+
+    stats = profile.stats()
+    self.assertIn('engine_build', stats['stages'])
+    self.assertLessEqual(stats['ready_ms'], stats['engine_ready_ms'])
+    self.assertIn('mh_profiled_module', [item['module'] for item in stats['imports']])
+    self.assertIs(builtins.__import__, original_import)
+    self.assertTrue(stderr.write.called)
+
+
+class FastStartRuntimeTests(unittest.TestCase):
+  def test_ready_and_ping_precede_the_engine_load(self) -> None:
+    factory = BlockingFactory()
+    env = {'MH_AUDIO_TARGET': 'local', 'MH_TTS_FAST_START': '1', 'TTS_ENGINE': 'kokoro'}
+    with patch.object(worker_main, 'create_tts_engine', factory), patch.dict(os.environ, env, clear=True):
+      runtime = worker_main.WorkerRuntime()
+    runtime.playback = PlaybackEngine(allow_local_output=False)
+    sent: list[dict] = []
+    runtime.writer.send = sent.append
+
+    async def scenario() -> None:
+      runtime._start_engine_preload()
+      runtime._emit_ready()
+      await runtime._handle_command(ParsedCommand(raw={'op': 'ping', 'id': 'p1'}, op='ping', request_id='p1'))
+      factory.release.set()
+      while len([message for message in sent if message['type'] == 'ready']) < 2:
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+
+    ready = [message for message in sent if message['type'] == 'ready']
+    self.assertEqual((ready[0]['engine'], ready[0]['engine_state']['state']), ('kokoro', 'loading'))
+    self.assertEqual((ready[1]['engine'], ready[1]['engine_state']['state']), ('slow', 'ready'))
+    ping = next(message for message in sent if message['type'] == 'response')
+    self.assertEqual(ping['result']['engine_state']['state'], 'loading')
+    startup = runtime._collect_stats()['startup']
+    self.assertTrue(startup['fast_start'])
+    self.assertIn('engine_build', startup['stages'])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = ROOT_DIR / 'tts-worker' / 'src'
+if str(SRC_DIR) not in sys.path:
+  sys.path.insert(0, str(SRC_DIR))
+
+from tts_worker.time_stretch import StreamingTimeStretcher, time_stretch
+
+
+SAMPLE_RATE = 24_000
+
+
+def tone(seconds: float, hz: float = 220.0) -> np.ndarray:
+  t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+  return (0.5 * np.sin(2.0 * np.pi * hz * t)).astype(np.float32)
+
+
+def dominant_hz(audio: np.ndarray) -> float:
+  spectrum = np.abs(np.fft.rfft(audio * np.hanning(audio.shape[0])))
+  return float(np.argmax(spectrum)) * SAMPLE_RATE / audio.shape[0]
+
+
+class TimeStretchTests(unittest.TestCase):
+  def test_output_length_follows_rate(self) -> None:
+    source = tone(1.0)
+    for rate in (0.8, 1.1, 1.5):
+      with self.subTest(rate=rate):
+        self.assertEqual(time_stretch(source, rate, SAMPLE_RATE).shape[0], round(source.shape[0] / rate))
+
+  def test_pitch_is_preserved(self) -> None:
+    rendered = time_stretch(tone(2.0), 1.25, SAMPLE_RATE)
+    self.assertAlmostEqual(dominant_hz(rendered[2_400:-2_400]), 220.0, delta=2.0)
+
+  def test_unit_rate_is_a_passthrough(self) -> None:
+    source = tone(0.1)
+    np.testing.assert_array_equal(time_stretch(source, 1.0, SAMPLE_RATE), source)
+
+  def test_block_processing_matches_whole_buffer(self) -> None:
+    source = tone(1.0) * np.linspace(0.2, 1.0, SAMPLE_RATE, dtype=np.float32)
+    stretcher = StreamingTimeStretcher(1.25, SAMPLE_RATE)
+    parts = [stretcher.process(source[start:start + 1_700]) for start in range(0, source.shape[0], 1_700)]
+    parts.append(stretcher.flush())
+
+    np.testing.assert_allclose(np.concatenate(parts), time_stretch(source, 1.25, SAMPLE_RATE), atol=1e-6)
+
+  def test_rejects_non_positive_rate(self) -> None:
+    with self.assertRaises(ValueError):
+      StreamingTimeStretcher(0.0, SAMPLE_RATE)
+
+
+if __name__ == '__main__':
+  unittest.main()